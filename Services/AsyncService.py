@@ -0,0 +1,393 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+"""
+Created on Wed Oct 21 10:14:36 2026
+
+@author: laisz
+"""
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Callable
+from OrderHandler import OrdersHandler
+from Order import Order
+from Customer import Customer
+
+
+class _AsyncFacade:
+    """
+    Runs blocking calls on a bounded pool of threads, so the event loop
+    is never blocked by disk I/O, and lets concurrent loads of the same
+    key share one call.
+    """
+    def __init__(self, executor: Executor = None, max_workers: int = 8):
+        """
+        Initialize the facade.
+
+        Parameters
+        ----------
+        executor : Executor, optional
+            The executor to run blocking calls on, e.g. shared with another
+            facade. It is left open by close().
+        max_workers : int, optional
+            The number of threads of the executor created if none is given.
+        """
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers,
+                                                        thread_name_prefix=type(self).__name__)
+        self._inflight: dict[tuple, asyncio.Future] = {}
+
+    @property
+    def executor(self) -> Executor:
+        return self._executor
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """
+        Wait for the running calls, then shut down the executor if it was
+        created by this facade.
+        """
+        if self._owns_executor:
+            await asyncio.to_thread(self._executor.shutdown)
+
+    async def _run(self, function: Callable, *args):
+        """
+        Run a blocking call on the executor.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, partial(function, *args))
+
+    async def _coalesce(self, key: tuple, function: Callable, *args):
+        """
+        Run a blocking call, unless the same call is already running, in
+        which case wait for its result instead.
+
+        The call is shielded, so one caller being cancelled does not cancel
+        it for the others.
+        """
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._run(function, *args))
+            self._inflight[key] = future
+            future.add_done_callback(partial(self._landed, key))
+        return await asyncio.shield(future)
+
+    def _landed(self, key: tuple, future: asyncio.Future) -> None:
+        """
+        Forget a finished call, so the next one loads afresh.
+        """
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled():
+            future.exception()  # Retrieved even if every caller was cancelled
+
+
+class AsyncOrdersHandler(_AsyncFacade):
+    """
+    An asyncio front end of OrdersHandler.
+
+    Every call into the handler runs on a bounded thread pool, so loading
+    and saving orders does not block the event loop. Concurrent get()
+    calls for the same order share one load, and the filters are streamed,
+    loading a window of orders at a time instead of all of them at once.
+
+    Attributes:
+        handler (OrdersHandler): The wrapped handler.
+        executor (Executor): The executor blocking calls run on.
+
+    Methods:
+        add(*order_args): Create and add a new order.
+        get(order_ID): Retrieve an order by ID.
+        log(order_ID, *entry_args): Add a log entry to an order.
+        save(order): Save a single order.
+        flush(): Persist the cached orders that have changed.
+        checkpoint(): Persist the changed orders and cut the log.
+        iter_by_customer(customer_ID, window): Stream a customer's orders.
+        iter_by_date(start_date, end_date, customer_ID, window): Stream the
+            orders within a date range.
+        iter_delayed(window): Stream the delayed orders.
+        close(): Shut down the executor.
+    """
+    def __init__(self, handler: OrdersHandler = None, executor: Executor = None,
+                 max_workers: int = 8):
+        """
+        Initialize an AsyncOrdersHandler.
+
+        Parameters
+        ----------
+        handler : OrdersHandler, optional
+            The handler to wrap. Defaults to the singleton, which is created
+            on the executor on first use, since it recovers from disk.
+        executor : Executor, optional
+            The executor to run blocking calls on. It is left open by close().
+        max_workers : int, optional
+            The number of threads of the executor created if none is given.
+        """
+        super().__init__(executor, max_workers)
+        self._handler = handler
+
+    @property
+    def handler(self) -> OrdersHandler:
+        if self._handler is None:
+            self._handler = OrdersHandler()
+        return self._handler
+
+    def _call(self, name: str, *args):
+        """
+        Call a method of the handler. Runs on the executor.
+        """
+        return getattr(self.handler, name)(*args)
+
+
+    ## Methods
+    async def add(self, *order_args) -> str:
+        """
+        Create a new order and add it to the collection.
+
+        Parameters
+        ----------
+        *order_args
+            Arguments passed to the Order constructor.
+
+        Returns
+        -------
+        str
+            The ID of the newly created order.
+        """
+        return await self._run(self._call, 'add', *order_args)
+
+    async def get(self, order_ID: str) -> Order:
+        """
+        Retrieve an order by its ID. Concurrent calls for the same order
+        are served by a single load.
+
+        Parameters
+        ----------
+        order_ID : str
+            The ID of the order to retrieve.
+
+        Returns
+        -------
+        Order
+            The requested Order object.
+        """
+        return await self._coalesce(('get', order_ID), self._call, 'get', order_ID)
+
+    async def log(self, order_ID: str, *entry_args) -> None:
+        """
+        Add a log entry to an order.
+
+        Parameters
+        ----------
+        order_ID : str
+            The ID of the order to update.
+        *entry_args
+            Arguments passed to Order.new_log().
+
+        Returns
+        -------
+        None
+        """
+        await self._run(self._call, 'log', order_ID, *entry_args)
+
+    async def save(self, order: Order) -> int:
+        """
+        Save a single order, e.g. to persist it before the next flush.
+
+        Parameters
+        ----------
+        order : Order
+            The order to save.
+
+        Returns
+        -------
+        int
+            The number of bytes written.
+        """
+        return await self._run(self._call, 'save', order)
+
+    async def flush(self) -> tuple[int, int]:
+        """
+        Persist the cached orders that have unsaved changes.
+
+        Returns
+        -------
+        tuple[int, int]
+            The number of orders and the number of bytes written.
+        """
+        return await self._run(self._call, 'flush')
+
+    async def checkpoint(self) -> tuple[int, int]:
+        """
+        Persist the changed orders, then cut the write-ahead log.
+
+        Returns
+        -------
+        tuple[int, int]
+            The number of orders and the number of bytes written.
+        """
+        return await self._run(self._call, 'checkpoint')
+
+    def iter_by_customer(self, customer_ID: str,
+                         window: int = 32) -> AsyncIterator[Order]:
+        """
+        Stream the orders belonging to a specific customer.
+
+        Parameters
+        ----------
+        customer_ID : str
+            The ID of the customer.
+        window : int, optional
+            The number of orders loaded concurrently.
+
+        Returns
+        -------
+        AsyncIterator[Order]
+            The orders, in the order filter_by_customer() returns them.
+        """
+        return self._stream(window, 'ids_by_customer', customer_ID)
+
+    def iter_by_date(self, start_date, end_date, customer_ID: str = None,
+                     window: int = 32) -> AsyncIterator[Order]:
+        """
+        Stream the orders with their due date within a date range.
+
+        Parameters
+        ----------
+        start_date : date
+            The start date of the range (inclusive).
+        end_date : date
+            The end date of the range (inclusive).
+        customer_ID : str, optional
+            Only stream the orders paid by this customer.
+        window : int, optional
+            The number of orders loaded concurrently.
+
+        Returns
+        -------
+        AsyncIterator[Order]
+            The orders, in the order filter_by_date() returns them.
+        """
+        return self._stream(window, 'ids_by_date', start_date, end_date, customer_ID)
+
+    def iter_delayed(self, window: int = 32) -> AsyncIterator[Order]:
+        """
+        Stream the orders that missed their due time.
+
+        Parameters
+        ----------
+        window : int, optional
+            The number of orders loaded concurrently.
+
+        Returns
+        -------
+        AsyncIterator[Order]
+            The orders, in the order filter_delayed() returns them.
+        """
+        return self._stream(window, 'ids_delayed')
+
+    async def _stream(self, window: int, query: str, *args) -> AsyncIterator[Order]:
+        """
+        Look up the IDs matching a query, then load and yield the orders a
+        window at a time. The next window is only loaded once the consumer
+        has taken the current one.
+        """
+        if window < 1:
+            raise ValueError(f"window must be positive, got {window}")
+
+        order_IDs = await self._run(self._call, query, *args)
+        for start in range(0, len(order_IDs), window):
+            orders = await asyncio.gather(*(self.get(order_ID)
+                                            for order_ID in order_IDs[start:start + window]))
+            for order in orders:
+                yield order
+
+
+class AsyncCustomerService(_AsyncFacade):
+    """
+    An asyncio front end of the customer lookups.
+
+    Loading and saving customers runs on a bounded thread pool, so it does
+    not block the event loop. Concurrent loads of the same customer share
+    one load and get the same Customer object.
+
+    Attributes:
+        executor (Executor): The executor blocking calls run on.
+
+    Methods:
+        from_ID(ID): Load a customer by ID.
+        from_email(email): Load a customer by email.
+        save(customer): Save a customer.
+        close(): Shut down the executor.
+    """
+    async def from_ID(self, ID: str) -> Customer:
+        """
+        Load a customer by ID.
+
+        Parameters
+        ----------
+        ID : str
+            The ID of the customer.
+
+        Returns
+        -------
+        Customer
+
+        Raises
+        ------
+        FileNotFoundError
+            If no customer is stored under the ID.
+        """
+        return await self._coalesce(('ID', ID), Customer.from_ID, ID)
+
+    async def from_email(self, email: str) -> Customer:
+        """
+        Load a customer by email.
+
+        Parameters
+        ----------
+        email : str
+            The email address of the customer.
+
+        Returns
+        -------
+        Customer
+
+        Raises
+        ------
+        ValueError
+            If no customer is registered with the email.
+        """
+        return await self._coalesce(('email', email), Customer.from_email, email)
+
+    async def save(self, customer: Customer) -> None:
+        """
+        Save a customer.
+
+        Parameters
+        ----------
+        customer : Customer
+            The customer to save.
+
+        Returns
+        -------
+        None
+        """
+        await self._run(customer.save)
+
+
+if __name__ == "__main__":
+    async def main():
+        async with AsyncOrdersHandler(max_workers=4) as handler:
+            orders = await asyncio.gather(*(handler.get(order_ID)
+                                            for order_ID in handler.handler._order_list()[:5]))
+            print(orders)
+            async for order in handler.iter_delayed():
+                print(order.ID, order.status)
+
+    asyncio.run(main())
@@ -193,7 +193,7 @@ class Bill:
         -------
         Bill
         """
-        instance = cls(outer_ref)
+        instance = cls(outer_ref, None)
         instance._ID = "B" + str(instance.outer.ID)[1:] + data.get('ID')
         instance._amount = data.get('amount')
         instance._issue_status = data.get('issue_status')
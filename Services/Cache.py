@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+"""
+Created on Sat Oct 17 15:21:52 2026
+
+@author: laisz
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+
+class LRUCache:
+    """
+    A size-bounded mapping that evicts its least recently used entry.
+
+    The cache is safe to share between threads. on_evict is called with
+    the cache's lock held, so an evicted entry is handed over before any
+    other thread can miss it; it should be quick and not use the cache.
+
+    Attributes:
+        capacity (int): The maximum number of entries kept.
+        hits (int): The number of lookups that found their key.
+        misses (int): The number of lookups that did not.
+        evictions (int): The number of entries evicted so far.
+
+    Methods:
+        get(key, default): Look up a key and mark it as recently used.
+        peek(key, default): Look up a key without counting or marking it.
+        put(key, value): Insert or replace an entry, evicting if full.
+        discard(key): Remove an entry without calling on_evict.
+        values(): Get all cached values.
+        clear(): Remove all entries.
+        stats(): Get the counters as a dict.
+    """
+    def __init__(self, capacity: int,
+                 on_evict: Callable[[Any, Any], None] = None):
+        """
+        Initialize an LRUCache.
+
+        Parameters
+        ----------
+        capacity : int
+            The maximum number of entries kept. Must be positive.
+        on_evict : Callable[[key, value], None], optional
+            Called with each entry pushed out by put(), e.g. to write it back.
+        """
+        if capacity < 1:
+            raise ValueError(f"capacity must be positive, got {capacity}")
+
+        self._capacity = capacity
+        self._on_evict = on_evict
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    def evictions(self) -> int:
+        return self._evictions
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+    ## Methods
+    def get(self, key: Any, default: Any = None) -> Any:
+        """
+        Look up a key and mark it as the most recently used.
+
+        Parameters
+        ----------
+        key : Any
+            The key to look up.
+        default : Any, optional
+            The value returned on a miss. Defaults to None.
+
+        Returns
+        -------
+        Any
+            The cached value, or default.
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self._misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def peek(self, key: Any, default: Any = None) -> Any:
+        """
+        Look up a key without counting a hit or miss, and without marking
+        it as recently used, e.g. to check again after waiting for a lock.
+
+        Parameters
+        ----------
+        key : Any
+            The key to look up.
+        default : Any, optional
+            The value returned if the key is absent. Defaults to None.
+
+        Returns
+        -------
+        Any
+            The cached value, or default.
+        """
+        with self._lock:
+            return self._data.get(key, default)
+
+    def put(self, key: Any, value: Any) -> None:
+        """
+        Insert or replace an entry, then evict the least recently used
+        entries while the cache is over capacity.
+
+        Parameters
+        ----------
+        key : Any
+            The key of the entry.
+        value : Any
+            The value of the entry.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+
+            while len(self._data) > self._capacity:
+                old_key, old_value = self._data.popitem(last=False)
+                self._evictions += 1
+                if self._on_evict is not None:
+                    self._on_evict(old_key, old_value)
+
+    def discard(self, key: Any) -> None:
+        """
+        Remove an entry, if present, without calling on_evict.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def values(self) -> list:
+        """
+        Get all cached values, from least to most recently used.
+        """
+        with self._lock:
+            return list(self._data.values())
+
+    def clear(self) -> None:
+        """
+        Remove all entries without calling on_evict.
+        """
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """
+        Get the counters of the cache.
+
+        Returns
+        -------
+        dict
+            The size, capacity, hits, misses and evictions of the cache.
+        """
+        with self._lock:
+            return {'size': len(self._data),
+                    'capacity': self._capacity,
+                    'hits': self._hits,
+                    'misses': self._misses,
+                    'evictions': self._evictions}
+
+
+if __name__ == "__main__":
+    cache = LRUCache(2, on_evict=lambda key, value: print(f"evicted {key}"))
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    print(cache.stats())
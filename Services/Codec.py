@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+"""
+Created on Sun Oct 18 16:08:29 2026
+
+@author: laisz
+"""
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from zoneinfo import ZoneInfo
+
+## A compact, self-describing binary format for snapshots, in the spirit of
+## msgpack. Only plain values are supported, so decoding never runs code:
+##   None, bool, int, float, str, bytes, list (and tuple), dict
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR, _BYTES, _LIST, _DICT = range(9)
+_DOUBLE = struct.Struct("<d")
+
+MAGIC = b"DSC"
+FORMAT_VERSION = 1
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_TZ = ZoneInfo("Asia/Taipei")
+
+
+def pack(value: Any) -> bytes:
+    """
+    Encode a plain value.
+
+    Parameters
+    ----------
+    value : Any
+        None, a bool, int, float, str or bytes, or a list, tuple or dict of
+        such values.
+
+    Returns
+    -------
+    bytes
+        The encoded value.
+
+    Raises
+    ------
+    TypeError
+        If the value contains anything else.
+    """
+    out = bytearray()
+    _pack(value, out)
+    return bytes(out)
+
+
+def unpack(data: bytes) -> Any:
+    """
+    Decode a value encoded by pack().
+
+    Parameters
+    ----------
+    data : bytes
+        The encoded value.
+
+    Returns
+    -------
+    Any
+        The decoded value. Tuples are decoded as lists.
+
+    Raises
+    ------
+    ValueError
+        If the data is malformed or has trailing bytes.
+    """
+    value, offset = _unpack(memoryview(data), 0)
+    if offset != len(data):
+        raise ValueError(f"{len(data) - offset} trailing bytes after the value")
+    return value
+
+
+def encode(obj: Any) -> bytes:
+    """
+    Encode an object that has a snapshot() method, e.g. an Order.
+
+    The encoding starts with a header of the magic bytes, the format
+    version, the schema version of the class (its _SCHEMA attribute) and
+    the class name, followed by the packed snapshot.
+
+    Parameters
+    ----------
+    obj : Any
+        The object to encode.
+
+    Returns
+    -------
+    bytes
+        The encoded object.
+    """
+    out = bytearray(MAGIC)
+    out.append(FORMAT_VERSION)
+    out.append(getattr(type(obj), '_SCHEMA', 1))
+    _pack(type(obj).__name__, out)
+    _pack(obj.snapshot(), out)
+    return bytes(out)
+
+
+def decode(data: bytes, cls: type, *args) -> Any:
+    """
+    Decode an object encoded by encode() with cls.from_dict().
+
+    Parameters
+    ----------
+    data : bytes
+        The encoded object.
+    cls : type
+        The class expected. If the object is of a subclass, e.g. an Arrival
+        decoded as an Entry, the from_dict() of that subclass is used.
+    *args
+        Extra arguments passed to from_dict(), e.g. the outer Customer of a
+        Bill.
+
+    Returns
+    -------
+    Any
+        The decoded object.
+
+    Raises
+    ------
+    ValueError
+        If the data is not an encoded object of cls, or was written by a
+        newer schema version than cls supports.
+    """
+    if not is_encoded(data):
+        raise ValueError("The data is not an encoded object")
+
+    view = memoryview(data)
+    if view[3] > FORMAT_VERSION:
+        raise ValueError(f"Unsupported format version {view[3]}")
+    name, offset = _unpack(view, 5)
+    target = _subclass(cls, name)
+    if target is None:
+        raise ValueError(f"The data holds a {name}, not a {cls.__name__}")
+    schema = view[4]
+    if schema > getattr(target, '_SCHEMA', 1):
+        raise ValueError(f"{name} snapshot has a newer schema version ({schema})")
+
+    snapshot, offset = _unpack(view, offset)
+    if offset != len(data):
+        raise ValueError(f"{len(data) - offset} trailing bytes after the object")
+    return target.from_dict(snapshot, *args)
+
+
+def is_encoded(data: bytes) -> bool:
+    """
+    Check whether data starts like the output of encode(), e.g. to tell it
+    apart from a pickle written by older versions.
+
+    Parameters
+    ----------
+    data : bytes
+        The data to check.
+
+    Returns
+    -------
+    bool
+        True if the data starts with the magic bytes.
+    """
+    return len(data) >= 6 and data[:3] == MAGIC
+
+
+def to_micros(moment: datetime) -> int:
+    """
+    Convert a timezone-aware datetime into microseconds since the epoch,
+    without the rounding of datetime.timestamp().
+
+    Parameters
+    ----------
+    moment : datetime
+        The moment to convert.
+
+    Returns
+    -------
+    int
+        The microseconds since 1970-01-01 UTC.
+    """
+    return (moment - _EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(micros: int) -> datetime:
+    """
+    Convert microseconds since the epoch back into a datetime in the
+    Asia/Taipei timezone.
+
+    Parameters
+    ----------
+    micros : int
+        The microseconds since 1970-01-01 UTC.
+
+    Returns
+    -------
+    datetime
+        The moment in Asia/Taipei.
+    """
+    return (_EPOCH + timedelta(microseconds=micros)).astimezone(_TZ)
+
+
+def _subclass(cls: type, name: str) -> type | None:
+    """
+    Find cls or one of its subclasses by name.
+    """
+    if cls.__name__ == name:
+        return cls
+    for subclass in cls.__subclasses__():
+        found = _subclass(subclass, name)
+        if found is not None:
+            return found
+    return None
+
+
+def _pack_uint(number: int, out: bytearray) -> None:
+    """
+    Append an unsigned integer as a little-endian base-128 varint.
+    """
+    while number > 0x7F:
+        out.append((number & 0x7F) | 0x80)
+        number >>= 7
+    out.append(number)
+
+
+def _pack(value: Any, out: bytearray) -> None:
+    if value is None:
+        out.append(_NONE)
+    elif value is True:
+        out.append(_TRUE)
+    elif value is False:
+        out.append(_FALSE)
+    elif isinstance(value, int):
+        out.append(_INT)
+        _pack_uint(value << 1 if value >= 0 else (~value << 1) | 1, out)  # zigzag
+    elif isinstance(value, float):
+        out.append(_FLOAT)
+        out += _DOUBLE.pack(value)
+    elif isinstance(value, str):
+        data = value.encode('utf-8')
+        out.append(_STR)
+        _pack_uint(len(data), out)
+        out += data
+    elif isinstance(value, (bytes, bytearray)):
+        out.append(_BYTES)
+        _pack_uint(len(value), out)
+        out += value
+    elif isinstance(value, (list, tuple)):
+        out.append(_LIST)
+        _pack_uint(len(value), out)
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, dict):
+        out.append(_DICT)
+        _pack_uint(len(value), out)
+        for key, item in value.items():
+            _pack(key, out)
+            _pack(item, out)
+    else:
+        raise TypeError(f"Cannot pack a value of type {type(value).__name__}")
+
+
+def _unpack_uint(data: memoryview, offset: int) -> tuple[int, int]:
+    number = shift = 0
+    while True:
+        try:
+            byte = data[offset]
+        except IndexError:
+            raise ValueError("Truncated data") from None
+        offset += 1
+        number |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return number, offset
+        shift += 7
+
+
+def _unpack(data: memoryview, offset: int) -> tuple[Any, int]:
+    try:
+        tag = data[offset]
+    except IndexError:
+        raise ValueError("Truncated data") from None
+    offset += 1
+
+    if tag == _NONE:
+        return None, offset
+    if tag == _TRUE:
+        return True, offset
+    if tag == _FALSE:
+        return False, offset
+    if tag == _INT:
+        number, offset = _unpack_uint(data, offset)
+        return (number >> 1) ^ -(number & 1), offset
+    if tag == _FLOAT:
+        if offset + 8 > len(data):
+            raise ValueError("Truncated data")
+        return _DOUBLE.unpack_from(data, offset)[0], offset + 8
+    if tag in (_STR, _BYTES):
+        length, offset = _unpack_uint(data, offset)
+        if offset + length > len(data):
+            raise ValueError("Truncated data")
+        chunk = data[offset:offset + length]
+        return (str(chunk, 'utf-8') if tag == _STR else bytes(chunk)), offset + length
+    if tag == _LIST:
+        count, offset = _unpack_uint(data, offset)
+        items = []
+        for _ in range(count):
+            item, offset = _unpack(data, offset)
+            items.append(item)
+        return items, offset
+    if tag == _DICT:
+        count, offset = _unpack_uint(data, offset)
+        mapping = {}
+        for _ in range(count):
+            key, offset = _unpack(data, offset)
+            mapping[key], offset = _unpack(data, offset)
+        return mapping, offset
+    raise ValueError(f"Unknown tag {tag} at offset {offset - 1}")
+
+
+if __name__ == "__main__":
+    import pickle, tempfile
+    from timeit import timeit
+    from unittest.mock import patch
+    from Order import Order, Service
+    from PaymentArrangement import BillingTiming
+    from Location import Destination
+
+    # Benchmark against pickle, on orders kept in a scratch directory
+    with tempfile.TemporaryDirectory() as folder, \
+         patch.object(Order, '_Order__DATA_PATH', folder):
+        orders = [Order(f"C{n % 500:05d}", BillingTiming.in_advance, Service.standard,
+                        Destination(f"Origin {n}"), Destination(f"Destination {n}"),
+                        "S00001", n % 7 == 0, (30, 20, 10), 2.5, 1200.0,
+                        "Books and stationery", False, n % 3 == 0)
+                  for n in range(2000)]
+
+        for name, dumps, loads in [
+                ("pickle", lambda o: pickle.dumps(o, protocol=4), pickle.loads),
+                ("codec", encode, lambda data: decode(data, Order))]:
+            blobs = [dumps(order) for order in orders]
+            encode_time = timeit(lambda: [dumps(order) for order in orders], number=5) / 5
+            decode_time = timeit(lambda: [loads(blob) for blob in blobs], number=5) / 5
+            print(f"{name:>6}: {sum(map(len, blobs)) / len(blobs):6.1f} bytes/order, "
+                  f"encode {len(orders) / encode_time:8.0f} orders/s, "
+                  f"decode {len(orders) / decode_time:8.0f} orders/s")
@@ -12,8 +12,10 @@ from Bill import Bill
 from Location import Destination
 from OrderHandler import OrdersHandler
 from Order import Order
-from os import listdir
-from os.path import isfile, join
+from EmailIndex import EmailIndex
+from IDAllocator import IDAllocator
+from Storage import StorageBackend
+from os.path import join
 
 
 def get_dir() -> str:
@@ -55,12 +57,12 @@ class Customer:
         new_order(*order_args): Create a new order.
         save(): Save the customer data to local storage.
         from_ID(ID): Class method to load a customer from stored data.
-        email_index(): Class method to get the email-to-ID index dict.
+        email_index(): Class method to get a copy of the email-to-ID index.
         from_email(email): Class method to load a customer by email.
     """
     ## Class attribute
     __DATA_PATH = get_dir()
-    _cnt = len(listdir(__DATA_PATH))
+    __email_indexes: dict[str, EmailIndex] = {}  # by data path
     
     
     def __init__(self, first_name: str, last_name: str, address: Destination,
@@ -88,10 +90,10 @@ class Customer:
         bill_cnt : int, optional
             Initial bill count (default is 0).
         """
-        if isfile(join(self.__DATA_PATH, f"C{self._cnt:05d}.pkl")):
+        self._ID = f"C{IDAllocator.of(self.__DATA_PATH, 'C').next():05d}"
+        if self._ID in StorageBackend.of(self.__DATA_PATH):
             raise ValueError("The ID specified is taken. Maybe use 'from_ID' to unpickle it?")
         
-        self._ID = f"C{self._cnt:05d}"
         self._first_name = first_name
         self._last_name = last_name
         
@@ -106,23 +108,10 @@ class Customer:
         self._billing_pref = billing_pref
         self._bill_cnt = 0
         self._bill: dict[Bill] = {}
-        self._cnt += 1
         
-        # Register email in the email index for login lookup
-        index_path = join(self.__DATA_PATH, 'email_index.json')
-        if isfile(index_path):
-            with open(index_path, 'r', encoding='utf-8') as f:
-                email_index = json.load(f)
-        else:
-            email_index = {}
-        
-        # Check for duplicate email
-        if email in email_index:
-            raise ValueError(f"Email '{email}' is already registered!")
-        
-        email_index[email] = self._ID
-        with open(index_path, 'w', encoding='utf-8') as f:
-            json.dump(email_index, f, indent=2)
+        # Register email in the email index for login lookup, which also
+        # rejects duplicate emails
+        self._emails().add(email, self._ID)
 
         # Save customer data to local storage
         self.save()
@@ -272,12 +261,7 @@ class Customer:
         list[Order]
             A list of orders within the specified date range.
         """
-        targets = []
-        for order in self.my_orders():
-            if order.due_date >= start_date and order.due_date <= end_date:
-                targets.append(order)
-                
-        return targets
+        return OrdersHandler().filter_by_date(start_date, end_date, self.ID)
     
     def bill(self, order: Order) -> None:
         """
@@ -299,6 +283,7 @@ class Customer:
             or self._bill.values()[-1].issue_status): # The last bill is issued
             my_bill = Bill(self, order)
             self._bill[my_bill.ID] = my_bill
+            self._bill_cnt += 1  # Bill IDs are numbered per customer
         else:
             self._bill.values()[-1].add_item(order)
 
@@ -339,18 +324,17 @@ class Customer:
         
     def save(self) -> None:
         """
-        Calling this method would save the Customer object's field as
-        a pkl file in local directory.
+        Calling this method would save the Customer object's field to the
+        storage backend selected in config.json.
         """        
-        with open(join(self.__DATA_PATH, f"{self.ID}.pkl"), 'wb') as file:
-            pickle.dump(self, file, protocol=4)
+        StorageBackend.of(self.__DATA_PATH).put(self.ID, pickle.dumps(self, protocol=4))
         return    
     
     @classmethod
     def from_ID(cls, ID: str) -> Customer:
         """
         This is a factory method that would reconstruct the customer instance 
-        base on <ID>.pkl in local directory.
+        stored under its ID.
         
         Parameters
         ----------
@@ -361,40 +345,46 @@ class Customer:
         -------
         Customer
         """
-        file_path = join(cls.__DATA_PATH , f"{ID}.pkl")
-        if not isfile(file_path):
-            raise FileNotFoundError("The Customer with the provided ID does not exist!")
-            
-        with open(file_path, 'rb') as file:
-            instance = pickle.load(file)
+        try:
+            data = StorageBackend.of(cls.__DATA_PATH).get(ID)
+        except FileNotFoundError:
+            raise FileNotFoundError("The Customer with the provided ID does not exist!") from None
         
-        return instance
+        return pickle.loads(data)
     
     @classmethod
     def email_index(cls) -> dict:
         """
-        Load and return the email-to-ID index.
+        Get a copy of the whole email-to-ID index. Looking up a single
+        email should use from_email() instead.
         
         Returns
         -------
         dict
             Mapping of email addresses to customer IDs.
-            Returns empty dict if index doesn't exist.
+            Returns empty dict if no customer is registered.
         """
-        index_path = join(cls.__DATA_PATH, 'email_index.json')
-        if not isfile(index_path):
-            return {}
-        with open(index_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return dict(cls._emails().items())
         
     @classmethod
     def from_email(cls, email: str) -> Customer:
         """Load customer by email. Raises ValueError if not found."""
-        index = cls.email_index()
-        customer_id = index.get(email)
+        customer_id = cls._emails().get(email)
         if not customer_id:
             raise ValueError(f"No customer with email: {email}")
         return cls.from_ID(customer_id)
+    
+    @classmethod
+    def _emails(cls) -> EmailIndex:
+        """
+        Get the email index of the data directory, opening it on first use.
+        An email_index.json left by older versions is imported.
+        """
+        path = cls.__DATA_PATH
+        if path not in cls.__email_indexes:
+            cls.__email_indexes[path] = EmailIndex(join(path, 'email_index.sqlite3'),
+                                                   legacy_path=join(path, 'email_index.json'))
+        return cls.__email_indexes[path]
         
 if __name__ == "__main__":
     def check_pickleability(obj):
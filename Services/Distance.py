@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+"""
+Created on Sat Oct 24 14:12:09 2026
+
+@author: laisz
+"""
+import threading
+import numpy as np
+from math import cos, floor, inf, radians
+from Cache import LRUCache
+from Registry import Registry
+
+## Parcels travel from their origin to the nearest repository (hub), on to
+## the hub nearest to their destination, and from there to the destination.
+## The distance factor of calc_fee grows with the length of that route:
+##   factor = 1 + route_km / FACTOR_KM
+## It is 1 if the coordinates of either end are unknown. Route lengths are
+## rounded to 0.1 km, so the scalar and batch paths agree exactly.
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = EARTH_RADIUS_KM * np.pi / 180  # Along a meridian
+FACTOR_KM = 100
+GRID_DEGREES = 0.5
+_BATCH_ROWS = 65536  # Points compared with every hub at once
+
+
+def haversine(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """
+    Get the great-circle distance between points, element by element.
+
+    Parameters
+    ----------
+    lat1, lon1, lat2, lon2 : array_like
+        The latitudes and longitudes of the points in degrees. They are
+        broadcast against each other.
+
+    Returns
+    -------
+    np.ndarray
+        The distances in km.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(value, dtype=np.float64))
+                              for value in (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class DistanceModel:
+    """
+    Prices the distance between two locations for Order.calc_fee.
+
+    The distances between the hubs are computed once, as a dense matrix.
+    The hub nearest to a location is found on a grid of GRID_DEGREES
+    cells, so only the hubs in the cells around it are compared, and the
+    factor of each (origin, destination) pair is kept in a bounded cache,
+    so pricing an order costs a lookup once the pair has been seen.
+
+    Attributes:
+        hubs (tuple[Repository]): The repositories with known coordinates.
+        matrix (np.ndarray): The distances between the hubs in km.
+
+    Methods:
+        current(): Get the model of the registered repositories.
+        nearest_hub(coordinates): Get the index of the hub nearest to a point.
+        route_km(origin, destination): Get the route length between points.
+        factor(origin_key, destination_key): Get the distance factor of a pair
+            of locations, cached.
+        factors(origins, destinations): Get the distance factors of many
+            pairs of points at once.
+        cache_stats(): Get the counters of the factor cache.
+    """
+    CACHE_SIZE = 100000
+    _current: DistanceModel = None
+    _current_lock = threading.Lock()
+
+    def __init__(self, hubs, grid_degrees: float = GRID_DEGREES,
+                 cache_size: int = CACHE_SIZE):
+        """
+        Initialize a DistanceModel.
+
+        Parameters
+        ----------
+        hubs : Iterable[Repository]
+            The repositories parcels pass through. Those without
+            coordinates are left out.
+        grid_degrees : float, optional
+            The size of the grid cells in degrees.
+        cache_size : int, optional
+            The number of (origin, destination) pairs whose factor is kept.
+        """
+        self._hubs = tuple(hub for hub in hubs if hub.coordinates is not None)
+        self._points = np.array([hub.coordinates for hub in self._hubs],
+                                dtype=np.float64).reshape(-1, 2)
+        self._matrix = haversine(self._points[:, None, 0], self._points[:, None, 1],
+                                 self._points[None, :, 0], self._points[None, :, 1])
+        self._cell = grid_degrees
+        self._grid: dict[tuple[int, int], list[int]] = {}
+        for index, (lat, lon) in enumerate(self._points):
+            self._grid.setdefault(self._cell_of(lat, lon), []).append(index)
+        self._cache = LRUCache(cache_size)
+
+    @property
+    def hubs(self) -> tuple:
+        return self._hubs
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._matrix
+
+
+    ## Methods
+    @classmethod
+    def current(cls) -> DistanceModel:
+        """
+        Get the model whose hubs are the registered repositories, building
+        it again once a repository has been registered since.
+
+        Returns
+        -------
+        DistanceModel
+            The model shared within this process.
+        """
+        registry = Registry()
+        version = (registry, registry.generation("R:"))
+        model = cls._current
+        if model is None or model._version != version:
+            with cls._current_lock:
+                model = cls._current
+                if model is None or model._version != version:
+                    model = cls(registry.values("R:"))
+                    model._version = version  # Holds the registry, so its id is not reused
+                    cls._current = model
+        return model
+
+    def nearest_hub(self, coordinates: tuple[float, float]) -> int:
+        """
+        Get the index of the hub nearest to a point, searching the grid
+        cells ring by ring until no farther cell can hold a nearer hub.
+
+        Parameters
+        ----------
+        coordinates : tuple[float, float]
+            The latitude and longitude of the point.
+
+        Returns
+        -------
+        int
+            The position of the hub in hubs. Ties go to the first one.
+
+        Raises
+        ------
+        ValueError
+            If there are no hubs.
+        """
+        if not self._hubs:
+            raise ValueError("There are no hubs with known coordinates")
+
+        lat, lon = coordinates
+        row, column = self._cell_of(lat, lon)
+        last_ring = max(max(abs(cell[0] - row), abs(cell[1] - column)) for cell in self._grid)
+        best, best_km = len(self._hubs), inf
+        for ring in range(last_ring + 1):
+            candidates = [index for cell in self._ring(row, column, ring)
+                          for index in self._grid.get(cell, ())]
+            if candidates:
+                kms = haversine(lat, lon, self._points[candidates, 0], self._points[candidates, 1])
+                for index, km in zip(candidates, kms):
+                    if km < best_km or (km == best_km and index < best):
+                        best, best_km = index, km
+
+            # Hubs beyond this ring are at least `ring` cells away
+            lower_bound = (ring * self._cell * KM_PER_DEGREE
+                           * cos(radians(min(abs(lat) + (ring + 1) * self._cell, 90))))
+            if lower_bound > best_km:
+                break
+        return best
+
+    def route_km(self, origin: tuple[float, float],
+                 destination: tuple[float, float]) -> float:
+        """
+        Get the length of the route between two points through their
+        nearest hubs, or the direct distance if there are no hubs.
+
+        Parameters
+        ----------
+        origin : tuple[float, float]
+            The latitude and longitude of the origin.
+        destination : tuple[float, float]
+            The latitude and longitude of the destination.
+
+        Returns
+        -------
+        float
+            The length of the route in km.
+        """
+        hubs = ([self.nearest_hub(origin)], [self.nearest_hub(destination)]) if self._hubs \
+            else (None, None)
+        return float(self._routes(np.array([origin], dtype=np.float64),
+                                  np.array([destination], dtype=np.float64), *hubs)[0])
+
+    def factor(self, origin_key: str, destination_key: str) -> float:
+        """
+        Get the distance factor of a pair of locations, computing it only
+        the first time the pair is seen.
+
+        Parameters
+        ----------
+        origin_key : str
+            The Registry key of the origin.
+        destination_key : str
+            The Registry key of the destination.
+
+        Returns
+        -------
+        float
+            The distance factor, 1 if either location has no coordinates.
+        """
+        key = (origin_key, destination_key)
+        factor = self._cache.get(key)
+        if factor is None:
+            origin, destination = coordinates(origin_key), coordinates(destination_key)
+            if origin is None or destination is None:
+                factor = 1.0
+            else:
+                factor = float(_to_factors(np.array([self.route_km(origin, destination)]))[0])
+            self._cache.put(key, factor)
+        return factor
+
+    def factors(self, origins, destinations) -> np.ndarray:
+        """
+        Get the distance factors of many pairs of points at once, equal to
+        those factor() gives.
+
+        Parameters
+        ----------
+        origins : array_like
+            The latitudes and longitudes of the origins, shaped (n, 2). NaN
+            marks unknown coordinates.
+        destinations : array_like
+            The latitudes and longitudes of the destinations, shaped (n, 2).
+
+        Returns
+        -------
+        np.ndarray
+            The distance factors, 1 for pairs with unknown coordinates.
+        """
+        origins = np.asarray(origins, dtype=np.float64).reshape(-1, 2)
+        destinations = np.asarray(destinations, dtype=np.float64).reshape(-1, 2)
+        known = ~(np.isnan(origins).any(axis=1) | np.isnan(destinations).any(axis=1))
+
+        factors = np.ones(len(origins))
+        if known.any():
+            origins, destinations = origins[known], destinations[known]
+            hubs = ((self._nearest_hubs(origins), self._nearest_hubs(destinations))
+                    if self._hubs else (None, None))
+            factors[known] = _to_factors(self._routes(origins, destinations, *hubs))
+        return factors
+
+    def cache_stats(self) -> dict:
+        """
+        Get the counters of the factor cache.
+
+        Returns
+        -------
+        dict
+            The size, capacity, hits, misses and evictions of the cache.
+        """
+        return self._cache.stats()
+
+    def _routes(self, origins: np.ndarray, destinations: np.ndarray,
+                origin_hubs, destination_hubs) -> np.ndarray:
+        """
+        Get the lengths of the routes between points through the given hubs.
+        """
+        if origin_hubs is None:
+            return haversine(origins[:, 0], origins[:, 1], destinations[:, 0], destinations[:, 1])
+
+        first = self._points[origin_hubs]
+        last = self._points[destination_hubs]
+        return (haversine(origins[:, 0], origins[:, 1], first[:, 0], first[:, 1])
+                + self._matrix[origin_hubs, destination_hubs]
+                + haversine(last[:, 0], last[:, 1], destinations[:, 0], destinations[:, 1]))
+
+    def _nearest_hubs(self, points: np.ndarray) -> np.ndarray:
+        """
+        Get the index of the hub nearest to each point, comparing every hub.
+        """
+        nearest = np.empty(len(points), dtype=np.intp)
+        for start in range(0, len(points), _BATCH_ROWS):
+            batch = points[start:start + _BATCH_ROWS]
+            kms = haversine(batch[:, None, 0], batch[:, None, 1],
+                            self._points[None, :, 0], self._points[None, :, 1])
+            nearest[start:start + _BATCH_ROWS] = kms.argmin(axis=1)
+        return nearest
+
+    def _cell_of(self, lat: float, lon: float) -> tuple[int, int]:
+        return floor(lat / self._cell), floor(lon / self._cell)
+
+    @staticmethod
+    def _ring(row: int, column: int, ring: int) -> list[tuple[int, int]]:
+        """
+        Get the grid cells exactly `ring` cells away from a cell.
+        """
+        if ring == 0:
+            return [(row, column)]
+        cells = [(row + step, column + side) for step in range(-ring, ring + 1)
+                 for side in (-ring, ring)]
+        cells += [(row + side, column + step) for step in range(-ring + 1, ring)
+                  for side in (-ring, ring)]
+        return cells
+
+
+def _to_factors(route_km: np.ndarray) -> np.ndarray:
+    """
+    Turn route lengths into distance factors.
+    """
+    return 1 + np.round(route_km, 1) / FACTOR_KM
+
+
+def coordinates(key: str) -> tuple[float, float] | None:
+    """
+    Get the coordinates of a location by its Registry key.
+
+    Parameters
+    ----------
+    key : str
+        The Registry key of the location.
+
+    Returns
+    -------
+    tuple[float, float] | None
+        The latitude and longitude, None if the location has none or is not
+        registered in this process, e.g. the repository of an order loaded
+        from disk before the repositories are created.
+    """
+    try:
+        return Registry().resolve(key).coordinates
+    except KeyError:
+        return None
+
+
+def factor(origin_key: str, destination_key: str) -> float:
+    """
+    Get the distance factor of a pair of locations from the current model.
+
+    Parameters
+    ----------
+    origin_key : str
+        The Registry key of the origin.
+    destination_key : str
+        The Registry key of the destination.
+
+    Returns
+    -------
+    float
+        The distance factor, 1 if either location has no coordinates.
+    """
+    return DistanceModel.current().factor(origin_key, destination_key)
+
+
+if __name__ == "__main__":
+    from Location import Repository, Destination
+
+    Repository("Taipei", "North", (25.0478, 121.5170))
+    Repository("Taichung", "Central", (24.1367, 120.6850))
+    Repository("Kaohsiung", "South", (22.6394, 120.3020))
+    print(factor(Destination("Keelung", (25.1283, 121.7419)).key,
+                 Destination("Tainan", (22.9971, 120.2126)).key))
+    print(DistanceModel.current().cache_stats())
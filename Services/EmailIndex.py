@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+"""
+Created on Sat Oct 17 19:48:06 2026
+
+@author: laisz
+"""
+import sqlite3, json, threading
+from os.path import isfile
+from Cache import LRUCache
+
+
+class EmailIndex:
+    """
+    A persistent email-to-customer-ID index built on sqlite3.
+
+    Registering and looking up an email touch a single row of the primary
+    key index, so neither reads nor rewrites the whole index. Lookups go
+    through a small LRU cache first, so repeated logins do not reach the
+    database at all. The connection is shared by every thread, one
+    statement or transaction at a time.
+
+    Attributes:
+        path (str): The path of the database file.
+
+    Methods:
+        add(email, customer_ID): Register the email of a new customer.
+        get(email, default): Look up the customer ID of an email.
+        items(): Get all (email, customer ID) pairs.
+        close(): Close the database connection.
+    """
+    def __init__(self, path: str, legacy_path: str = None, cache_size: int = 1024):
+        """
+        Open, and create if needed, the email index.
+
+        Parameters
+        ----------
+        path : str
+            The path of the database file.
+        legacy_path : str, optional
+            The path of an email_index.json written by older versions. If it
+            exists and the database is empty, its entries are imported.
+        cache_size : int, optional
+            The number of lookups kept in memory. Defaults to 1024.
+        """
+        self._path = path
+        self._cache = LRUCache(cache_size)
+
+        self._lock = threading.Lock()  # One statement or transaction at a time
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS emails ("
+                           "email TEXT PRIMARY KEY, ID TEXT NOT NULL)")
+
+        if legacy_path is not None and isfile(legacy_path) and len(self) == 0:
+            self._import_legacy(legacy_path)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def __contains__(self, email: str) -> bool:
+        return self.get(email) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM emails").fetchone()[0]
+
+
+    ## Methods
+    def add(self, email: str, customer_ID: str) -> None:
+        """
+        Register the email of a new customer.
+
+        Parameters
+        ----------
+        email : str
+            The email address.
+        customer_ID : str
+            The ID of the customer.
+
+        Raises
+        ------
+        ValueError
+            If the email is already registered.
+
+        Returns
+        -------
+        None
+        """
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("INSERT INTO emails VALUES (?, ?)",
+                                   (email, customer_ID))
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Email '{email}' is already registered!") from None
+
+        self._cache.put(email, customer_ID)
+
+    def get(self, email: str, default: str = None) -> str | None:
+        """
+        Look up the customer ID registered with an email.
+
+        Parameters
+        ----------
+        email : str
+            The email address.
+        default : str, optional
+            The value returned if the email is not registered.
+
+        Returns
+        -------
+        str | None
+            The customer ID, or default.
+        """
+        customer_ID = self._cache.get(email)
+        if customer_ID is None:
+            with self._lock:
+                row = self._conn.execute("SELECT ID FROM emails WHERE email = ?",
+                                         (email,)).fetchone()
+            if row is None:
+                return default  # Not cached, the email may be registered later
+            customer_ID = row[0]
+            self._cache.put(email, customer_ID)
+        return customer_ID
+
+    def items(self) -> list[tuple[str, str]]:
+        """
+        Get all registered emails with their customer IDs.
+
+        Returns
+        -------
+        list[tuple[str, str]]
+            The (email, customer ID) pairs in registration order.
+        """
+        with self._lock:
+            return self._conn.execute("SELECT email, ID FROM emails ORDER BY rowid").fetchall()
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            self._conn.close()
+
+    def _import_legacy(self, legacy_path: str) -> None:
+        """
+        Copy the entries of an email_index.json into the database.
+        """
+        with open(legacy_path, 'r', encoding='utf-8') as file:
+            email_index = json.load(file)
+
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO emails VALUES (?, ?)",
+                                   email_index.items())
+
+
+if __name__ == "__main__":
+    import tempfile
+    from os.path import join
+
+    with tempfile.TemporaryDirectory() as folder:
+        index = EmailIndex(join(folder, "email_index.sqlite3"))
+        index.add("xxxx@gmail.com", "C00000")
+        print(index.get("xxxx@gmail.com"), "xxxx@gmail.com" in index, len(index))
+        index.close()
@@ -9,6 +9,8 @@ from datetime import datetime
 from zoneinfo import ZoneInfo
 from Location import Location
 from Vehicle import Vehicle
+from Registry import Registry
+from Codec import to_micros, from_micros
 
 
 class Entry(ABC):
@@ -21,7 +23,15 @@ class Entry(ABC):
 
     Methods:
         summarize(): Returns a string summary of the entry.
+        fields(): Returns the stored fields specific to the entry type.
+        restore(signature, time_stamp, *fields): Class method to rebuild an
+            entry from stored fields.
+        snapshot(): Returns a dict of the entry's state.
+        from_dict(data): Class method to rebuild an entry from a snapshot.
     """
+    _FIELDS: tuple[str, ...] = ()  # Attributes returned by fields()
+    _SCHEMA = 1  # Version of the snapshot layout
+    
     def __init__(self, signature):
         """
         Initialize an Entry.
@@ -42,6 +52,76 @@ class Entry(ABC):
     def time_stamp(self) -> datetime:
         return self._time_stamp
     
+    def fields(self) -> tuple:
+        """
+        Get the stored fields specific to the entry type, e.g. the keys of
+        its locations.
+
+        Returns
+        -------
+        tuple
+            The values of the attributes named in _FIELDS.
+        """
+        return tuple(getattr(self, name) for name in self._FIELDS)
+    
+    @classmethod
+    def restore(cls, signature, time_stamp: datetime, *fields) -> "Entry":
+        """
+        Rebuild an entry from its stored fields, without registering or
+        timestamping it again.
+
+        Parameters
+        ----------
+        signature
+            Identifier of the person or system that created the entry.
+        time_stamp : datetime
+            The timestamp when the entry was created.
+        *fields
+            The values returned by fields().
+
+        Returns
+        -------
+        Entry
+            The rebuilt entry.
+        """
+        entry = cls.__new__(cls)
+        entry._signature = signature
+        entry._time_stamp = time_stamp
+        for name, value in zip(cls._FIELDS, fields):
+            setattr(entry, name, value)
+        return entry
+    
+    def snapshot(self) -> dict:
+        """
+        Create a dictionary containing states of the Entry.
+
+        Returns
+        -------
+        dict
+            The signature, the timestamp in microseconds since the epoch,
+            and the fields of the entry.
+        """
+        return {'signature': self.signature,
+                'time_stamp': to_micros(self.time_stamp),
+                'fields': list(self.fields())}
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> "Entry":
+        """
+        Reconstruct the instance from a previous snapshot.
+
+        Parameters
+        ----------
+        data : dict
+            A snapshot taken previously by an entry of this class.
+
+        Returns
+        -------
+        Entry
+        """
+        return cls.restore(data['signature'], from_micros(data['time_stamp']),
+                           *data['fields'])
+    
     @abstractmethod
     def summarize() -> str:
         """
@@ -58,6 +138,8 @@ class Entry(ABC):
 class Transit(Entry):
     """
     Represents a transit event where a package is shipped between locations.
+    Only the keys of the vehicle and locations are stored; the objects are
+    resolved through the Registry.
 
     Attributes:
         vehicle (Vehicle): The vehicle used for transportation.
@@ -67,6 +149,8 @@ class Transit(Entry):
     Methods:
         summarize(): Returns a string summary of the transit event.
     """
+    _FIELDS = ('_vehicle_key', '_origin_key', '_destination_key')
+    
     def __init__(self, signature,
                  vehicle: Vehicle, origin: Location, destination: Location):
         """
@@ -84,21 +168,22 @@ class Transit(Entry):
             The destination location of the transit.
         """
         super().__init__(signature)
-        self._vehicle = vehicle
-        self._origin = origin
-        self._destination = destination
+        registry = Registry()
+        self._vehicle_key = registry.register(vehicle)
+        self._origin_key = registry.register(origin)
+        self._destination_key = registry.register(destination)
         
     @property
     def vehicle(self) -> Vehicle:
-        return self._vehicle
+        return Registry().resolve(self._vehicle_key)
     
     @property
     def origin(self) -> Location:
-        return self._origin
+        return Registry().resolve(self._origin_key)
     
     @property
     def destination(self) -> Location:
-        return self._destination
+        return Registry().resolve(self._destination_key)
     
     def __str__(self) -> str:
         return (self.time_stamp.__str__()
@@ -121,6 +206,8 @@ class Transit(Entry):
 class Arrival(Entry):
     """
     Represents an arrival event where a package arrives at a location.
+    Only the key of the location is stored; the object is resolved through
+    the Registry.
 
     Attributes:
         destination (Location): The location where the package arrived.
@@ -128,6 +215,8 @@ class Arrival(Entry):
     Methods:
         summarize(): Returns a string summary of the arrival event.
     """
+    _FIELDS = ('_destination_key',)
+    
     def __init__(self, signature, destination: Location):
         """
         Initialize an Arrival entry.
@@ -140,11 +229,11 @@ class Arrival(Entry):
             The location where the package arrived.
         """
         super().__init__(signature)
-        self._destination = destination
+        self._destination_key = Registry().register(destination)
         
     @property
     def destination(self) -> Location:
-        return self._destination
+        return Registry().resolve(self._destination_key)
     
     def __str__(self) -> str:
         return (self.time_stamp.__str__()
@@ -173,6 +262,8 @@ class OtherEvent(Entry):
     Methods:
         summarize(): Returns a string summary including the detail.
     """
+    _FIELDS = ('_summary', '_detail')
+    
     def __init__(self, signature, summary: str, description: str = None):
         """
         Initialize an OtherEvent entry.
@@ -0,0 +1,373 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+"""
+Created on Sun Oct 18 13:20:44 2026
+
+@author: laisz
+"""
+import json, os, struct, threading
+from os.path import getsize, isdir, isfile, join
+from Entry import Entry, Arrival, Transit, OtherEvent
+from FileLock import file_lock
+from Codec import to_micros, from_micros
+import Shards
+
+
+class InternTable:
+    """
+    An append-only table that maps JSON values, e.g. staff IDs or location
+    keys, to small integers, so records can refer to them with a fixed-size
+    field.
+
+    The table is a JSON-lines file, one value per line, and the number of a
+    value is its line number. New values are appended under a file lock,
+    so every process numbers them the same way.
+
+    Methods:
+        intern(value): Get the number of a value, adding it if needed.
+        value(number): Get the value with a number.
+    """
+    def __init__(self, path: str):
+        """
+        Initialize an InternTable.
+
+        Parameters
+        ----------
+        path : str
+            The path of the table file.
+        """
+        self._path = path
+        self._lock = threading.Lock()
+        self._offset = 0
+        self._values: list = []
+        self._numbers: dict[str, int] = {}  # JSON text -> number
+
+    def intern(self, value) -> int:
+        """
+        Get the number of a value, appending it to the table if it is new.
+
+        Parameters
+        ----------
+        value
+            A JSON-serializable value.
+
+        Returns
+        -------
+        int
+            The number of the value.
+        """
+        text = json.dumps(value, separators=(',', ':'))
+        with self._lock:
+            number = self._numbers.get(text)
+            if number is not None:
+                return number
+
+            with file_lock(self._path + ".lock"):
+                self._refresh()
+                if text not in self._numbers:
+                    data = (text + "\n").encode('utf-8')
+                    with open(self._path, 'ab') as file:
+                        if file.tell() > self._offset:  # Cut off a torn line
+                            file.truncate(self._offset)
+                            file.seek(self._offset)
+                        file.write(data)
+                        file.flush()
+                        os.fsync(file.fileno())
+                    self._offset += len(data)
+                    self._add(text)
+            return self._numbers[text]
+
+    def value(self, number: int):
+        """
+        Get the value with a number.
+
+        Parameters
+        ----------
+        number : int
+            The number returned by intern().
+
+        Returns
+        -------
+        Any
+            The value.
+        """
+        with self._lock:
+            if number >= len(self._values):
+                self._refresh()  # Interned by another process
+            return self._values[number]
+
+    def _refresh(self) -> None:
+        """
+        Read the complete lines appended since the last known offset.
+        """
+        if not isfile(self._path):
+            return
+
+        with open(self._path, 'rb') as file:
+            file.seek(self._offset)
+            chunk = file.read()
+
+        end = chunk.rfind(b"\n") + 1
+        for line in chunk[:end].splitlines():
+            self._add(line.decode('utf-8'))
+        self._offset += end
+
+    def _add(self, text: str) -> None:
+        self._numbers[text] = len(self._values)
+        self._values.append(json.loads(text))
+
+
+class EventStore:
+    """
+    Append-only files of tracking entries, one per order.
+
+    Each entry is a fixed-size record of its type, timestamp, signature and
+    up to three fields such as location keys. Signatures and keys repeat
+    across orders, so they are kept in an InternTable and referred to by
+    number. The free text of an OtherEvent is not: it is appended to a
+    text file of the order (<ID>.txt), and the record holds its offset.
+    Adding an entry is therefore a small append or two, and the last n
+    entries of an order are read with one seek from the end of its file.
+
+    The files are kept in shard directories, see Shards. Appends are not
+    synced to disk one by one; callers that need them to be
+    durable, e.g. before cutting a write-ahead log, call sync().
+
+    Attributes:
+        directory (str): The directory of the event files.
+
+    Methods:
+        of(directory): Get the event store of a directory.
+        append(order_ID, entry): Add an entry to an order.
+        count(order_ID): Get the number of entries of an order.
+        tail(order_ID, n): Get the last n entries of an order.
+        all(order_ID): Get all entries of an order.
+        sync(order_IDs): Sync the event files appended to.
+    """
+    _RECORD = struct.Struct("<BqIIII")  # type, microseconds since epoch, signature, 3 fields
+    _TYPES: list[type[Entry]] = [Arrival, Transit, OtherEvent]
+    _NONE = 0xFFFFFFFF  # An unused field
+    _TEXT = 0x80  # Type flag: the fields are a line of the order's text file
+    _FREE_TEXT: tuple[type[Entry], ...] = (OtherEvent,)
+    _instances: dict[str, EventStore] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, directory: str):
+        """
+        Open, and create if needed, an event store.
+
+        Parameters
+        ----------
+        directory : str
+            The directory of the event files.
+        """
+        if not isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        self._directory = directory
+        self._strings = InternTable(join(directory, "strings.jsonl"))
+        self._lock = threading.Lock()
+        self._unsynced: set[str] = set()
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+
+    ## Methods
+    @classmethod
+    def of(cls, directory: str) -> EventStore:
+        """
+        Get the event store of a directory, opening it on first use.
+
+        Parameters
+        ----------
+        directory : str
+            The directory of the event files.
+
+        Returns
+        -------
+        EventStore
+            The event store shared within this process.
+        """
+        with cls._instances_lock:
+            if directory not in cls._instances:
+                cls._instances[directory] = cls(directory)
+            return cls._instances[directory]
+
+    def append(self, order_ID: str, entry: Entry) -> None:
+        """
+        Add an entry to the end of an order's event file.
+
+        Parameters
+        ----------
+        order_ID : str
+            The ID of the order.
+        entry : Entry
+            The entry to add.
+
+        Returns
+        -------
+        None
+        """
+        kind = self._TYPES.index(type(entry))
+        signature = self._strings.intern(entry.signature)
+        if isinstance(entry, self._FREE_TEXT):
+            kind |= self._TEXT
+            text = (json.dumps(entry.fields(), separators=(',', ':')) + "\n").encode('utf-8')
+        else:
+            fields = [self._strings.intern(value) for value in entry.fields()]
+
+        with self._lock:
+            if kind & self._TEXT:
+                with open(self._path(order_ID, ".txt"), 'ab', buffering=0) as file:
+                    file.write(text)  # Unbuffered, so tell() is where it ended up
+                    fields = [file.tell() - len(text)]
+            fields += [self._NONE] * (3 - len(fields))
+            record = self._RECORD.pack(kind, to_micros(entry.time_stamp), signature, *fields)
+            with open(self._path(order_ID), 'ab') as file:
+                torn = file.tell() % self._RECORD.size
+                if torn:  # Cut off a record torn by a crash
+                    file.truncate(file.tell() - torn)
+                    file.seek(0, os.SEEK_END)
+                file.write(record)
+            self._unsynced.add(order_ID)
+
+    def count(self, order_ID: str) -> int:
+        """
+        Get the number of entries of an order.
+
+        Parameters
+        ----------
+        order_ID : str
+            The ID of the order.
+
+        Returns
+        -------
+        int
+            The number of complete records in the order's event file.
+        """
+        path = Shards.locate(self._directory, order_ID, ".evt")
+        return 0 if path is None else getsize(path) // self._RECORD.size
+
+    def tail(self, order_ID: str, n: int) -> list[Entry]:
+        """
+        Get the last n entries of an order, reading only their records.
+
+        Parameters
+        ----------
+        order_ID : str
+            The ID of the order.
+        n : int
+            The number of entries to read.
+
+        Returns
+        -------
+        list[Entry]
+            The entries, oldest first.
+        """
+        path = Shards.locate(self._directory, order_ID, ".evt")
+        if path is None:
+            return []
+
+        size = self._RECORD.size
+        with open(path, 'rb') as file:
+            count = os.fstat(file.fileno()).st_size // size
+            start = max(count - n, 0) if n > 0 else count
+            file.seek(start * size)
+            data = file.read((count - start) * size)
+
+        records = list(self._RECORD.iter_unpack(data))
+        offsets = [record[3] for record in records if record[0] & self._TEXT]
+        texts = self._texts(order_ID, offsets) if offsets else {}
+        return [self._entry(record, texts) for record in records]
+
+    def all(self, order_ID: str) -> list[Entry]:
+        """
+        Get all entries of an order.
+
+        Parameters
+        ----------
+        order_ID : str
+            The ID of the order.
+
+        Returns
+        -------
+        list[Entry]
+            The entries, oldest first.
+        """
+        return self.tail(order_ID, self.count(order_ID))
+
+    def sync(self, order_IDs=None) -> None:
+        """
+        Sync the event files appended to since they were last synced.
+
+        Parameters
+        ----------
+        order_IDs : Iterable[str], optional
+            Only sync the files of these orders. Defaults to all.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            if order_IDs is None:
+                pending, self._unsynced = self._unsynced, set()
+            else:
+                pending = self._unsynced.intersection(order_IDs)
+                self._unsynced -= pending
+
+        for order_ID in pending:
+            for suffix in (".txt", ".evt"):
+                path = Shards.locate(self._directory, order_ID, suffix)
+                if path is not None:
+                    with open(path, 'ab') as file:
+                        os.fsync(file.fileno())
+
+    def _path(self, order_ID: str, suffix: str = ".evt") -> str:
+        """
+        Get the path to append to, in the flat layout only if the file was
+        left there by an older version.
+        """
+        return (Shards.locate(self._directory, order_ID, suffix)
+                or Shards.path_of(self._directory, order_ID, suffix))
+
+    def _texts(self, order_ID: str, offsets: list[int]) -> dict[int, list]:
+        """
+        Read the lines of an order's text file that start at some offsets.
+        """
+        texts = {}
+        with open(self._path(order_ID, ".txt"), 'rb') as file:
+            for offset in offsets:
+                file.seek(offset)
+                texts[offset] = json.loads(file.readline())
+        return texts
+
+    def _entry(self, record: tuple, texts: dict[int, list]) -> Entry:
+        """
+        Rebuild an entry from an unpacked record, with the lines of the
+        order's text file that it refers to.
+        """
+        kind, micros, signature, *fields = record
+        entry_type = self._TYPES[kind & ~self._TEXT]
+        if kind & self._TEXT:
+            values = texts[fields[0]]
+        else:  # Also OtherEvents written before free text had its own file
+            values = [self._strings.value(field)
+                      for field in fields[:len(entry_type._FIELDS)]]
+        return entry_type.restore(self._strings.value(signature), from_micros(micros), *values)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from Location import Destination
+
+    with tempfile.TemporaryDirectory() as folder:
+        events = EventStore.of(folder)
+        events.append("O0000000000001", Arrival("S00001", Destination("origin")))
+        events.append("O0000000000001", OtherEvent("S00002", "Inspected"))
+        events.sync()
+        print(events.count("O0000000000001"), getsize(join(folder, "O0000000000001.evt")))
+        for entry in events.tail("O0000000000001", 1):
+            print(entry)
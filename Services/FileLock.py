@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+"""
+Created on Sun Oct 18 13:02:15 2026
+
+@author: laisz
+"""
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def acquire(path: str, blocking: bool = True) -> BinaryIO | None:
+    """
+    Take an exclusive lock on a file, shared with other processes, until
+    release() is called or the process ends. The file is created if needed
+    and is only used for locking.
+
+    Parameters
+    ----------
+    path : str
+        The path of the lock file.
+    blocking : bool, optional
+        Whether to wait for another holder to release the lock.
+
+    Returns
+    -------
+    BinaryIO | None
+        The open lock file, to pass to release(), or None if blocking is
+        False and the lock is held elsewhere.
+    """
+    lock_file = open(path, 'a+b')
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        else:
+            lock_file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(),
+                                   msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after about 10 seconds
+                    if not blocking:
+                        raise
+    except OSError:
+        lock_file.close()
+        if blocking:
+            raise
+        return None
+    return lock_file
+
+
+def release(lock_file: BinaryIO) -> None:
+    """
+    Release a lock taken by acquire().
+
+    Parameters
+    ----------
+    lock_file : BinaryIO
+        The lock file returned by acquire().
+
+    Returns
+    -------
+    None
+    """
+    if lock_file.closed:
+        return
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        lock_file.close()
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """
+    Hold an exclusive lock on a file, shared with other processes, for the
+    duration of a with-block. The file is created if needed and is only
+    used for locking.
+
+    Parameters
+    ----------
+    path : str
+        The path of the lock file.
+
+    Returns
+    -------
+    Iterator[None]
+    """
+    lock_file = acquire(path)
+    try:
+        yield
+    finally:
+        release(lock_file)
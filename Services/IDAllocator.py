@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+"""
+Created on Sat Oct 17 21:14:37 2026
+
+@author: laisz
+"""
+import os, re, threading
+from os.path import isdir, isfile, join
+from FileLock import file_lock
+from Storage import StorageBackend
+
+
+class IDAllocator:
+    """
+    Hands out the numbers of new IDs with a given prefix, e.g. "O" for
+    orders, without colliding with other processes.
+
+    The next free number is kept in a counter file next to the data files.
+    A process leases a block of numbers at a time by advancing the counter
+    while holding a lock on the file, then allocates from its block in
+    memory. Numbers left in a block when the process exits are skipped.
+
+    The first lease in a directory without a counter file asks the storage
+    backend of the directory once for the stored <prefix><number> IDs, so
+    the counter starts after them.
+
+    Attributes:
+        directory (str): The directory of the data files.
+        prefix (str): The prefix of the IDs.
+
+    Methods:
+        of(directory, prefix): Get the allocator of a directory and prefix.
+        next(): Get the next free number.
+    """
+    _BLOCK = 32  # Numbers leased per lock of the counter file
+    _instances: dict[tuple[str, str], IDAllocator] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, directory: str, prefix: str, block_size: int = _BLOCK):
+        """
+        Initialize an IDAllocator.
+
+        Parameters
+        ----------
+        directory : str
+            The directory of the data files. It is created if needed.
+        prefix : str
+            The prefix of the IDs, e.g. "O".
+        block_size : int, optional
+            The number of IDs leased at a time.
+        """
+        self._directory = directory
+        self._prefix = prefix
+        self._block_size = block_size
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0           # End of the leased block (exclusive)
+        self._pid = os.getpid() # A forked child must not reuse the parent's block
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @property
+    def prefix(self) -> str:
+        return self._prefix
+
+
+    ## Methods
+    @classmethod
+    def of(cls, directory: str, prefix: str) -> IDAllocator:
+        """
+        Get the allocator of a directory and prefix, creating it on first use.
+
+        Parameters
+        ----------
+        directory : str
+            The directory of the data files.
+        prefix : str
+            The prefix of the IDs.
+
+        Returns
+        -------
+        IDAllocator
+            The allocator shared within this process.
+        """
+        with cls._instances_lock:
+            key = (directory, prefix)
+            if key not in cls._instances:
+                cls._instances[key] = cls(directory, prefix)
+            return cls._instances[key]
+
+    def next(self) -> int:
+        """
+        Get the next free number, leasing a new block if needed.
+
+        Returns
+        -------
+        int
+            A number no other allocation in any process has returned.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._next = self._end = 0
+
+            if self._next >= self._end:
+                self._next = self._lease()
+                self._end = self._next + self._block_size
+
+            number = self._next
+            self._next += 1
+            return number
+
+    def _lease(self) -> int:
+        """
+        Advance the counter file by one block under the file lock and
+        return the start of the block.
+        """
+        if not isdir(self._directory):
+            os.makedirs(self._directory, exist_ok=True)
+
+        counter_path = join(self._directory, f"{self._prefix}_id.next")
+        with file_lock(join(self._directory, f"{self._prefix}_id.lock")):
+            if isfile(counter_path):
+                with open(counter_path, 'r', encoding='utf-8') as file:
+                    start = int(file.read())
+            else:
+                start = self._scan()
+
+            tmp_path = counter_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                file.write(str(start + self._block_size))
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, counter_path)
+        return start
+
+    def _scan(self) -> int:
+        """
+        Get the number after the largest one used by a stored ID.
+        """
+        pattern = re.compile(re.escape(self._prefix) + r"(\d+)")
+        numbers = [int(match.group(1))
+                   for match in map(pattern.fullmatch, StorageBackend.of(self._directory).ids())
+                   if match is not None]
+        return max(numbers, default=-1) + 1
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as folder:
+        open(join(folder, "O0000000000007.pkl"), 'wb').close()
+        allocator = IDAllocator.of(folder, "O")
+        print([f"O{allocator.next():013d}" for _ in range(3)])
+        print(IDAllocator(folder, "O").next())  # Another process leases the next block
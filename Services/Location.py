@@ -7,6 +7,7 @@ Created on Thu Dec 25 13:08:25 2025
 """
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING
+from Registry import Registry
 
 if TYPE_CHECKING:
     from Order import Order
@@ -15,17 +16,26 @@ class Location(ABC):
     """
     Attributes:
         address (str): the address of the location
+        coordinates (tuple[float, float] | None): the latitude and longitude
+            of the location in degrees, or None if unknown
         
     Methods:
         -
     """
-    def __init__(self, address: str):
+    def __init__(self, address: str, coordinates: tuple[float, float] = None):
         self._address = address
+        # Rounded to the precision kept in Destination keys (about 0.1 m)
+        self._coordinates = None if coordinates is None else (round(float(coordinates[0]), 6),
+                                                              round(float(coordinates[1]), 6))
         
     @property
     def address(self) -> str:
         return self._address
     
+    @property
+    def coordinates(self) -> tuple[float, float] | None:
+        return self._coordinates
+    
     @abstractmethod
     def __str__(self) -> str:
         pass
@@ -33,7 +43,21 @@ class Location(ABC):
 class Destination(Location):
     """
     The final destination of a delivery.
+    
+    Attributes:
+        address (str): the address of the location
+        coordinates (tuple[float, float] | None): the latitude and longitude
+            of the location in degrees, or None if unknown
+        key (str): the stable key of the destination, "D:<address>", or
+            "D:<address>@<latitude>,<longitude>" if its coordinates are
+            known, so they are kept by orders referring to it
     """
+    @property
+    def key(self) -> str:
+        if self.coordinates is None:
+            return "D:" + self.address
+        return "D:%s@%.6f,%.6f" % (self.address, *self.coordinates)
+    
     def __str__(self) -> str:
         return self.address
     
@@ -42,22 +66,30 @@ class Repository(Location):
     """
     Attributes:
         address (str): the address of the location
+        coordinates (tuple[float, float] | None): the latitude and longitude
+            of the location in degrees, or None if unknown
         name(str): the name of the repository
+        key(str): the stable key of the repository, "R:<name>"
         inventory(set[Order]): a list of cargo at the repository
     
     Methods:
         receive(*orders: Order)
         ship(*orders: Order)
     """
-    def __init__(self, address: str, name: str):
-        super().__init__(address)
+    def __init__(self, address: str, name: str, coordinates: tuple[float, float] = None):
+        super().__init__(address, coordinates)
         self._name = name
         self._inventory = set()
+        Registry().register(self)
         
     @property
     def name(self) -> str:
         return self._name
     
+    @property
+    def key(self) -> str:
+        return "R:" + self.name
+    
     @property
     def inventory(self) -> set[Order]:
         return self._inventory.copy()
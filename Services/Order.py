@@ -10,14 +10,20 @@ from platformdirs import user_data_dir
 from enum import Enum
 from datetime import datetime, timedelta, date
 from zoneinfo import ZoneInfo
-import json, pickle
+import json, pickle, threading
 from Location import Location, Destination
 from Package import Package
 from Bill import Bill
 from Entry import Entry, Arrival, Transit, OtherEvent
 from PaymentArrangement import BillingTiming
-from os import listdir
-from os.path import join, isfile
+from Registry import Registry
+from IDAllocator import IDAllocator
+from StripedLock import StripedLock
+from EventStore import EventStore
+from Storage import StorageBackend
+import Codec, Distance, Tariff
+from os.path import join
+from typing import Callable, ContextManager
 
 
 
@@ -44,30 +50,58 @@ class Order:
         ID (str): The unique identifier for the order.
         size_class (SizeClass): Size classification based on package dimensions.
         weight_class (WeightClass): Weight classification based on package weight.
+        package_class (PackageClass): The classes and handling flags of the
+            package as small ints, worked out once when the order is built.
         service (Service): The service type selected for delivery.
         collection_date (date): The date when the package was collected.
         due_date (date): The expected delivery date.
+        due_time (datetime): The moment the order becomes overdue.
         origin (Location): The origin location of the package.
         destination (Location): The destination location of the package.
+            Both are stored as Registry keys, so saving an order does not
+            pickle the network they belong to.
         is_international (bool): Whether this is an international shipment.
-        fee (float): The calculated fee for the order.
+        fee (float): The fee, priced when the order is placed and saved with
+            it. Orders saved without one are priced when it is first read,
+            which counts as a change, so the price is saved too.
+        tariff_version (int): The version of the tariff the fee was priced
+            with, None until it is priced.
         bill_ref (Bill): Reference to the associated bill.
         bill_timing (BillingTiming): When the bill should be issued.
         status (Status): The current status of the order.
-        package (Package): The package being delivered.
+        package (Package): The package being delivered. Orders loaded from
+            storage decode it on first access.
+        is_dirty (bool): Whether the order has changes that are not saved.
+        version (int): The number of changes made since the order was loaded.
 
     Methods:
-        calc_fee(): Calculate the delivery fee.
+        calc_fee(tariff): Calculate the delivery fee.
         billing(bill_ID): Associate a bill with the order.
+        mark_delayed(): Flag an order in progress that missed its due time.
         new_log(_type, receiver_ID, *args): Add a new log entry.
+        attach_journal(journal): Report later changes to a journal.
+        apply(record): Replay a change reported to the journal.
         last_log(): Get the most recent log entry.
         earlier_logs(step): Get recent log entries.
         all_logs(): Get all log entries.
-        save(): Save the order to local storage.
+        mark_clean(version): Record that the order has been saved elsewhere.
+        snapshot(): Returns a dict of the order's state.
+        from_dict(data): Class method to rebuild an order from a snapshot.
+        save(): Save the order to the storage backend.
+        save_many(orders): Save several orders, made durable together.
+        sync_events(): Sync the tracking entries of all orders.
         from_ID(order_ID): Load an order from storage.
+        from_bytes(data): Decode an order read from storage.
+        lock(order_ID): Get the lock serializing changes to an order.
+    
+    Changes to an order are serialized by a striped lock on its ID, so
+    threads may record entries for the same order concurrently.
     """
     __DATA_PATH = get_dir()
-    __order_cnt = len(listdir(__DATA_PATH))
+    __SYNC_BATCH = 256  # Orders made durable together by the backend
+    _SCHEMA = 4  # Version of the snapshot layout
+    __locks = StripedLock()
+    __save_lock = threading.Lock()  # Saves never overwrite a newer version
     
     def __init__(self, customer_ID: str,
                  bill_timing: BillingTiming,
@@ -100,19 +134,31 @@ class Order:
             Arguments passed to create the Package.
         """
         self._payer = customer_ID
-        self._ID = f"O{self.__order_cnt:013d}"
+        self._ID = f"O{IDAllocator.of(self.__DATA_PATH, 'O').next():013d}"
         self._service = service
         self._collection_day = datetime.now(ZoneInfo("Asia/Taipei"))
         self._due_day = self._collection_day + timedelta(days=service.day)
-        self._origin = origin
-        self._destination = destination
+        self._origin_key = Registry().register(origin)
+        self._destination_key = Registry().register(destination)
         self._is_international = is_international
-        self._fee = None
         self._bill_ref = None
         self._bill_timing = bill_timing
         self._status = Status.normal
         self._package = Package(*package_args)
-        self._log = [Arrival(collector_ID, origin)]
+        self._package_data = None  # Encoded package, until it is first accessed
+        tariff = Tariff.current()
+        self._package_class = PackageClass.of(self._package, tariff)
+        self._fee = self.calc_fee(tariff)  # Priced by the tariff in use when placed
+        self._tariff_version = tariff.version
+        self._dirty = True
+        self._version = 0
+        self._journal = None
+        
+        # Tracking entries are kept in the event store, not in the pickle.
+        # The first one is written by open_log(), once the ID is registered
+        first = Arrival(collector_ID, origin)
+        self._unwritten = first
+        self._log = [first]  # Loaded lazily for orders read from storage
         
     @property
     def payer(self) -> str:
@@ -124,26 +170,17 @@ class Order:
     
     @property
     def size_class(self) -> SizeClass:
-        len_index = sum(self.package.size)
-        if len_index <= 60:
-            return SizeClass.envelope
-        elif len_index <= 90:
-            return SizeClass.small_box
-        elif len_index <= 120:
-            return SizeClass.medium_box
-        elif len_index <= 150:
-            return SizeClass.big_box
+        return SIZE_CLASSES[self.package_class.size]
         
     @property
     def weight_class(self) -> WeightClass:
-        if self.package.weight <= 0.5:
-            return WeightClass.extra_light
-        elif self.package.weight <= 5:
-            return WeightClass.light
-        elif self.package.weight <= 15:
-            return WeightClass.heavy
-        elif self.package.weight <= 30:
-            return WeightClass.extra_heavy
+        return WEIGHT_CLASSES[self.package_class.weight]
+    
+    @property
+    def package_class(self) -> PackageClass:
+        if self._package_class is None:  # Loaded from a snapshot older than schema 4
+            self._package_class = PackageClass.of(self.package)
+        return self._package_class
     
     @property
     def service(self) -> str:
@@ -157,13 +194,25 @@ class Order:
     def due_date(self) -> date:
         return self._due_day.date()
     
+    @property
+    def due_time(self) -> datetime:
+        return self._due_day
+    
     @property
     def origin(self) -> Location:
-        return self._origin
+        return Registry().resolve(self._origin_key)
     
     @property
     def destination(self) -> Location:
-        return self._destination
+        return Registry().resolve(self._destination_key)
+    
+    @property
+    def origin_key(self) -> str:
+        return self._origin_key
+    
+    @property
+    def destination_key(self) -> str:
+        return self._destination_key
     
     @property 
     def is_international(self) -> bool:
@@ -172,9 +221,18 @@ class Order:
     @property
     def fee(self) -> float:
         if self._fee is None:
-            self._fee = self.calc_fee()
+            with self.lock(self._ID):
+                if self._fee is None:  # Saved before orders were priced when placed
+                    tariff = Tariff.current()
+                    self._fee = self.calc_fee(tariff)
+                    self._tariff_version = tariff.version
+                    self._changed('fee', self._fee, self._tariff_version)
         return self._fee
     
+    @property
+    def tariff_version(self) -> int | None:
+        return self._tariff_version
+    
     @property
     def bill_ref(self) -> Bill:
         return self._bill_ref
@@ -188,7 +246,9 @@ class Order:
         if not isinstance(timing, BillingTiming):
             raise TypeError("{timing} is not of type BillingTiming")
         
-        self._bill_timing = timing
+        with self.lock(self._ID):
+            self._bill_timing = timing
+            self._changed('bill_timing', timing)
     
     @property
     def status(self) -> Status:
@@ -196,20 +256,72 @@ class Order:
     
     @property
     def package(self) -> Package:
+        if self._package is None:
+            self._package = Package.from_dict(Codec.unpack(self._package_data))
+            self._package_data = None
         return self._package
+    
+    @property
+    def is_dirty(self) -> bool:
+        return self._dirty
+    
+    @property
+    def version(self) -> int:
+        return self._version
+    
+    def __eq__(self, other) -> bool:
+        # Orders are identified by ID, so a copy reloaded from storage still
+        # matches the one held in a vehicle's cargo or a repository's inventory
+        if not isinstance(other, Order):
+            return NotImplemented
+        return self.ID == other.ID
+    
+    def __hash__(self) -> int:
+        return hash(self.ID)
+    
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state['_dirty']
+        state.pop('_version', None)
+        state.pop('_journal', None)
+        state.pop('_log', None)
+        state.pop('_unwritten', None)
+        return state
+    
+    def __setstate__(self, state: dict) -> None:
+        legacy_log = state.pop('_log', None)
+        self.__dict__.update(state)
+        self.__dict__.setdefault('_tariff_version', None)
+        self.__dict__.setdefault('_package_class', None)
+        self._dirty = False
+        self._version = 0
+        self._journal = None
+        self._log = None
+        self._unwritten = None
+        
+        # Orders saved by older versions carry their entries; move them
+        if legacy_log and self._events().count(self._ID) == 0:
+            for entry in legacy_log:
+                self._events().append(self._ID, entry)
      
     
     ## Methods
-    def calc_fee(self) -> float:
+    def calc_fee(self, tariff: Tariff.Tariff = None) -> float:
         """
         Calculate the delivery fee based on service, size, weight, and special handling.
 
         Fee Formula
         -----------
-        total = (service_multiplier × distance_factor)
+        total = (service_rate × distance_factor)
                 + max(size_class_fee, weight_class_fee)
-                + dangerous_goods_surcharge (500 if applicable)
-                + fragile_surcharge (100 if applicable)
+                + dangerous_goods_surcharge (if applicable)
+                + fragile_surcharge (if applicable)
+
+        Parameters
+        ----------
+        tariff : Tariff.Tariff, optional
+            The tariff giving the rates, fees and surcharges. Defaults to
+            the one in use, see Tariff.current().
 
         Returns
         -------
@@ -218,19 +330,15 @@ class Order:
 
         See Also
         --------
-        Service : Enum defining service types and their fee multipliers.
-        SizeClass : Enum defining size classifications and fee values.
-        WeightClass : Enum defining weight classifications and fee values.
+        PackageClass : The classes the package was put in when the order was built.
+        Tariff.Tariff.price : Prices a package from the compiled tariff tables.
+        Distance.factor : The distance factor, cached per pair of locations.
         """
-        def distance_factor(origin, destination):
-            # TODO: Calculate actual distance factor based on origin/destination
-            return 1
-        total = ((self.service.value * distance_factor(self.origin, self.destination))
-                 + max(self.size_class.value, self.weight_class.value)
-                 + int(self._package.is_dangerous) * 500
-                 + int(self._package.is_fragile) * 100)
-        
-        return total
+        classes = self.package_class
+        return (tariff or Tariff.current()).price(
+            _SERVICE_CODES[self._service], classes.size, classes.weight,
+            classes.dangerous, classes.fragile,
+            Distance.factor(self._origin_key, self._destination_key))
     
     def billing(self, bill_ID: str):
         """
@@ -241,9 +349,26 @@ class Order:
         bill_ID : str
             The ID of the bill to associate with this order.
         """
-        self._bill_ref = bill_ID
+        with self.lock(self._ID):
+            self._bill_ref = bill_ID
+            self._changed('bill_ref', bill_ID)
         
     
+    def mark_delayed(self) -> None:
+        """
+        Flag the order as delayed once it missed its due time. Only orders
+        still in progress are affected; delivered, broken and missing orders
+        keep their status.
+
+        Returns
+        -------
+        None
+        """
+        with self.lock(self._ID):
+            if self._status is Status.normal:
+                self._status = Status.delayed
+                self._changed('status', Status.delayed)
+    
     def new_log(self, _type: str, receiver_ID, *args) -> None:
         """
         Add a new log entry to the order's history.
@@ -262,21 +387,168 @@ class Order:
         -------
         None
         """
-        _type = _type.upper()
-        if _type == 'A':
-            if isinstance(args[0], Destination):
-                self._status = Status.delivered
-            self._log.append(Arrival(receiver_ID, *args))
-            return
-        elif _type == 'T':
-            self._log.append(Transit(receiver_ID, *args))
-            return
-        elif _type == 'C':
-            self._status = Status.broken
-        elif _type == 'M':
-            self._status = Status.missing
-        self._log.append(OtherEvent(receiver_ID, *args))
-        return
+        with self.lock(self._ID):
+            self.open_log()
+            _type = _type.upper()
+            if _type == 'A':
+                if isinstance(args[0], Destination):
+                    self._status = Status.delivered
+                entry = Arrival(receiver_ID, *args)
+            elif _type == 'T':
+                entry = Transit(receiver_ID, *args)
+            else:
+                if _type == 'C':
+                    self._status = Status.broken
+                elif _type == 'M':
+                    self._status = Status.missing
+                entry = OtherEvent(receiver_ID, *args)
+            
+            # Journal the entry before appending it, so a crash in between is
+            # repaired by replaying the journal
+            self._changed('entry', self._events().count(self._ID), entry, self._status)
+            self._append_entry(entry)
+    
+    def attach_journal(self, journal: Callable[[str, tuple], None]) -> None:
+        """
+        Report every later change of the order to a journal, e.g. a
+        write-ahead log. The journal is not saved with the order.
+
+        Parameters
+        ----------
+        journal : Callable[[str, tuple], None]
+            Called with the ID of the order and a record of the change,
+            which apply() can replay.
+
+        Returns
+        -------
+        None
+        """
+        self._journal = journal
+    
+    def apply(self, record: tuple) -> None:
+        """
+        Replay a change reported to the journal. Replaying a change the
+        order already has does nothing, so a journal can be replayed
+        from any earlier point.
+
+        Parameters
+        ----------
+        record : tuple
+            The record of the change.
+
+        Returns
+        -------
+        None
+        """
+        with self.lock(self._ID):
+            kind, *args = record
+            if kind == 'entry':
+                self.open_log()
+                position, entry, status = args
+                if self._events().count(self._ID) == position:
+                    self._append_entry(entry)
+                self._status = status
+            elif kind == 'status':
+                self._status = args[0]
+            elif kind == 'bill_ref':
+                self._bill_ref = args[0]
+            elif kind == 'bill_timing':
+                self._bill_timing = args[0]
+            elif kind == 'fee':
+                self._fee, self._tariff_version = args
+            else:
+                raise ValueError(f"Unknown journal record: {kind}")
+            self._version += 1
+            self._dirty = True
+    
+    def open_log(self) -> None:
+        """
+        Write the first tracking entry of a new order to the event store.
+        OrdersHandler.add calls it once the ID is registered, so an order
+        rejected for a taken ID leaves no entries behind. Logging an entry
+        calls it as well; later calls do nothing.
+
+        Returns
+        -------
+        None
+        """
+        with self.lock(self._ID):
+            first, self._unwritten = self._unwritten, None
+            if first is not None:
+                self._events().append(self._ID, first)
+    
+    def _append_entry(self, entry: Entry) -> None:
+        """
+        Add an entry to the event store and to the loaded entries.
+        """
+        self._events().append(self._ID, entry)
+        if self._log is not None:
+            self._log.append(entry)
+    
+    @classmethod
+    def sync_events(cls) -> None:
+        """
+        Sync the tracking entries appended since they were last synced,
+        e.g. before the journal that could replay them is cut.
+
+        Returns
+        -------
+        None
+        """
+        cls._events().sync()
+    
+    @classmethod
+    def lock(cls, order_ID: str) -> threading.RLock:
+        """
+        Get the re-entrant lock that serializes changes to an order, e.g.
+        to read its status and record an entry as one step.
+
+        Parameters
+        ----------
+        order_ID : str
+            The ID of the order.
+
+        Returns
+        -------
+        threading.RLock
+            The lock of the order's stripe.
+        """
+        return cls.__locks.of(order_ID)
+    
+    @classmethod
+    def lock_all(cls):
+        """
+        Hold the locks of every order for the duration of a with-block, so
+        changes already under way are complete and no new one starts.
+
+        Returns
+        -------
+        ContextManager[None]
+        """
+        return cls.__locks.hold_all()
+    
+    @classmethod
+    def _storage(cls) -> StorageBackend:
+        """
+        Get the storage backend of the order directory.
+        """
+        return StorageBackend.of(cls.__DATA_PATH)
+    
+    @classmethod
+    def _events(cls) -> EventStore:
+        """
+        Get the event store holding the tracking entries of orders.
+        """
+        return EventStore.of(join(cls.__DATA_PATH, "events"))
+    
+    def _changed(self, *record) -> None:
+        """
+        Mark the order as dirty and report the change to the journal.
+        """
+        self._version += 1
+        self._dirty = True
+        if self._journal is not None:
+            self._journal(self._ID, record)
     
             
     def last_log(self) -> Entry:
@@ -288,7 +560,7 @@ class Order:
         Entry
             The most recent log entry.
         """
-        return self._log[-1]
+        return self.earlier_logs(1)[-1]
     
     
     def earlier_logs(self, step: int) -> list[Entry]:
@@ -305,7 +577,9 @@ class Order:
         list[Entry]
             A list of recent log entries.
         """
-        return self._log[-step:]
+        if self._log is None and step > 0:
+            return self._events().tail(self._ID, step)  # Read only the tail
+        return self.all_logs()[-step:]
     
     def all_logs(self) -> list[Entry]:
         """
@@ -316,29 +590,176 @@ class Order:
         list[Entry]
             A copy of all log entries.
         """
+        if self._log is None:
+            self._log = self._events().all(self._ID)
         return self._log.copy()
     
-    def save(self) -> None:
+    def mark_clean(self, version: int = None) -> None:
         """
-        Save the order to local storage as a pickle file.
+        Record that the current state of the order has been saved, for
+        storage engines that write the order themselves.
+
+        Parameters
+        ----------
+        version : int, optional
+            The version of the order when it was encoded. If it has changed
+            since, e.g. in another thread, the order stays dirty.
 
         Returns
         -------
         None
         """
-        file_path = join(self.__DATA_PATH, f"{self.ID}.pkl")
-        with open(file_path, "wb") as file:
-            pickle.dump(self, file, protocol=4)
+        if version is None or version == self._version:
+            self._dirty = False
+            # Changes bump the version before setting the flag, so one that
+            # raced the check above is either seen here or sets it again.
+            # Not taking the order's lock lets evicting threads call this
+            # while holding the lock of another order.
+            if version is not None and version != self._version:
+                self._dirty = True
+    
+    def snapshot(self) -> dict:
+        """
+        Create a dictionary containing states of the Order. Tracking entries
+        are kept in the event store and are not included.
+        
+        The package is packed separately into a bytes value, so loading
+        the order can skip it until it is accessed. A package that was
+        never accessed is passed through without being decoded.
 
+        Returns
+        -------
+        dict
+            A dictionary of plain values, to be encoded by Codec.
+        """
+        return {'ID': self._ID,
+                'payer': self._payer,
+                'service': self._service.name,
+                'collection_time': Codec.to_micros(self._collection_day),
+                'due_time': Codec.to_micros(self._due_day),
+                'origin_key': self._origin_key,
+                'destination_key': self._destination_key,
+                'is_international': self._is_international,
+                'fee': self._fee,
+                'tariff_version': self._tariff_version,
+                'package_class': self.package_class.snapshot(),
+                'bill_ref': self._bill_ref,
+                'bill_timing': self._bill_timing.name,
+                'status': self._status.name,
+                'package': (self._package_data if self._package is None
+                            else Codec.pack(self._package.snapshot()))}
+    
     @classmethod
-    def from_ID(cls, order_ID) -> Order:
+    def from_dict(cls, data: dict) -> Order:
+        """
+        Reconstruct the instance from a previous snapshot. Only the fields
+        of the order itself are decoded; the package is decoded on first
+        access, and tracking entries are read from the event store.
+
+        Parameters
+        ----------
+        data : dict
+            A snapshot taken previously.
+
+        Returns
+        -------
+        Order
+        """
+        instance = cls.__new__(cls)
+        instance._payer = data['payer']
+        instance._ID = data['ID']
+        instance._service = Service[data['service']]
+        instance._collection_day = Codec.from_micros(data['collection_time'])
+        instance._due_day = Codec.from_micros(data['due_time'])
+        instance._origin_key = data['origin_key']
+        instance._destination_key = data['destination_key']
+        instance._is_international = data['is_international']
+        instance._fee = data['fee']
+        instance._tariff_version = data.get('tariff_version')  # Since schema version 3
+        classes = data.get('package_class')  # Since schema version 4
+        instance._package_class = PackageClass(*classes) if classes is not None else None
+        instance._bill_ref = data['bill_ref']
+        instance._bill_timing = BillingTiming[data['bill_timing']]
+        instance._status = Status[data['status']]
+        if isinstance(data['package'], dict):  # Schema version 1
+            instance._package = Package.from_dict(data['package'])
+            instance._package_data = None
+        else:
+            instance._package = None
+            instance._package_data = data['package']
+        instance._dirty = False
+        instance._version = 0
+        instance._journal = None
+        instance._log = None
+        instance._unwritten = None
+        return instance
+    
+    def save(self, backend: StorageBackend = None) -> int:
         """
-        Load an order from storage by its ID.
+        Save the order to local storage, encoded by Codec.
+
+        Parameters
+        ----------
+        backend : StorageBackend, optional
+            Where to save it, e.g. an OrderStore. Defaults to the backend
+            selected in config.json.
+
+        Returns
+        -------
+        int
+            The number of bytes written.
+        """
+        return self.save_many([self], backend)
+    
+    @classmethod
+    def save_many(cls, orders: list[Order], backend: StorageBackend = None) -> int:
+        """
+        Save several orders, encoded by Codec, to a storage backend.
+        
+        The orders are handed to the backend in batches, which it makes
+        durable together, e.g. with one round of fsyncs per batch.
+
+        Parameters
+        ----------
+        orders : list[Order]
+            The orders to save.
+        backend : StorageBackend, optional
+            Where to save them, e.g. an OrderStore. Defaults to the backend
+            selected in config.json.
+
+        Returns
+        -------
+        int
+            The number of bytes written.
+        """
+        if backend is None:
+            backend = cls._storage()
+        written = 0
+        for start in range(0, len(orders), cls.__SYNC_BATCH):
+            batch = orders[start:start + cls.__SYNC_BATCH]
+            with cls.__save_lock:
+                versions = [order.version for order in batch]  # Before encoding
+                written += backend.put_many({order.ID: Codec.encode(order)
+                                             for order in batch})
+                for order, version in zip(batch, versions):
+                    order.mark_clean(version)
+            cls._events().sync(order.ID for order in batch)
+                
+        return written
+
+    @classmethod
+    def from_ID(cls, order_ID, backend: StorageBackend = None) -> Order:
+        """
+        Load an order from a storage backend by its ID. Orders pickled by
+        older versions are still read.
 
         Parameters
         ----------
         order_ID : str
             The ID of the order to load.
+        backend : StorageBackend, optional
+            Where it is stored, e.g. an OrderStore. Defaults to the backend
+            selected in config.json.
 
         Returns
         -------
@@ -350,42 +771,145 @@ class Order:
         FileNotFoundError
             If no order with the specified ID exists.
         """
-        file_path = join(cls.__DATA_PATH, f"{order_ID}.pkl")
-        if not isfile(file_path):
-            raise FileNotFoundError(f"There's no order with the specifed ID: {order_ID}")
-            
-        with open(file_path, "rb") as file:
-            instance = pickle.load(file)
-        
-        return instance
+        try:
+            data = (cls._storage() if backend is None else backend).get(order_ID)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"There's no order with the specifed ID: {order_ID}") from None
+        return cls.from_bytes(data)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Order:
+        """
+        Decode an order read from storage. Orders pickled by older versions
+        are still read.
+
+        Parameters
+        ----------
+        data : bytes
+            The stored order.
+
+        Returns
+        -------
+        Order
+            The decoded Order object.
+
+        Raises
+        ------
+        ValueError
+            If the data is neither encoded by Codec nor a pickle.
+        """
+        if Codec.is_encoded(data):
+            return Codec.decode(data, cls)
+        if data[:1] == b"\x80":  # Pickles of protocol 2 or later
+            return pickle.loads(data)
+        raise ValueError(f"Not a stored order: {data[:16]!r}")
+    
+    
+class PackageClass:
+    """
+    The classes and handling flags of a package as small ints, worked out
+    once when its order is built, so pricing or listing orders neither
+    classifies nor decodes their packages again.
+    
+    The classes are those of the tariff in use when the order was built;
+    a later tariff changes their fees, not the class an order is in.
+
+    Attributes:
+        size (int): The position of the package's SizeClass in SizeClass.
+        weight (int): The position of the package's WeightClass in WeightClass.
+        dangerous (bool): Whether the package holds dangerous goods.
+        fragile (bool): Whether the package is fragile.
+
+    Methods:
+        of(package, tariff): Class method to classify a package.
+        snapshot(): Returns a tuple of the codes and flags.
+    """
+    __slots__ = ('size', 'weight', 'dangerous', 'fragile')
+    
+    def __init__(self, size: int, weight: int, dangerous: bool, fragile: bool):
+        self.size = size
+        self.weight = weight
+        self.dangerous = dangerous
+        self.fragile = fragile
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PackageClass):
+            return NotImplemented
+        return self.snapshot() == other.snapshot()
+    
+    def __repr__(self) -> str:
+        return (f"PackageClass({SIZE_CLASSES[self.size].name}, "
+                f"{WEIGHT_CLASSES[self.weight].name}, dangerous={self.dangerous}, "
+                f"fragile={self.fragile})")
+    
+    
+    ## Methods
+    @classmethod
+    def of(cls, package: Package, tariff: Tariff.Tariff = None) -> PackageClass:
+        """
+        Classify a package by the class limits of a tariff.
+
+        Parameters
+        ----------
+        package : Package
+            The package.
+        tariff : Tariff.Tariff, optional
+            The tariff giving the limits. Defaults to the one in use.
+
+        Returns
+        -------
+        PackageClass
+        """
+        tariff = tariff or Tariff.current()
+        return cls(tariff.size_code(sum(package.size)), tariff.weight_code(package.weight),
+                   package.is_dangerous, package.is_fragile)
+    
+    def snapshot(self) -> tuple:
+        """
+        Get the codes and flags, in the order __init__ takes them.
+
+        Returns
+        -------
+        tuple
+        """
+        return (self.size, self.weight, self.dangerous, self.fragile)
     
     
 class SizeClass(Enum):
     """
     Enum defining package size classifications and their fee values.
     
-    Values represent fee amounts based on package dimensions.
+    Values are the fees of the built-in tariff; the fees charged, and the
+    limits of each class, are read from the tariff file (see Tariff).
+    oversize takes every package beyond the other classes.
     """
     envelope = 60
     small_box = 120
     medium_box = 250
     big_box = 450
+    oversize = 900
     
 class WeightClass(Enum):
     """
     Enum defining package weight classifications and their fee values.
     
-    Values represent fee amounts based on package weight.
+    Values are the fees of the built-in tariff; the fees charged, and the
+    limits of each class, are read from the tariff file (see Tariff).
+    overweight takes every package beyond the other classes.
     """
     extra_light = 60
     light = 120
     heavy = 250
     extra_heavy = 450
+    overweight = 900
     
 class Service(Enum):
     """
     Enum defining delivery service types and their fee multipliers.
     
+    Values are the rates of the built-in tariff; the rates charged are
+    read from the tariff file (see Tariff).
+    
     over_night: Next day delivery (1 day)
     express: Fast delivery (2 days)
     standard: Regular delivery (7 days)
@@ -431,5 +955,11 @@ class Status(Enum):
     broken = 3
     missing = 4
     
+## The classes and services by code, the position the tariff prices them at
+SIZE_CLASSES = tuple(SizeClass)
+WEIGHT_CLASSES = tuple(WeightClass)
+SERVICES = tuple(Service)
+_SERVICE_CODES = {service: code for code, service in enumerate(SERVICES)}
+    
 if __name__ == "__main__":
     print(Service.over_night.value)
\ No newline at end of file
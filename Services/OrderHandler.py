@@ -6,11 +6,22 @@ Created on Fri Dec 26 11:22:49 2025
 @author: laisz
 """
 from platformdirs import user_data_dir
-from Order import Order
+from Order import Order, Status
 from Vehicle import Vehicle
 from Location import Repository
-import json
-from os.path import isfile, join
+from OrderIndex import OrderIndex
+from OrderStore import OrderStore
+from Storage import StorageBackend
+from Cache import LRUCache
+from Scheduler import DueScheduler
+from WriteAheadLog import WriteAheadLog
+from Analytics import OrderTable
+import Analytics, FileLock, Scan
+import json, math, os, secrets, threading
+from glob import glob
+from bisect import bisect_right
+from os.path import join
+from typing import Callable, Iterator
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
@@ -29,59 +40,176 @@ def get_dir() -> str:
         
     return user_data_dir(config['app_name'], config['project_name']) + config['order_suffix']
 
+def get_store() -> OrderStore | None:
+    """
+    Open the storage engine selected by 'order_store' in config.json.
+    
+    Returns
+    -------
+    OrderStore | None
+        An OrderStore if 'order_store' is "sqlite", or None if orders are
+        kept as pickle files.
+    """
+    with open('config.json', 'r', encoding='utf-8') as file:
+        config = json.load(file)
+        
+    if config.get('order_store', 'pickle') == 'sqlite':
+        return OrderStore(join(get_dir(), "orders.sqlite3"))
+    return None
+
+def get_cache_size() -> int:
+    """
+    Get the number of orders OrdersHandler keeps in memory, set by
+    'order_cache_size' in config.json.
+    
+    Returns
+    -------
+    int
+        The capacity of the order cache.
+    """
+    with open('config.json', 'r', encoding='utf-8') as file:
+        config = json.load(file)
+        
+    return config.get('order_cache_size', 10000)
+
+def get_checkpoint_bytes() -> int:
+    """
+    Get the size the write-ahead log may grow to before OrdersHandler
+    checkpoints it, set by 'wal_checkpoint_bytes' in config.json.
+    
+    Returns
+    -------
+    int
+        The size of the log in bytes.
+    """
+    with open('config.json', 'r', encoding='utf-8') as file:
+        config = json.load(file)
+        
+    return config.get('wal_checkpoint_bytes', 4194304)
+
 class OrdersHandler:
     """
     Singleton class that manages the collection of orders.
 
     This class provides centralized access to all orders in the system,
     supporting CRUD operations and various filtering capabilities.
-    Uses an in-memory cache with an order_list.json index for tracking.
+    Uses an in-memory cache with an append-only order_list.jsonl index for
+    tracking. The index also maps each customer to the IDs of their orders,
+    so a customer's orders are found without loading anyone else's. If
+    config.json selects the sqlite OrderStore, it becomes the storage
+    backend of the orders, and the filters become indexed queries.
+    
+    The cache holds at most 'order_cache_size' orders and evicts the least
+    recently used one. Orders with unsaved changes are written back to
+    storage when they are evicted; until then they can still be found.
+    
+    Every change to an order is appended to a write-ahead log before the
+    call returns, so it survives a crash without rewriting the whole order.
+    Each process writes its own log (orders.<pid>.<token>.wal) and holds a
+    lock on it while it runs. Once the log reaches 'wal_checkpoint_bytes',
+    the changed orders are saved and the log is cut; on start, the logs of
+    processes that have ended are replayed and removed.
+    
+    A DueScheduler watches the due time of every order in progress and
+    flags it as delayed once the time passes. Status changes are recorded
+    in the index, so the set of delayed orders is kept up to date without
+    loading any order.
+    
+    The first call to analytics() reads every order into a columnar
+    OrderTable; from then on new orders are appended to it and status
+    changes recorded in the index are applied to it, so reports do not
+    load orders again.
+    
+    The handler is safe to share between threads. Entries for one order
+    are recorded one at a time under the order's lock (see Order.lock),
+    a cache miss loads each order only once, and the index serializes its
+    own appends.
 
     Methods:
         add(*order_args): Create and add a new order.
         get(order_ID): Retrieve an order by ID.
         filter_by_customer(customer_ID): Get orders for a specific customer.
-        filter_by_date(start_date, end_date): Get orders within a date range.
+        filter_by_date(start_date, end_date, customer_ID): Get orders within
+            a date range, optionally for one customer.
         filter_by_vehicle(vehicle): Get orders on a specific vehicle.
         filter_by_repo(repository): Get orders in a specific repository.
         filter_delayed(): Get all delayed orders.
+        iter_by_customer(customer_ID, project, after),
+            iter_by_date(start_date, end_date, customer_ID, project, after),
+            iter_delayed(project, after), iter_by_vehicle(vehicle, project,
+            after), iter_by_repo(repository, project, after): Yield the
+            orders of the filters one at a time, in the order of their IDs.
+        scan(predicate, project, workers): Find the orders matching an
+            ad-hoc predicate on a pool of processes.
+        analytics(workers): Get the columnar table of all orders.
+        ids_by_customer(customer_ID), ids_by_date(start_date, end_date,
+            customer_ID), ids_delayed(): Get the IDs the filters would load.
         log(order_ID, *entry_args): Add a log entry to an order.
-        flush(): Persist all cached orders to disk.
+        start_scheduler(): Flag overdue orders in a background thread.
+        stop_scheduler(): Stop the background thread.
+        save(order): Save one order to the storage of the handler.
+        flush(): Persist the cached orders that have changed.
+        checkpoint(): Persist the changed orders and cut the log.
+        cache_stats(): Get the hit, miss and eviction counters of the cache.
     """
     _instance = None
+    _instance_lock = threading.Lock()
     
     def __new__(cls, *args):
         """
         Create or return the singleton instance of OrdersHandler.
+        
+        The instance is only published once it has recovered, so threads
+        racing to create it all get the same, complete instance.
 
         Returns
         -------
         OrdersHandler
             The singleton instance.
         """
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance.__ORDERS_PATH = get_dir()
-            cls._instance._orders = {}
+        if cls._instance is not None:
+            return cls._instance
+        
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super().__new__(cls)
+                instance.__ORDERS_PATH = get_dir()
+                instance._orders = LRUCache(get_cache_size(), on_evict=instance._on_evict)
+                instance._evicted = {}  # Evicted orders not written back yet
+                instance._evicted_lock = threading.Lock()
+                instance._delayed = set()
+                instance._table = None  # Built by analytics() on first use
+                instance._table_lock = threading.Lock()
+                instance._scheduler = DueScheduler(instance._expire)
+                instance._index = OrderIndex(
+                    join(instance.__ORDERS_PATH, "order_list.jsonl"),
+                    legacy_path=join(instance.__ORDERS_PATH, "order_list.json"),
+                    on_record=instance._on_index_record)
+                instance._store = get_store()
+                if instance._store is not None:
+                    StorageBackend.use(instance._store)
+                wal_path = join(instance.__ORDERS_PATH,
+                                f"orders.{os.getpid()}.{secrets.token_hex(4)}.wal")
+                instance._wal_owner = FileLock.acquire(wal_path + ".lock")
+                instance._wal = WriteAheadLog(wal_path)
+                instance._checkpoint_bytes = get_checkpoint_bytes()
+                instance._checkpoint_lock = threading.Lock()
+                instance._recover()
+                cls._instance = instance
         return cls._instance
         
     def _order_list(self) -> list[str]:
         """
         Get the list of all order IDs from the index file.
 
+        Only the records appended since the last call are read from disk.
+
         Returns
         -------
         list[str]
             A list of order IDs.
         """
-        index_path = join(self.__ORDERS_PATH, "order_list.json")
-        if isfile(index_path):
-            with open(index_path, 'r', encoding='utf-8') as f:
-                order_list = json.load(f)
-        else:
-            order_list = []
-        
-        return order_list    
+        return self._index.ids()
         
     
     def add(self, *order_args: tuple) -> str:
@@ -97,27 +225,29 @@ class OrdersHandler:
         -------
         str
             The ID of the newly created order.
+
+        Raises
+        ------
+        ValueError
+            If the ID of the new order is already taken.
         """
         order = Order(*order_args)
-        self._orders[order.ID] = order
-        
-        # Register order in order_list
-        index_path = join(self.__ORDERS_PATH, "order_list.json")
-        if isfile(index_path):
-            with open(index_path, 'r', encoding='utf-8') as f:
-                order_list = json.load(f)
-        else:
-            order_list = []
-        
-        # Check for duplicate ID
-        if order.ID in order_list:
+        if order.ID in self._index:
             raise ValueError(f"ID '{order.ID}' is already taken!")
         
-
-        order_list.append(order.ID)
-        with open(index_path, 'w', encoding='utf-8') as f:
-            json.dump(order_list, f, indent=2)
-            
+        # Log the new order before registering it, so a crash in between
+        # leaves nothing in the index that cannot be loaded
+        with Order.lock(order.ID):
+            self._wal.append((order.ID, 'add', order, order.last_log()))
+            self._index.append(order.ID, due=order.due_time.isoformat(), payer=order.payer)
+            order.open_log()
+            self._track(order)
+        if self._store is not None:  # Found by the indexed queries right away
+            order.save(self._store)
+        if self._table is not None:
+            self._table.append(order)
+        
+        self._maybe_checkpoint()
         return order.ID
         
     def get(self, order_ID: str) -> Order:
@@ -136,14 +266,24 @@ class OrdersHandler:
         """
         order = self._orders.get(order_ID, None)
         if order is None:
-            order = Order.from_ID(order_ID)
-            self._orders[order_ID] = order  # Cache the loaded order
+            with Order.lock(order_ID):
+                # Another thread may have loaded it while this one waited
+                order = self._orders.peek(order_ID)
+                if order is None:
+                    with self._evicted_lock:
+                        order = self._evicted.get(order_ID)  # Still being written back
+                    if order is None:
+                        order = Order.from_ID(order_ID, self._store)
+                    self._track(order)  # Cache the loaded order
         return order
         
         
     def filter_by_customer(self, customer_ID: str) -> list[Order]:
         """
         Get all orders belonging to a specific customer.
+        
+        The IDs are looked up in the payer index, so only the customer's
+        own orders are loaded.
 
         Parameters
         ----------
@@ -155,19 +295,34 @@ class OrdersHandler:
         list[Order]
             A list of orders where the payer matches the customer ID.
         """
-        targets = []
-        for order_ID in self._order_list():
-            order = self.get(order_ID)
-            
-            if order.payer == customer_ID:
-                targets.append(order)
-                
-        return targets            
-        
+        return [self.get(order_ID) for order_ID in self.ids_by_customer(customer_ID)]
+    
+    def ids_by_customer(self, customer_ID: str) -> list[str]:
+        """
+        Get the IDs of the orders belonging to a specific customer, without
+        loading any order.
+
+        Parameters
+        ----------
+        customer_ID : str
+            The ID of the customer.
+
+        Returns
+        -------
+        list[str]
+            The IDs of the orders where the payer matches the customer ID.
+        """
+        if self._store is not None:
+            return self._store.ids_by_customer(customer_ID)
+        return self._complete_index().by_payer(customer_ID)
         
-    def filter_by_date(self, start_date, end_date) -> list[Order]:
+    def filter_by_date(self, start_date, end_date,
+                       customer_ID: str = None) -> list[Order]:
         """
         Get all orders with their due date within a date range.
+        
+        The IDs are looked up in the due-date index, so only the orders in
+        the range are loaded.
 
         Parameters
         ----------
@@ -175,24 +330,61 @@ class OrdersHandler:
             The start date of the range (inclusive).
         end_date : date
             The end date of the range (inclusive).
+        customer_ID : str, optional
+            Only return the orders paid by this customer.
 
         Returns
         -------
         list[Order]
             A list of orders with due dates within the range.
         """
+        return [self.get(order_ID)
+                for order_ID in self.ids_by_date(start_date, end_date, customer_ID)]
+    
+    def ids_by_date(self, start_date, end_date, customer_ID: str = None) -> list[str]:
+        """
+        Get the IDs of the orders with their due date within a date range,
+        without loading any order.
+
+        Parameters
+        ----------
+        start_date : date
+            The start date of the range (inclusive).
+        end_date : date
+            The end date of the range (inclusive).
+        customer_ID : str, optional
+            Only return the orders paid by this customer.
+
+        Returns
+        -------
+        list[str]
+            The IDs of the orders with due dates within the range.
+        """
+        if self._store is not None:
+            return self._store.ids_by_date(start_date, end_date, customer_ID)
         
-        targets = []
-        for order_ID in self._order_list():
-            order = self.get(order_ID)
-            
-            if order.due_date >= start_date and order.due_date <= end_date:
-                targets.append(order)
-                
-        return targets
-                
+        order_IDs = self._complete_index().by_due_date(start_date, end_date)
+        if customer_ID is not None:
+            own = set(self._index.by_payer(customer_ID))
+            order_IDs = [order_ID for order_ID in order_IDs if order_ID in own]
+        return order_IDs
+    
+    def _complete_index(self) -> OrderIndex:
+        """
+        Get the order index after recording the due dates and payers of
+        orders that were indexed without them, e.g. from an old
+        order_list.json.
+        """
+        missing = dict.fromkeys(self._index.missing_due_date() + self._index.missing_payer())
+        if missing:
+            updates = {}
+            for order_ID in missing:
+                order = self.get(order_ID)
+                updates[order_ID] = {'due': order.due_time.isoformat(),
+                                     'payer': order.payer}
+            self._index.update_many(updates)
+        return self._index
                 
-        
     def filter_by_vehicle(self, vehicle: Vehicle) -> set[Order]:
         """
         Get all orders currently on a specific vehicle.
@@ -227,25 +419,225 @@ class OrdersHandler:
         
     def filter_delayed(self) -> list[Order]:
         """
-        Get all orders that are past their due date.
+        Get all orders that missed their due time before being delivered.
+        
+        Orders are flagged by the scheduler, so only the delayed orders are
+        loaded.
 
         Returns
         -------
         list[Order]
             A list of delayed orders.
         """
-        targets = []
-        for order_ID in self._order_list():
-            order = self.get(order_ID)
-                
-            if order.due_date <= datetime.now(ZoneInfo("Asia/Taipei")).date():
-                targets.append(order)
+        return [self.get(order_ID) for order_ID in self.ids_delayed()]
+    
+    def ids_delayed(self) -> list[str]:
+        """
+        Get the IDs of all delayed orders, without loading any order.
+
+        Returns
+        -------
+        list[str]
+            The sorted IDs of the delayed orders.
+        """
+        self._complete_index()
+        self._scheduler.run_pending()  # In case the background thread is not running
+        return sorted(self._delayed)
+        
+    def scan(self, predicate, project=None, workers: int = None) -> list:
+        """
+        Find the orders matching an ad-hoc predicate that no index answers,
+        decoding them on a pool of processes, see Scan.
         
-        return targets
+        Changed orders are saved first, so the workers read their latest
+        state from storage.
+
+        Parameters
+        ----------
+        predicate : Callable[[Order], bool]
+            The picklable test applied to each order, e.g. Scan.Where.
+        project : Callable[[Order], Any], optional
+            The picklable function turning a matching order into the
+            result. Defaults to the order's ID.
+        workers : int, optional
+            The number of processes. Defaults to the number of CPUs.
+
+        Returns
+        -------
+        list
+            The projections of the matching orders, in the order of their IDs.
+        """
+        self.flush()
+        source = ('order_store', self._store.path) if self._store is not None else None
+        return Scan.scan(self._order_list(), predicate, project, source, workers)
+    
+    def analytics(self, workers: int = None) -> OrderTable:
+        """
+        Get the columnar table of all orders, for reports such as revenue
+        by service or on-time rate by month.
+        
+        The table is built on first use by scanning every order on a pool
+        of processes, and kept up to date afterwards. Orders saved before
+        they were priced are priced here rather than in the pool. Orders added by other
+        processes are appended on the next call.
+
+        Parameters
+        ----------
+        workers : int, optional
+            The number of processes building the table. Defaults to the
+            number of CPUs.
+
+        Returns
+        -------
+        OrderTable
+            The table shared by every caller.
+        """
+        with self._table_lock:
+            if self._table is None:
+                table = OrderTable()
+                rows = self.scan(Analytics._everything, Analytics.saved_row, workers)
+                table.extend_rows([Analytics.row(self.get(f"O{values[0]:013d}"))
+                                   if math.isnan(values[3]) else values for values in rows])
+                self._table = table
+            
+            order_IDs = self._order_list()
+            if len(order_IDs) != len(self._table):
+                self._table.extend(self.get(order_ID) for order_ID in order_IDs
+                                   if order_ID not in self._table)
+            return self._table
+        
+    def iter_by_customer(self, customer_ID: str, project: Callable = None,
+                         after: str = None) -> Iterator:
+        """
+        Yield the orders belonging to a specific customer one at a time,
+        so the caller can stop early and never holds the whole result.
+
+        Parameters
+        ----------
+        customer_ID : str
+            The ID of the customer.
+        project : Callable[[Order], Any], optional
+            Turns each order into what is yielded, e.g.
+            operator.attrgetter('ID', 'fee'). Defaults to the order itself.
+        after : str, optional
+            Only yield the orders whose ID comes after this one, e.g. the
+            last ID of the previous page.
+
+        Returns
+        -------
+        Iterator
+            The (projected) orders, in the order of their IDs.
+        """
+        return self._iter_ids(self.ids_by_customer(customer_ID), project, after)
+    
+    def iter_by_date(self, start_date, end_date, customer_ID: str = None,
+                     project: Callable = None, after: str = None) -> Iterator:
+        """
+        Yield the orders with their due date within a date range one at a
+        time, see iter_by_customer().
+
+        Parameters
+        ----------
+        start_date : date
+            The start date of the range (inclusive).
+        end_date : date
+            The end date of the range (inclusive).
+        customer_ID : str, optional
+            Only yield the orders paid by this customer.
+        project : Callable[[Order], Any], optional
+            Turns each order into what is yielded.
+        after : str, optional
+            Only yield the orders whose ID comes after this one.
+
+        Returns
+        -------
+        Iterator
+            The (projected) orders, in the order of their IDs.
+        """
+        return self._iter_ids(self.ids_by_date(start_date, end_date, customer_ID),
+                              project, after)
+    
+    def iter_delayed(self, project: Callable = None, after: str = None) -> Iterator:
+        """
+        Yield the delayed orders one at a time, see iter_by_customer().
+
+        Parameters
+        ----------
+        project : Callable[[Order], Any], optional
+            Turns each order into what is yielded.
+        after : str, optional
+            Only yield the orders whose ID comes after this one.
+
+        Returns
+        -------
+        Iterator
+            The (projected) orders, in the order of their IDs.
+        """
+        return self._iter_ids(self.ids_delayed(), project, after)
+    
+    def iter_by_vehicle(self, vehicle: Vehicle, project: Callable = None,
+                        after: str = None) -> Iterator:
+        """
+        Yield the orders currently on a specific vehicle one at a time,
+        see iter_by_customer().
+
+        Parameters
+        ----------
+        vehicle : Vehicle
+            The vehicle to query.
+        project : Callable[[Order], Any], optional
+            Turns each order into what is yielded.
+        after : str, optional
+            Only yield the orders whose ID comes after this one.
+
+        Returns
+        -------
+        Iterator
+            The (projected) orders, in the order of their IDs.
+        """
+        orders = {order.ID: order for order in vehicle.cargo}
+        return self._iter_ids(orders, project, after, orders.__getitem__)
+    
+    def iter_by_repo(self, repository: Repository, project: Callable = None,
+                     after: str = None) -> Iterator:
+        """
+        Yield the orders currently in a specific repository one at a time,
+        see iter_by_customer().
+
+        Parameters
+        ----------
+        repository : Repository
+            The repository to query.
+        project : Callable[[Order], Any], optional
+            Turns each order into what is yielded.
+        after : str, optional
+            Only yield the orders whose ID comes after this one.
+
+        Returns
+        -------
+        Iterator
+            The (projected) orders, in the order of their IDs.
+        """
+        orders = {order.ID: order for order in repository.inventory}
+        return self._iter_ids(orders, project, after, orders.__getitem__)
+    
+    def _iter_ids(self, order_IDs, project: Callable, after: str,
+                  load: Callable[[str], Order] = None) -> Iterator:
+        """
+        Load and yield orders by ID in ascending order, starting after a
+        cursor. Each order is only loaded when the caller asks for it.
+        """
+        order_IDs = sorted(order_IDs)
+        load = load or self.get
+        for position in range(0 if after is None else bisect_right(order_IDs, after),
+                              len(order_IDs)):
+            order = load(order_IDs[position])
+            yield order if project is None else project(order)
         
     def log(self, order_ID: str, *entry_args):
         """
-        Add a log entry to an order.
+        Add a log entry to an order. Entries for the same order are
+        recorded one at a time, so concurrent calls lose no updates.
 
         Parameters
         ----------
@@ -258,28 +650,274 @@ class OrdersHandler:
         -------
         None
         """
-        self.get(order_ID).new_log(*entry_args)
+        with Order.lock(order_ID):
+            order = self.get(order_ID)
+            status = order.status
+            order.new_log(*entry_args)
+            
+            if order.status is not status:
+                self._index.update_many({order_ID: {'status': order.status.value}})
+            self._retrack(order)
+        self._maybe_checkpoint()
+            
+    def start_scheduler(self) -> None:
+        """
+        Start flagging overdue orders in a background thread.
+
+        Returns
+        -------
+        None
+        """
+        self._complete_index()
+        self._scheduler.start()
+        
+    def stop_scheduler(self) -> None:
+        """
+        Stop the background thread started by start_scheduler().
+
+        Returns
+        -------
+        None
+        """
+        self._scheduler.stop()
         
-    def flush(self) -> None:
+    def save(self, order: Order) -> int:
+        """
+        Save a single order to the storage of the handler, e.g. to persist
+        it before the next flush.
+
+        Parameters
+        ----------
+        order : Order
+            The order to save.
+
+        Returns
+        -------
+        int
+            The number of bytes written.
         """
-        Persist all cached orders to disk.
+        return order.save(self._store)
+    
+    def flush(self) -> tuple[int, int]:
+        """
+        Persist the cached orders that have unsaved changes.
         
         Should be called periodically by the application layer
         or on shutdown to ensure data is saved.
+
+        Returns
+        -------
+        tuple[int, int]
+            The number of orders and the number of bytes written.
+        """
+        with self._evicted_lock:
+            evicted = list(self._evicted.values())
+        orders = {order.ID: order for order in evicted + self._orders.values()}
+        dirty = [order for order in orders.values() if order.is_dirty]
+        if not dirty:
+            return 0, 0
+        
+        return len(dirty), Order.save_many(dirty, self._store)
+    
+    def checkpoint(self) -> tuple[int, int]:
         """
-        for order in self._orders.values():
-            order.save()
+        Persist the cached orders that have unsaved changes, then drop the
+        write-ahead log records that are now saved.
+
+        Returns
+        -------
+        tuple[int, int]
+            The number of orders and the number of bytes written.
+        """
+        with self._checkpoint_lock:
+            # Changes are logged before they are applied, under the order's
+            # lock; once no lock is held, every change up to lsn is applied
+            with Order.lock_all():
+                lsn = self._wal.tail
+            written = self.flush()
+            Order.sync_events()
+            self._wal.checkpoint(lsn)
+        return written
+            
+    def cache_stats(self) -> dict:
+        """
+        Get the counters of the order cache, for tuning 'order_cache_size'.
+
+        Returns
+        -------
+        dict
+            The size, capacity, hits, misses and evictions of the cache.
+        """
+        return self._orders.stats()
+    
+    def _on_index_record(self, record: dict) -> None:
+        """
+        Keep the scheduler and the delayed set in step with the index,
+        including records appended by other processes.
+        """
+        order_ID = record['ID']
+        if 'due' in record:
+            due = datetime.fromisoformat(record['due'])
+            if due.tzinfo is None:
+                due = due.replace(tzinfo=ZoneInfo("Asia/Taipei"))
+            self._scheduler.schedule(order_ID, due)
+            
+        if 'status' in record:
+            # Any recorded status means the order is no longer in progress
+            self._scheduler.cancel(order_ID)
+            if record['status'] == Status.delayed.value:
+                self._delayed.add(order_ID)
+            else:
+                self._delayed.discard(order_ID)
+            if self._table is not None:
+                self._table.set_status(order_ID, record['status'])
+    
+    def _expire(self, order_IDs: list[str]) -> None:
+        """
+        Flag the orders that missed their due time as delayed and record
+        their status in the index.
+        """
+        updates = {}
+        for order_ID in order_IDs:
+            with Order.lock(order_ID):
+                order = self.get(order_ID)
+                order.mark_delayed()
+                if order.status is not Status.normal:
+                    updates[order_ID] = {'status': order.status.value}
+                self._retrack(order)
+                
+        if updates:
+            self._index.update_many(updates)
+    
+    def _track(self, order: Order) -> None:
+        """
+        Cache an order and log its changes to the write-ahead log.
+        """
+        order.attach_journal(self._journal)
+        self._orders.put(order.ID, order)
+        self._write_back()
+    
+    def _retrack(self, order: Order) -> None:
+        """
+        Cache a changed order again if another thread evicted it while it
+        was being changed. Called with the order's lock held, so no other
+        thread can load a second copy in the meantime.
+        """
+        if self._orders.peek(order.ID) is not order:
+            self._track(order)
+    
+    def _journal(self, order_ID: str, record: tuple) -> None:
+        """
+        Append a change of an order to the write-ahead log.
+        """
+        self._wal.append((order_ID, *record))
+        
+    def _maybe_checkpoint(self) -> None:
+        """
+        Checkpoint once the write-ahead log has grown too big, unless
+        another thread is already doing it.
+        """
+        if self._wal.size >= self._checkpoint_bytes and not self._checkpoint_lock.locked():
+            self.checkpoint()
+    
+    def _recover(self) -> None:
+        """
+        Replay the write-ahead logs of processes that have ended, then
+        remove them. A log is left alone while its owner holds its lock,
+        as the owner may still append to it and checkpoint it.
+        """
+        for path in sorted(glob(join(self.__ORDERS_PATH, "orders*.wal"))):
+            if path == self._wal.path:
+                continue
+            owner = FileLock.acquire(path + ".lock", blocking=False)
+            if owner is None:
+                continue
+            try:
+                if not os.path.exists(path):  # Recovered by another process
+                    continue
+                wal = WriteAheadLog(path)
+                try:
+                    self._replay(wal)
+                finally:
+                    wal.close()
+                os.remove(path)
+            finally:
+                FileLock.release(owner)
+            try:
+                os.remove(path + ".lock")
+            except OSError:
+                pass
+    
+    def _replay(self, wal: WriteAheadLog) -> None:
+        """
+        Apply the records of a write-ahead log and save the orders they
+        change. Records of changes that were already saved replay as no-ops.
+        """
+        replayed = False
+        statuses = {}
+        for _, (order_ID, kind, *args) in wal.records():
+            replayed = True
+            if kind == 'add':
+                order, first_entry = args
+                if order_ID not in self._index:
+                    self._index.append(order_ID, due=order.due_time.isoformat(),
+                                       payer=order.payer)
+                try:
+                    self.get(order_ID)
+                except FileNotFoundError:  # Never saved before the crash
+                    order.save(self._store)
+                    self._track(order)
+                self.get(order_ID).apply(('entry', 0, first_entry, order.status))
+            else:
+                order = self.get(order_ID)
+                order.apply((kind, *args))
+                statuses[order_ID] = order.status
+                
+        if not replayed:
+            return
+        
+        updates = {order_ID: {'status': status.value}
+                   for order_ID, status in statuses.items() if status is not Status.normal}
+        if updates:
+            self._index.update_many(updates)
+        self.flush()
+        Order.sync_events()
+    
+    def _on_evict(self, order_ID: str, order: Order) -> None:
+        """
+        Set aside an order evicted from the cache if it has unsaved changes.
+        Called with the cache's lock held, so it only records the order.
+        """
+        if order.is_dirty:
+            with self._evicted_lock:
+                self._evicted[order_ID] = order
+    
+    def _write_back(self) -> None:
+        """
+        Save the evicted orders with unsaved changes. Each one is only
+        forgotten once saved, so a thread that misses it meanwhile finds it
+        set aside instead of loading an older copy from storage.
+        """
+        with self._evicted_lock:
+            evicted = list(self._evicted.items())
+            
+        for order_ID, order in evicted:
+            order.save(self._store)
+            with self._evicted_lock:
+                if self._evicted.get(order_ID) is order:
+                    del self._evicted[order_ID]
         
 if __name__ == "__main__":
     from PaymentArrangement import BillingTiming
     from Order import Service
+    from Location import Destination
     
     oh = OrdersHandler()
     order_ID = oh.add("C00001",
                       BillingTiming.in_advance,
                       Service.economy,
-                      "origin", 
-                      "destination",
+                      Destination("origin"), 
+                      Destination("destination"),
                       "collector_ID",
                       True, 
                       (3,2,1),
@@ -289,5 +927,5 @@ if __name__ == "__main__":
                       False,
                       False)
     
-    print(oh._orders)
-    print(oh.get(order_ID))
\ No newline at end of file
+    print(oh.get(order_ID))
+    print(oh.cache_stats())
\ No newline at end of file
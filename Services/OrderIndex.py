@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+"""
+Created on Sat Oct 17 09:12:40 2026
+
+@author: laisz
+"""
+import json, os, threading
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from os.path import isfile
+from typing import Callable
+from FileLock import file_lock
+
+
+class DueDateIndex:
+    """
+    Order IDs kept sorted by due date, for range queries in
+    O(log n + k).
+
+    Methods:
+        insert(due_date, order_ID): Add an order to the index.
+        between(start_date, end_date): Get the IDs due within a range.
+    """
+    def __init__(self):
+        self._days: list[int] = []  # date ordinals, sorted
+        self._ids: list[str] = []   # order IDs, parallel to _days
+
+    def __len__(self) -> int:
+        return len(self._days)
+
+    def insert(self, due_date: date, order_ID: str) -> None:
+        """
+        Add an order to the index. New orders are mostly due later than
+        the ones before them, so the insertion point is near the end.
+
+        Parameters
+        ----------
+        due_date : date
+            The due date of the order.
+        order_ID : str
+            The ID of the order.
+
+        Returns
+        -------
+        None
+        """
+        day = due_date.toordinal()
+        position = bisect_right(self._days, day)
+        self._days.insert(position, day)
+        self._ids.insert(position, order_ID)
+
+    def between(self, start_date: date, end_date: date) -> list[str]:
+        """
+        Get the IDs of the orders due within a range.
+
+        Parameters
+        ----------
+        start_date : date
+            The start date of the range (inclusive).
+        end_date : date
+            The end date of the range (inclusive).
+
+        Returns
+        -------
+        list[str]
+            The matching order IDs, ordered by due date.
+        """
+        low = bisect_left(self._days, start_date.toordinal())
+        high = bisect_right(self._days, end_date.toordinal())
+        return self._ids[low:high]
+
+
+class OrderIndex:
+    """
+    An append-only index of order IDs backed by a JSON-lines file.
+
+    Every record is one line, and a record only counts once its trailing
+    newline is in the file. A crash can therefore leave at most one torn line
+    at the end of the file, which is ignored when reading and cut off before
+    the next append.
+    
+    Appends are written under a lock on <path>.lock, after reading the
+    records other writers appended, so threads and processes sharing the
+    file never interleave or cut off each other's records.
+    
+    The first record of an ID registers the order. Later records with the
+    same ID add fields to it, e.g. the due date or payer of an order indexed
+    before those were recorded, or a change of status.
+
+    Attributes:
+        path (str): The path of the index file.
+
+    Methods:
+        refresh(): Read the records appended since the last known offset.
+        append(order_ID, **fields): Append a record for a new order.
+        update_many(updates): Append field records for known orders.
+        ids(): Get all indexed order IDs in insertion order.
+        by_due_date(start_date, end_date): Get the IDs due within a range.
+        by_payer(customer_ID): Get the IDs of the orders paid by a customer.
+        missing_due_date(): Get the IDs whose due date is not indexed.
+        missing_payer(): Get the IDs whose payer is not indexed.
+    """
+    def __init__(self, path: str, legacy_path: str = None,
+                 on_record: Callable[[dict], None] = None):
+        """
+        Initialize an OrderIndex.
+
+        Parameters
+        ----------
+        path : str
+            The path of the index file.
+        legacy_path : str, optional
+            The path of an order_list.json written by older versions. If it
+            exists and the index file does not, its IDs are imported once.
+        on_record : Callable[[dict], None], optional
+            Called with every record as it is read or written, including
+            the ones appended by other processes.
+        """
+        self._path = path
+        self._on_record = on_record
+        self._lock = threading.RLock()
+        self._offset = 0
+        self._ids: list[str] = []
+        self._known: set[str] = set()
+        self._dated: set[str] = set()
+        self._due_dates = DueDateIndex()
+        self._payers: dict[str, str] = {}           # order ID -> payer
+        self._by_payer: dict[str, list[str]] = {}   # payer -> order IDs
+
+        if legacy_path is not None and isfile(legacy_path) and not isfile(path):
+            self._import_legacy(legacy_path)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def __contains__(self, order_ID: str) -> bool:
+        with self._lock:
+            self.refresh()
+            return order_ID in self._known
+
+    def __len__(self) -> int:
+        with self._lock:
+            self.refresh()
+            return len(self._ids)
+
+
+    ## Methods
+    def refresh(self) -> None:
+        """
+        Read the records appended to the file since the last known offset.
+        A torn record at the end of the file is left for a later call.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            if not isfile(self._path):
+                return
+
+            with open(self._path, 'rb') as file:
+                file.seek(self._offset)
+                chunk = file.read()
+
+            end = chunk.rfind(b"\n") + 1
+            for line in chunk[:end].splitlines():
+                if line.strip():
+                    self._load(json.loads(line))
+            self._offset += end
+
+    def append(self, order_ID: str, **fields) -> None:
+        """
+        Append a record for a new order and sync it to disk.
+
+        Parameters
+        ----------
+        order_ID : str
+            The ID of the new order.
+        **fields
+            Indexed fields of the order, e.g. due="2026-01-01T08:00:00+08:00".
+
+        Raises
+        ------
+        ValueError
+            If the ID is already in the index.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock, file_lock(self._path + ".lock"):
+            self.refresh()
+            if order_ID in self._known:
+                raise ValueError(f"ID '{order_ID}' is already taken!")
+
+            self._write([{"ID": order_ID, **fields}])
+
+    def update_many(self, updates: dict[str, dict]) -> None:
+        """
+        Append field records for orders already in the index, syncing them
+        to disk once for the whole batch.
+
+        Parameters
+        ----------
+        updates : dict[str, dict]
+            The fields to record, by order ID.
+
+        Raises
+        ------
+        KeyError
+            If an ID is not in the index.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock, file_lock(self._path + ".lock"):
+            self.refresh()
+            for order_ID in updates:
+                if order_ID not in self._known:
+                    raise KeyError(f"There's no order with the specifed ID: {order_ID}")
+
+            self._write([{"ID": order_ID, **fields} for order_ID, fields in updates.items()])
+
+    def ids(self) -> list[str]:
+        """
+        Get all indexed order IDs.
+
+        Returns
+        -------
+        list[str]
+            A copy of the order IDs in insertion order.
+        """
+        with self._lock:
+            self.refresh()
+            return self._ids.copy()
+
+    def by_due_date(self, start_date: date, end_date: date) -> list[str]:
+        """
+        Get the IDs of the orders due within a range.
+
+        Parameters
+        ----------
+        start_date : date
+            The start date of the range (inclusive).
+        end_date : date
+            The end date of the range (inclusive).
+
+        Returns
+        -------
+        list[str]
+            The matching order IDs, ordered by due date.
+        """
+        with self._lock:
+            self.refresh()
+            return self._due_dates.between(start_date, end_date)
+
+    def by_payer(self, customer_ID: str) -> list[str]:
+        """
+        Get the IDs of the orders paid by a customer.
+
+        Parameters
+        ----------
+        customer_ID : str
+            The ID of the customer.
+
+        Returns
+        -------
+        list[str]
+            A copy of the matching order IDs in insertion order.
+        """
+        with self._lock:
+            self.refresh()
+            return self._by_payer.get(customer_ID, []).copy()
+
+    def missing_due_date(self) -> list[str]:
+        """
+        Get the IDs of the orders whose due date is not indexed yet.
+
+        Returns
+        -------
+        list[str]
+            The order IDs in insertion order.
+        """
+        with self._lock:
+            self.refresh()
+            if len(self._dated) == len(self._ids):
+                return []
+            return [order_ID for order_ID in self._ids if order_ID not in self._dated]
+
+    def missing_payer(self) -> list[str]:
+        """
+        Get the IDs of the orders whose payer is not indexed yet.
+
+        Returns
+        -------
+        list[str]
+            The order IDs in insertion order.
+        """
+        with self._lock:
+            self.refresh()
+            if len(self._payers) == len(self._ids):
+                return []
+            return [order_ID for order_ID in self._ids if order_ID not in self._payers]
+
+    def _write(self, records: list[dict]) -> None:
+        """
+        Append records to the file, sync it and apply them. Called with
+        both locks held, right after refresh().
+        """
+        data = b"".join((json.dumps(record, separators=(',', ':')) + "\n").encode('utf-8')
+                        for record in records)
+        with open(self._path, 'ab') as file:
+            # Cut off a torn record left behind by a crashed writer
+            if file.tell() > self._offset:
+                file.truncate(self._offset)
+                file.seek(self._offset)
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+
+        self._offset += len(data)
+        for record in records:
+            self._load(record)
+
+    def _load(self, record: dict) -> None:
+        """
+        Apply a record read from, or written to, the index file.
+        """
+        order_ID = record["ID"]
+        if order_ID not in self._known:
+            self._known.add(order_ID)
+            self._ids.append(order_ID)
+
+        if "due" in record and order_ID not in self._dated:
+            self._dated.add(order_ID)
+            self._due_dates.insert(datetime.fromisoformat(record["due"]).date(), order_ID)
+
+        if "payer" in record and order_ID not in self._payers:
+            self._payers[order_ID] = record["payer"]
+            self._by_payer.setdefault(record["payer"], []).append(order_ID)
+
+        if self._on_record is not None:
+            self._on_record(record)
+
+    def _import_legacy(self, legacy_path: str) -> None:
+        """
+        Convert an order_list.json into the index file. The new file is
+        written aside and renamed into place, so an interrupted import is
+        simply redone on the next start.
+        """
+        with open(legacy_path, 'r', encoding='utf-8') as file:
+            order_list = json.load(file)
+
+        tmp_path = self._path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8', newline="\n") as file:
+            for order_ID in dict.fromkeys(order_list):
+                file.write(json.dumps({"ID": order_ID}, separators=(',', ':')) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self._path)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from os.path import join
+
+    with tempfile.TemporaryDirectory() as folder:
+        index = OrderIndex(join(folder, "order_list.jsonl"))
+        index.append("O0000000000000", payer="C00001")
+        index.append("O0000000000001", payer="C00002")
+        print(OrderIndex(index.path).ids())
+        print(OrderIndex(index.path).by_payer("C00001"))
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+"""
+Created on Sat Oct 17 11:03:18 2026
+
+@author: laisz
+"""
+import sqlite3, threading
+from datetime import date
+from os.path import dirname
+from Order import Order
+from Storage import StorageBackend
+
+
+class OrderStore(StorageBackend):
+    """
+    A storage backend for orders built on sqlite3.
+
+    The fields that orders are queried by are kept in indexed columns, and
+    the whole Order object is kept as a blob encoded by Codec next to them.
+    A query therefore only has to decode the orders that match. Blobs
+    pickled by older versions are still read.
+
+    Orders are saved and loaded through it like through any other backend,
+    e.g. Order.save_many(orders, store) and Order.from_ID(order_ID, store);
+    the columns are read from the blobs as they are stored.
+
+    Attributes:
+        path (str): The path of the database file.
+
+    Methods:
+        get(order_ID): Get the blob of an order.
+        put_many(items): Insert or update several orders in one transaction.
+        delete(order_ID): Delete an order.
+        ids(): Get the IDs of all orders.
+        ids_by_customer(customer_ID): Get the IDs of a customer's orders.
+        ids_by_date(start_date, end_date): Get the IDs of orders due in a range.
+        close(): Close the database connection.
+    """
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS orders (
+            ID               TEXT PRIMARY KEY,
+            payer            TEXT NOT NULL,
+            due_date         TEXT NOT NULL,
+            status           INTEGER NOT NULL,
+            service          TEXT NOT NULL,
+            bill_ref         TEXT,
+            is_international INTEGER NOT NULL,
+            data             BLOB NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS orders_payer ON orders (payer);
+        CREATE INDEX IF NOT EXISTS orders_due_date ON orders (due_date);
+        CREATE INDEX IF NOT EXISTS orders_status ON orders (status);
+        CREATE INDEX IF NOT EXISTS orders_service ON orders (service);
+        CREATE INDEX IF NOT EXISTS orders_bill_ref ON orders (bill_ref);
+        CREATE INDEX IF NOT EXISTS orders_is_international ON orders (is_international);
+    """
+
+    def __init__(self, path: str):
+        """
+        Open, and create if needed, the order database.
+
+        Parameters
+        ----------
+        path : str
+            The path of the database file.
+        """
+        super().__init__(dirname(path))
+        self._path = path
+        self._lock = threading.Lock()  # One statement or transaction at a time
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self._SCHEMA)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def __contains__(self, order_ID: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM orders WHERE ID = ?",
+                                     (order_ID,)).fetchone()
+        return row is not None
+
+
+    ## Methods
+    def put_many(self, items: dict[str, bytes]) -> int:
+        """
+        Insert or update several orders in a single transaction.
+
+        Parameters
+        ----------
+        items : dict[str, bytes]
+            The orders encoded by Codec, by ID.
+
+        Returns
+        -------
+        int
+            The total size of the stored blobs in bytes.
+        """
+        rows = [self._row(data) for data in items.values()]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return sum(map(len, items.values()))
+
+    def get(self, order_ID: str) -> bytes:
+        """
+        Get the stored blob of an order, see Order.from_bytes().
+
+        Parameters
+        ----------
+        order_ID : str
+            The ID of the order.
+
+        Returns
+        -------
+        bytes
+            The stored order.
+
+        Raises
+        ------
+        FileNotFoundError
+            If no order with the specified ID exists.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM orders WHERE ID = ?",
+                                     (order_ID,)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"There's no order with the specifed ID: {order_ID}")
+        return row[0]
+
+    def delete(self, order_ID: str) -> None:
+        """
+        Delete an order, if it is stored.
+
+        Parameters
+        ----------
+        order_ID : str
+            The ID of the order.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM orders WHERE ID = ?", (order_ID,))
+
+    def ids(self) -> list[str]:
+        """
+        Get the IDs of all stored orders.
+
+        Returns
+        -------
+        list[str]
+            The IDs, in no particular order.
+        """
+        return self._ids("SELECT ID FROM orders")
+
+    def ids_by_customer(self, customer_ID: str) -> list[str]:
+        """
+        Get the IDs of all orders paid by a customer.
+
+        Parameters
+        ----------
+        customer_ID : str
+            The ID of the customer.
+
+        Returns
+        -------
+        list[str]
+            The matching order IDs.
+        """
+        return self._ids("SELECT ID FROM orders WHERE payer = ? ORDER BY ID",
+                         customer_ID)
+
+    def ids_by_date(self, start_date: date, end_date: date,
+                    customer_ID: str = None) -> list[str]:
+        """
+        Get the IDs of all orders with their due date within a range.
+
+        Parameters
+        ----------
+        start_date : date
+            The start date of the range (inclusive).
+        end_date : date
+            The end date of the range (inclusive).
+        customer_ID : str, optional
+            Only return the orders paid by this customer.
+
+        Returns
+        -------
+        list[str]
+            The matching order IDs, ordered by due date.
+        """
+        if customer_ID is None:
+            return self._ids("SELECT ID FROM orders WHERE due_date BETWEEN ? AND ? "
+                             "ORDER BY due_date, ID",
+                             start_date.isoformat(), end_date.isoformat())
+        return self._ids("SELECT ID FROM orders WHERE payer = ? "
+                         "AND due_date BETWEEN ? AND ? ORDER BY due_date, ID",
+                         customer_ID, start_date.isoformat(), end_date.isoformat())
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            self._conn.close()
+
+    def _ids(self, query: str, *params) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute(query, params)]
+
+    @staticmethod
+    def _row(data: bytes) -> tuple:
+        """
+        Build the table row of an encoded order. Only the fields of the order
+        itself are decoded, not its package.
+        """
+        order = Order.from_bytes(data)
+        return (order.ID,
+                order.payer,
+                order.due_date.isoformat(),
+                order.status.value,
+                order.service.name,
+                order.bill_ref,
+                int(order.is_international),
+                data)
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+"""
+Created on Sat Oct 17 13:40:05 2026
+
+@author: laisz
+"""
+import re
+from typing import Any
+
+_COORDINATES = re.compile(r"@(-?\d+\.\d+),(-?\d+\.\d+)$")  # Of a destination key
+
+
+class Registry:
+    """
+    Singleton registry that maps the stable keys of locations and vehicles
+    to the live objects.
+
+    Orders and log entries only keep these keys, so pickling an order does
+    not drag along a Repository's inventory or a Vehicle's cargo.
+    Destinations are not kept: they carry nothing but their address and
+    coordinates, so resolve() rebuilds them from the key, and the registry
+    does not grow with every address.
+
+    Keys:
+        "R:<name>"          Repository
+        "D:<address>"       Destination
+        "V:<license plate>" Vehicle
+
+    Methods:
+        register(obj): Register an object and return its key.
+        resolve(key): Get the object registered under a key.
+        generation(prefix): Count the changes to one kind of object.
+        values(prefix): Get the registered objects of one kind.
+    """
+    _instance = None
+
+    def __new__(cls, *args):
+        """
+        Create or return the singleton instance of Registry.
+
+        Returns
+        -------
+        Registry
+            The singleton instance.
+        """
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._objects = {}
+            cls._instance._generations = {}
+        return cls._instance
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._objects
+
+    def register(self, obj: Any) -> str:
+        """
+        Register a location or vehicle under its key. An object registered
+        later under the same key replaces the earlier one. Destinations are
+        only given their key.
+
+        Parameters
+        ----------
+        obj : Location | Vehicle
+            The object to register.
+
+        Returns
+        -------
+        str
+            The key of the object.
+        """
+        key = obj.key
+        if isinstance(key, str) and key.startswith("D:"):
+            return key
+        if self._objects.get(key) is not obj:
+            self._objects[key] = obj
+            self._generations[key[:2]] = self._generations.get(key[:2], 0) + 1
+        return key
+    
+    def generation(self, prefix: str) -> int:
+        """
+        Get the number of times an object was registered under a new key or
+        replaced the one under its key, counted per kind, e.g. to rebuild
+        what was derived from the repositories once they change.
+
+        Parameters
+        ----------
+        prefix : str
+            The prefix of the kind, e.g. "R:".
+
+        Returns
+        -------
+        int
+            The generation of the kind.
+        """
+        return self._generations.get(prefix, 0)
+    
+    def values(self, prefix: str) -> list:
+        """
+        Get the registered objects of one kind.
+
+        Parameters
+        ----------
+        prefix : str
+            The prefix of the kind, e.g. "R:".
+
+        Returns
+        -------
+        list
+            The objects, in the order they were first registered.
+        """
+        return [obj for key, obj in self._objects.items() if key.startswith(prefix)]
+
+    def resolve(self, key: str) -> Any:
+        """
+        Get the object registered under a key.
+
+        Destinations are not kept; a destination key is resolved by
+        rebuilding the Destination from it.
+
+        Parameters
+        ----------
+        key : str
+            The key to resolve.
+
+        Returns
+        -------
+        Location | Vehicle
+            The registered object.
+
+        Raises
+        ------
+        KeyError
+            If nothing is registered under the key.
+        """
+        obj = self._objects.get(key, None)
+        if obj is not None:
+            return obj
+
+        if isinstance(key, str) and key.startswith("D:"):
+            from Location import Destination
+            match = _COORDINATES.search(key)
+            if match is None:
+                return Destination(key[2:])
+            return Destination(key[2:match.start()],
+                               (float(match.group(1)), float(match.group(2))))
+
+        raise KeyError(f"Nothing is registered under the key '{key}'")
+
+
+if __name__ == "__main__":
+    from Location import Repository, Destination
+    from Vehicle import Truck
+
+    repo = Repository("Brooklyn", "Repo0")
+    car = Truck("ABC-1234")
+    print(Registry().resolve(repo.key) is repo)
+    print(Registry().resolve(car.key) is car)
+    print(Registry().resolve(Destination("New York").key))
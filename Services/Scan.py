@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+"""
+Created on Thu Oct 22 09:26:51 2026
+
+@author: laisz
+"""
+import operator, os, sqlite3
+from concurrent.futures import Executor, ProcessPoolExecutor
+from operator import attrgetter
+from typing import Any, Callable, Iterator
+from Order import Order
+from Storage import BACKENDS, StorageBackend, get_backend_name
+
+## Ad-hoc queries that no index answers are run by scanning the stored
+## orders. scan() splits the sorted order IDs into contiguous chunks and
+## hands them to a pool of processes; each one reads and decodes its
+## chunk, applies the predicate and sends back only what matched, so the
+## decoding runs on every core and little data crosses between processes.
+## Predicates and projections are sent to the workers, so they must be
+## picklable, e.g. Where, AllOf, AnyOf, operator.attrgetter or a function
+## defined at the top level of a module.
+_OPERATORS: dict[str, Callable[[Any, Any], bool]] = {
+    '==': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le,
+    '>': operator.gt, '>=': operator.ge,
+    'in': lambda value, options: value in options,
+    'contains': operator.contains,
+}
+_CHUNKS_PER_WORKER = 4  # More chunks than workers, so a slow chunk does not hold up the rest
+_SQLITE_BATCH = 500  # IDs per query, below sqlite's limit of parameters
+
+
+class Where:
+    """
+    A picklable predicate comparing an attribute of an order with a value,
+    e.g. Where('service', '==', Service.express) or
+    Where('package.weight', '>', 20).
+
+    Attributes:
+        attribute (str): The attribute, dotted to reach nested ones.
+        op (str): One of ==, !=, <, <=, >, >=, in and contains.
+        value: The value compared with.
+    """
+    def __init__(self, attribute: str, op: str, value):
+        """
+        Initialize a Where.
+
+        Parameters
+        ----------
+        attribute : str
+            The attribute, dotted to reach nested ones.
+        op : str
+            One of ==, !=, <, <=, >, >=, in and contains.
+        value
+            The value compared with.
+
+        Raises
+        ------
+        ValueError
+            If the operator is unknown.
+        """
+        if op not in _OPERATORS:
+            raise ValueError(f"Unknown operator: {op}")
+
+        self.attribute = attribute
+        self.op = op
+        self.value = value
+
+    def __call__(self, order: Order) -> bool:
+        return _OPERATORS[self.op](attrgetter(self.attribute)(order), self.value)
+
+    def __repr__(self) -> str:
+        return f"Where({self.attribute!r}, {self.op!r}, {self.value!r})"
+
+
+class AllOf:
+    """
+    A picklable predicate matching the orders that match every one of
+    its predicates.
+    """
+    def __init__(self, *predicates: Callable[[Order], bool]):
+        self.predicates = predicates
+
+    def __call__(self, order: Order) -> bool:
+        return all(predicate(order) for predicate in self.predicates)
+
+
+class AnyOf:
+    """
+    A picklable predicate matching the orders that match at least one of
+    its predicates.
+    """
+    def __init__(self, *predicates: Callable[[Order], bool]):
+        self.predicates = predicates
+
+    def __call__(self, order: Order) -> bool:
+        return any(predicate(order) for predicate in self.predicates)
+
+
+## Methods
+def scan(order_IDs: list[str], predicate: Callable[[Order], bool],
+         project: Callable[[Order], Any] = None, source: tuple[str, str] = None,
+         workers: int = None, executor: Executor = None) -> list:
+    """
+    Find the stored orders matching a predicate, decoding them in parallel.
+
+    Parameters
+    ----------
+    order_IDs : list[str]
+        The IDs of the orders to scan.
+    predicate : Callable[[Order], bool]
+        The picklable test applied to each order.
+    project : Callable[[Order], Any], optional
+        The picklable function turning a matching order into the result,
+        e.g. operator.attrgetter('ID', 'fee'). Defaults to the order's ID.
+    source : tuple[str, str], optional
+        Where the orders are stored: ("order_store", path) for an OrderStore,
+        or (backend name, directory) for a StorageBackend, see Storage.
+        Defaults to the backend selected in config.json for orders.
+    workers : int, optional
+        The number of processes. Defaults to the number of CPUs. With one
+        worker, or orders kept in memory, the scan runs in this process.
+    executor : Executor, optional
+        A pool to run the chunks on instead of starting one.
+
+    Returns
+    -------
+    list
+        The projections of the matching orders, in the order of their IDs.
+        Orders deleted since the IDs were listed are skipped.
+    """
+    if source is None:
+        source = (get_backend_name(), Order._storage().directory)
+    order_IDs = sorted(order_IDs)
+    workers = workers or os.cpu_count() or 1
+
+    if not order_IDs or source[0] == 'memory' or (workers == 1 and executor is None):
+        return _scan_chunk(source, order_IDs, predicate, project)
+
+    count = min(len(order_IDs), workers * _CHUNKS_PER_WORKER)
+    size = -(-len(order_IDs) // count)
+    chunks = [order_IDs[start:start + size] for start in range(0, len(order_IDs), size)]
+
+    pool = executor or ProcessPoolExecutor(max_workers=workers)
+    try:
+        results = pool.map(_scan_chunk, [source] * len(chunks), chunks,
+                           [predicate] * len(chunks), [project] * len(chunks))
+        return [item for result in results for item in result]
+    finally:
+        if executor is None:
+            pool.shutdown()
+
+
+def _scan_chunk(source: tuple[str, str], order_IDs: list[str],
+                predicate: Callable[[Order], bool],
+                project: Callable[[Order], Any] = None) -> list:
+    """
+    Scan one chunk of orders. Runs in a worker process.
+    """
+    matched = []
+    for data in _read(source, order_IDs):
+        order = Order.from_bytes(data)
+        if predicate(order):
+            matched.append(order.ID if project is None else project(order))
+    return matched
+
+
+def _read(source: tuple[str, str], order_IDs: list[str]) -> Iterator[bytes]:
+    """
+    Read the stored orders of a chunk over a connection of its own.
+    """
+    kind, location = source
+    if kind == 'order_store':
+        conn = sqlite3.connect(f"file:{location}?mode=ro", uri=True)
+        try:
+            for start in range(0, len(order_IDs), _SQLITE_BATCH):
+                batch = order_IDs[start:start + _SQLITE_BATCH]
+                query = ("SELECT data FROM orders WHERE ID IN (%s) ORDER BY ID"
+                         % ",".join("?" * len(batch)))
+                for (data,) in conn.execute(query, batch):
+                    yield data
+        finally:
+            conn.close()
+        return
+
+    # Memory backends only exist in this process, so use the shared one
+    backend = StorageBackend.of(location) if kind == 'memory' else BACKENDS[kind](location)
+    try:
+        for order_ID in order_IDs:
+            try:
+                yield backend.get(order_ID)
+            except FileNotFoundError:  # Deleted since the IDs were listed
+                continue
+    finally:
+        if kind != 'memory':
+            backend.close()
+
+
+if __name__ == "__main__":
+    from timeit import timeit
+    from OrderHandler import OrdersHandler
+    from Order import Service
+
+    handler = OrdersHandler()
+    express = Where('service', '==', Service.express)
+    for workers in (1, 2, 4, os.cpu_count()):
+        seconds = timeit(lambda: handler.scan(express, workers=workers), number=1)
+        print(f"{workers:>2} workers: {seconds:.3f}s")
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+"""
+Created on Sat Oct 17 17:05:33 2026
+
+@author: laisz
+"""
+import heapq, threading
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from typing import Callable
+
+
+def taipei_now() -> datetime:
+    """
+    Get the current time in the Asia/Taipei timezone.
+    """
+    return datetime.now(ZoneInfo("Asia/Taipei"))
+
+
+class DueScheduler:
+    """
+    A min-heap of order deadlines that reports the orders whose deadline
+    has passed.
+
+    Deadlines are popped in order, so each check only looks at the top of
+    the heap. Cancelled or rescheduled entries stay in the heap and are
+    skipped when they come up.
+
+    Methods:
+        schedule(order_ID, deadline): Watch an order's deadline.
+        cancel(order_ID): Stop watching an order.
+        run_pending(now): Report the orders whose deadline has passed.
+        next_deadline(): Get the earliest deadline being watched.
+        start(): Run run_pending() in a background thread as deadlines pass.
+        stop(): Stop the background thread.
+    """
+    _MAX_WAIT = 60  # seconds between checks, in case the clock jumps
+
+    def __init__(self, on_expire: Callable[[list[str]], None],
+                 clock: Callable[[], datetime] = taipei_now):
+        """
+        Initialize a DueScheduler.
+
+        Parameters
+        ----------
+        on_expire : Callable[[list[str]], None]
+            Called with the IDs of the orders whose deadline has passed.
+        clock : Callable[[], datetime], optional
+            Returns the current time. Defaults to the time in Asia/Taipei.
+        """
+        self._on_expire = on_expire
+        self._clock = clock
+        self._heap: list[tuple[datetime, str]] = []
+        self._deadlines: dict[str, datetime] = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, order_ID: str) -> bool:
+        return order_ID in self._deadlines
+
+
+    ## Methods
+    def schedule(self, order_ID: str, deadline: datetime) -> None:
+        """
+        Watch the deadline of an order, replacing any earlier deadline.
+
+        Parameters
+        ----------
+        order_ID : str
+            The ID of the order.
+        deadline : datetime
+            The timezone-aware moment the order is due.
+
+        Returns
+        -------
+        None
+        """
+        with self._cond:
+            self._deadlines[order_ID] = deadline
+            heapq.heappush(self._heap, (deadline, order_ID))
+            if self._heap[0][1] == order_ID:
+                self._cond.notify()
+
+    def cancel(self, order_ID: str) -> None:
+        """
+        Stop watching an order, e.g. because it was delivered.
+
+        Parameters
+        ----------
+        order_ID : str
+            The ID of the order.
+
+        Returns
+        -------
+        None
+        """
+        with self._cond:
+            self._deadlines.pop(order_ID, None)
+
+    def next_deadline(self) -> datetime | None:
+        """
+        Get the earliest deadline being watched.
+
+        Returns
+        -------
+        datetime | None
+            The earliest deadline, or None if nothing is scheduled.
+        """
+        with self._cond:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def run_pending(self, now: datetime = None) -> list[str]:
+        """
+        Pop every order whose deadline has passed and pass their IDs to
+        on_expire.
+
+        Parameters
+        ----------
+        now : datetime, optional
+            The current time. Defaults to the scheduler's clock.
+
+        Returns
+        -------
+        list[str]
+            The IDs of the expired orders.
+        """
+        if now is None:
+            now = self._clock()
+
+        expired = []
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, order_ID = heapq.heappop(self._heap)
+                if self._deadlines.get(order_ID) == deadline:
+                    del self._deadlines[order_ID]
+                    expired.append(order_ID)
+
+        if expired:
+            self._on_expire(expired)
+        return expired
+
+    def start(self) -> None:
+        """
+        Start a daemon thread that calls run_pending() whenever the next
+        deadline passes.
+
+        Returns
+        -------
+        None
+        """
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, daemon=True,
+                                            name="DueScheduler")
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background thread and wait for it to finish.
+
+        Returns
+        -------
+        None
+        """
+        with self._cond:
+            thread, self._thread = self._thread, None
+            self._stopped = True
+            self._cond.notify()
+        if thread is not None:
+            thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                deadline = self._heap[0][0] if self._heap else None
+                wait = self._MAX_WAIT
+                if deadline is not None:
+                    wait = min(wait, (deadline - self._clock()).total_seconds())
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+            self.run_pending()
+
+    def _drop_stale(self) -> None:
+        """
+        Pop cancelled or rescheduled entries off the top of the heap.
+        """
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+
+if __name__ == "__main__":
+    from datetime import timedelta
+
+    scheduler = DueScheduler(lambda order_IDs: print("expired:", order_IDs))
+    scheduler.schedule("O0000000000001", taipei_now() + timedelta(seconds=1))
+    scheduler.schedule("O0000000000002", taipei_now() - timedelta(days=1))
+    scheduler.run_pending()
+    scheduler.start()
+    threading.Event().wait(1.5)
+    scheduler.stop()
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+"""
+Created on Mon Oct 19 10:02:47 2026
+
+@author: laisz
+"""
+import os, re
+from concurrent.futures import ThreadPoolExecutor
+from os.path import getmtime, isdir, isfile, join
+from typing import Iterator
+
+## Data files, e.g. orders, customers and staff, are spread over shard
+## directories named by the last digits of their IDs:
+##   <directory>/<last 3 digits>/<ID>.pkl
+## IDs are numbered sequentially, so the shards fill up evenly. Files left
+## in the flat layout of older versions are still found, and migrate()
+## moves them into their shards.
+SHARD_DIGITS = 3
+_DATA_FILE = re.compile(r"([A-Z]\d+)\.(pkl|evt|txt)")
+_SHARD_DIR = re.compile(r"\d{%d}" % SHARD_DIGITS)
+_made: set[str] = set()  # Shard directories known to exist
+
+
+def shard_of(ID: str) -> str:
+    """
+    Get the name of the shard directory of an ID.
+
+    Parameters
+    ----------
+    ID : str
+        The ID, e.g. "O0000000000123".
+
+    Returns
+    -------
+    str
+        The last digits of the ID, e.g. "123".
+    """
+    return ID[-SHARD_DIGITS:]
+
+
+def path_of(directory: str, ID: str, suffix: str = ".pkl") -> str:
+    """
+    Get the path of a data file in the sharded layout, creating its shard
+    directory if needed, e.g. to write the file.
+
+    Parameters
+    ----------
+    directory : str
+        The data directory.
+    ID : str
+        The ID of the object stored in the file.
+    suffix : str, optional
+        The file extension.
+
+    Returns
+    -------
+    str
+        The path of the file.
+    """
+    shard = join(directory, shard_of(ID))
+    if shard not in _made:
+        os.makedirs(shard, exist_ok=True)
+        _made.add(shard)
+    return join(shard, ID + suffix)
+
+
+def locate(directory: str, ID: str, suffix: str = ".pkl") -> str | None:
+    """
+    Find the data file of an ID, in its shard or in the flat layout of
+    older versions.
+
+    Parameters
+    ----------
+    directory : str
+        The data directory.
+    ID : str
+        The ID of the object stored in the file.
+    suffix : str, optional
+        The file extension.
+
+    Returns
+    -------
+    str | None
+        The path of the file, or None if there is none.
+    """
+    for path in (join(directory, shard_of(ID), ID + suffix), join(directory, ID + suffix)):
+        if isfile(path):
+            return path
+    return None
+
+
+def remove(directory: str, ID: str, suffix: str = ".pkl") -> None:
+    """
+    Delete the data file of an ID in both layouts, if it exists.
+
+    Parameters
+    ----------
+    directory : str
+        The data directory.
+    ID : str
+        The ID of the object stored in the file.
+    suffix : str, optional
+        The file extension.
+
+    Returns
+    -------
+    None
+    """
+    for path in (join(directory, shard_of(ID), ID + suffix), join(directory, ID + suffix)):
+        if isfile(path):
+            os.remove(path)
+
+
+def iter_names(directory: str) -> Iterator[str]:
+    """
+    Iterate over the names of the data files in a directory, in both
+    layouts. A file present in both is listed twice.
+
+    Parameters
+    ----------
+    directory : str
+        The data directory.
+
+    Returns
+    -------
+    Iterator[str]
+        The file names, e.g. "O0000000000123.pkl".
+    """
+    if not isdir(directory):
+        return
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir() and _SHARD_DIR.fullmatch(entry.name):
+                with os.scandir(entry.path) as shard:
+                    for item in shard:
+                        yield item.name
+            elif _DATA_FILE.fullmatch(entry.name):
+                yield entry.name
+
+
+def migrate(directory: str, workers: int = 8) -> int:
+    """
+    Move the data files left in the flat layout into their shards.
+
+    Each shard is filled by a worker thread, and each file is moved with
+    a single rename, so an interrupted migration leaves every file in one
+    of the two layouts, where it is still found. Running the migration
+    again resumes it. If a file exists in both layouts, the newer one is
+    kept.
+
+    Parameters
+    ----------
+    directory : str
+        The data directory.
+    workers : int, optional
+        The number of worker threads.
+
+    Returns
+    -------
+    int
+        The number of files moved.
+    """
+    shards: dict[str, list[str]] = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            match = _DATA_FILE.fullmatch(entry.name)
+            if match is not None and entry.is_file():
+                shards.setdefault(shard_of(match.group(1)), []).append(entry.name)
+
+    def move(shard: str, names: list[str]) -> int:
+        os.makedirs(join(directory, shard), exist_ok=True)
+        for name in names:
+            source, target = join(directory, name), join(directory, shard, name)
+            if isfile(target) and getmtime(target) >= getmtime(source):
+                os.remove(source)  # Moved before, then written again by an old version
+            else:
+                os.replace(source, target)
+        return len(names)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(lambda item: move(*item), shards.items()))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Move flat data files into shard directories.")
+    parser.add_argument("directories", nargs="*",
+                        help="data directories (default: the order, event, customer and staff ones)")
+    parser.add_argument("--workers", type=int, default=8, help="number of worker threads")
+    args = parser.parse_args()
+
+    directories = args.directories
+    if not directories:
+        import Order, Customer, Staff
+        directories = [Order.get_dir(), join(Order.get_dir(), "events"),
+                       Customer.get_dir(), Staff.get_dir()]
+
+    for directory in directories:
+        if isdir(directory):
+            print(f"{directory}: {migrate(directory, args.workers)} files moved")
@@ -8,14 +8,18 @@ Created on Sat Dec 27 10:45:00 2025
 from platformdirs import user_data_dir
 import json, pickle
 import os
-from os import listdir, remove
-from os.path import isfile, join
+from os.path import join
 from OrderHandler import OrdersHandler
+from Analytics import OrderTable
+from IDAllocator import IDAllocator
+from Storage import StorageBackend
 from Order import Order
 from Vehicle import Vehicle, Minivan, MiniTruck, Truck
 from Location import Location, Repository, Destination
 from Entry import Entry, Arrival, Transit, OtherEvent
 from datetime import date
+from itertools import islice
+from typing import Iterator
 
 def get_dir() -> str:
     """
@@ -31,6 +35,39 @@ def get_dir() -> str:
         
     return user_data_dir(config['app_name'], config['project_name']) + config['staff_suffix']
 
+def page(orders: Iterator[Order], limit: int) -> tuple[list[Order], str | None]:
+    """
+    Take one page of orders from an iterator of OrdersHandler, e.g.
+    iter_by_customer(), which yields them in the order of their IDs.
+
+    Parameters
+    ----------
+    orders : Iterator[Order]
+        The orders, starting after the cursor of the previous page.
+    limit : int
+        The maximum number of orders on the page.
+
+    Returns
+    -------
+    tuple[list[Order], str | None]
+        The orders on the page, and the cursor to pass for the next page,
+        or None if this is the last one.
+    """
+    if limit < 1:
+        raise ValueError(f"limit must be positive, got {limit}")
+    
+    orders = list(islice(orders, limit + 1))  # One more tells if there is a next page
+    if len(orders) <= limit:
+        return orders, None
+    return orders[:limit], orders[limit - 1].ID
+
+def _page(query: str, *args, limit: int, cursor: str | None) -> tuple[list[Order], str | None]:
+    """
+    Take one page of the orders yielded by OrdersHandler().iter_<query>(),
+    starting after a cursor, see page().
+    """
+    return page(getattr(OrdersHandler(), "iter_" + query)(*args, after=cursor), limit)
+
 class Staff:
     """
     Represents a staff member in the package delivery system.
@@ -50,10 +87,6 @@ class Staff:
     """
     ## Class attribute
     __DATA_PATH = get_dir()
-    try:
-        _cnt = len([f for f in listdir(__DATA_PATH) if f.endswith('.pkl')])
-    except FileNotFoundError:
-        _cnt = 0
     
     def __init__(self, first_name: str, last_name: str, position: str, password: str):
         """
@@ -70,21 +103,12 @@ class Staff:
         password : str
             The staff's password.
         """
-        self._ID = f"S{self._cnt:05d}"
+        self._ID = f"S{IDAllocator.of(self.__DATA_PATH, 'S').next():05d}"
         self._first_name = first_name
         self._last_name = last_name
         self._position = position
         self._password = password
         
-        # Check if ID already exists (unlikely with auto-increment but good for safety)
-        if isfile(join(self.__DATA_PATH, f"{self.ID}.pkl")):
-             # If collision (e.g. deleted files), verify next available
-             while isfile(join(self.__DATA_PATH, f"S{self._cnt:05d}.pkl")):
-                 self.__class__._cnt += 1
-             self._ID = f"S{self._cnt:05d}"
-
-        self.__class__._cnt += 1
-        
     @property
     def ID(self) -> str:
         return self._ID
@@ -129,15 +153,10 @@ class Staff:
         
     def save(self) -> None:
         """
-        Save the Staff object's field as a pkl file in local directory.
+        Save the Staff object's field to the storage backend selected in
+        config.json.
         """
-        # Ensure directory exists
-        import os
-        if not os.path.exists(self.__DATA_PATH):
-            os.makedirs(self.__DATA_PATH)
-            
-        with open(join(self.__DATA_PATH, f"{self.ID}.pkl"), 'wb') as file:
-            pickle.dump(self, file, protocol=4)
+        StorageBackend.of(self.__DATA_PATH).put(self.ID, pickle.dumps(self, protocol=4))
         return
     
     def __str__(self) -> str:
@@ -148,7 +167,7 @@ class Staff:
     @classmethod
     def from_ID(cls, ID: str) -> Staff:
         """
-        Factory method to reconstruct the staff instance base on <ID>.pkl.
+        Factory method to reconstruct the staff instance stored under its ID.
         
         Parameters
         ----------
@@ -160,14 +179,12 @@ class Staff:
         Staff
             The loaded Staff instance.
         """
-        file_path = join(cls.__DATA_PATH , f"{ID}.pkl")
-        if not isfile(file_path):
-            raise FileNotFoundError("The Staff with the provided ID does not exist!")
-            
-        with open(file_path, 'rb') as file:
-            instance = pickle.load(file)
+        try:
+            data = StorageBackend.of(cls.__DATA_PATH).get(ID)
+        except FileNotFoundError:
+            raise FileNotFoundError("The Staff with the provided ID does not exist!") from None
         
-        return instance
+        return pickle.loads(data)
     
     @classmethod
     def delete(cls, ID: str) -> None:
@@ -179,9 +196,7 @@ class Staff:
         ID : str
             The ID of the staff to delete.
         """
-        file_path = join(cls.__DATA_PATH , f"{ID}.pkl")
-        if isfile(file_path):
-            remove(file_path)
+        StorageBackend.of(cls.__DATA_PATH).delete(ID)
 
 class RepoStaff(Staff):
     def __init__(self, first_name: str, last_name: str, position: str, password: str, repository: Repository):
@@ -235,6 +250,17 @@ class CSStaff(Staff):
     def filter_delayed(self) -> list[Order]:
         return OrdersHandler().filter_delayed()
 
+    def page_by_customer(self, customer_ID: str, limit: int = 50,
+                         cursor: str = None) -> tuple[list[Order], str | None]:
+        return _page('by_customer', customer_ID, limit=limit, cursor=cursor)
+
+    def page_by_date(self, start_date: date, end_date: date, limit: int = 50,
+                     cursor: str = None) -> tuple[list[Order], str | None]:
+        return _page('by_date', start_date, end_date, limit=limit, cursor=cursor)
+
+    def page_delayed(self, limit: int = 50, cursor: str = None) -> tuple[list[Order], str | None]:
+        return _page('delayed', limit=limit, cursor=cursor)
+
 class Management(Staff):
     def filter_by_customer(self, customer_ID: str) -> list[Order]:
         return OrdersHandler().filter_by_customer(customer_ID)
@@ -251,6 +277,28 @@ class Management(Staff):
     def filter_delayed(self) -> list[Order]:
         return OrdersHandler().filter_delayed()
 
+    def page_by_customer(self, customer_ID: str, limit: int = 50,
+                         cursor: str = None) -> tuple[list[Order], str | None]:
+        return _page('by_customer', customer_ID, limit=limit, cursor=cursor)
+
+    def page_by_date(self, start_date: date, end_date: date, limit: int = 50,
+                     cursor: str = None) -> tuple[list[Order], str | None]:
+        return _page('by_date', start_date, end_date, limit=limit, cursor=cursor)
+
+    def page_by_vehicle(self, vehicle: Vehicle, limit: int = 50,
+                        cursor: str = None) -> tuple[list[Order], str | None]:
+        return _page('by_vehicle', vehicle, limit=limit, cursor=cursor)
+
+    def page_by_repo(self, repository: Repository, limit: int = 50,
+                     cursor: str = None) -> tuple[list[Order], str | None]:
+        return _page('by_repo', repository, limit=limit, cursor=cursor)
+
+    def page_delayed(self, limit: int = 50, cursor: str = None) -> tuple[list[Order], str | None]:
+        return _page('delayed', limit=limit, cursor=cursor)
+
+    def analytics(self) -> OrderTable:
+        return OrdersHandler().analytics()
+
     def add_vehicle(self, type: str, license_plate: str) -> Vehicle:
         type_lower = type.lower()
         if "truck" in type_lower and "mini" in type_lower:
@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+"""
+Created on Mon Oct 19 15:37:12 2026
+
+@author: laisz
+"""
+import json, os, sqlite3, threading
+from abc import ABC, abstractmethod
+from os.path import join, normpath
+import Shards
+
+
+def get_backend_name() -> str:
+    """
+    Get the storage backend selected by 'storage_backend' in config.json.
+
+    Returns
+    -------
+    str
+        "file", "sqlite" or "memory".
+    """
+    with open('config.json', 'r', encoding='utf-8') as file:
+        config = json.load(file)
+
+    return config.get('storage_backend', 'file')
+
+
+class StorageBackend(ABC):
+    """
+    Keeps the serialized orders, customers or staff of one data directory,
+    keyed by ID. Entities serialize themselves and hand the bytes over, so
+    every backend stores the same data.
+
+    Methods:
+        of(directory): Get the configured backend of a data directory.
+        use(backend): Make a backend the one of its data directory.
+        get(ID): Get the data stored under an ID.
+        put(ID, data): Store data under an ID.
+        put_many(items): Store several items at once.
+        delete(ID): Delete the data stored under an ID.
+        ids(): Get all stored IDs.
+        close(): Release the resources of the backend.
+    """
+    _instances: dict[str, StorageBackend] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, directory: str):
+        """
+        Initialize a StorageBackend.
+
+        Parameters
+        ----------
+        directory : str
+            The data directory.
+        """
+        self._directory = directory
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @abstractmethod
+    def __contains__(self, ID: str) -> bool:
+        pass
+
+
+    ## Methods
+    @classmethod
+    def of(cls, directory: str) -> StorageBackend:
+        """
+        Get the backend of a data directory, opening the one selected in
+        config.json on first use.
+
+        Parameters
+        ----------
+        directory : str
+            The data directory.
+
+        Returns
+        -------
+        StorageBackend
+            The backend shared within this process.
+
+        Raises
+        ------
+        ValueError
+            If config.json names an unknown backend.
+        """
+        key = normpath(directory)  # With or without a trailing separator
+        with cls._instances_lock:
+            if key not in cls._instances:
+                name = get_backend_name()
+                if name not in BACKENDS:
+                    raise ValueError(f"Unknown storage backend: {name}")
+                cls._instances[key] = BACKENDS[name](directory)
+            return cls._instances[key]
+
+    @classmethod
+    def use(cls, backend: StorageBackend) -> None:
+        """
+        Make a backend the one of() returns for its data directory, e.g. an
+        OrderStore for the orders, so IDs are allocated after the ones it
+        holds and entities are loaded from it.
+
+        Parameters
+        ----------
+        backend : StorageBackend
+            The backend to use.
+
+        Returns
+        -------
+        None
+        """
+        with cls._instances_lock:
+            cls._instances[normpath(backend.directory)] = backend
+
+    @abstractmethod
+    def get(self, ID: str) -> bytes:
+        """
+        Get the data stored under an ID.
+
+        Parameters
+        ----------
+        ID : str
+            The ID of the object.
+
+        Returns
+        -------
+        bytes
+            The stored data.
+
+        Raises
+        ------
+        FileNotFoundError
+            If nothing is stored under the ID.
+        """
+        pass
+
+    def put(self, ID: str, data: bytes) -> int:
+        """
+        Store data under an ID, replacing what was stored before.
+
+        Parameters
+        ----------
+        ID : str
+            The ID of the object.
+        data : bytes
+            The serialized object.
+
+        Returns
+        -------
+        int
+            The number of bytes written.
+        """
+        return self.put_many({ID: data})
+
+    @abstractmethod
+    def put_many(self, items: dict[str, bytes]) -> int:
+        """
+        Store several items, and make them durable together.
+
+        Parameters
+        ----------
+        items : dict[str, bytes]
+            The serialized objects by ID.
+
+        Returns
+        -------
+        int
+            The number of bytes written.
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, ID: str) -> None:
+        """
+        Delete the data stored under an ID, if there is any.
+
+        Parameters
+        ----------
+        ID : str
+            The ID of the object.
+
+        Returns
+        -------
+        None
+        """
+        pass
+
+    @abstractmethod
+    def ids(self) -> list[str]:
+        """
+        Get all stored IDs.
+
+        Returns
+        -------
+        list[str]
+            The IDs, in no particular order.
+        """
+        pass
+
+    def close(self) -> None:
+        """
+        Release the resources of the backend.
+        """
+        pass
+
+
+class MemoryBackend(StorageBackend):
+    """
+    Keeps the data in a dict, for tests and benchmarks. Nothing survives
+    the process.
+    """
+    def __init__(self, directory: str):
+        super().__init__(directory)
+        self._lock = threading.Lock()
+        self._items: dict[str, bytes] = {}
+
+    def __contains__(self, ID: str) -> bool:
+        return ID in self._items
+
+    def get(self, ID: str) -> bytes:
+        try:
+            return self._items[ID]
+        except KeyError:
+            raise FileNotFoundError(f"Nothing is stored under ID {ID}") from None
+
+    def put_many(self, items: dict[str, bytes]) -> int:
+        with self._lock:
+            self._items.update(items)
+        return sum(map(len, items.values()))
+
+    def delete(self, ID: str) -> None:
+        with self._lock:
+            self._items.pop(ID, None)
+
+    def ids(self) -> list[str]:
+        with self._lock:
+            return list(self._items)
+
+
+class FileBackend(StorageBackend):
+    """
+    Keeps one <ID>.pkl file per object in shard directories, see Shards.
+    Files left in the flat layout of older versions are still read.
+
+    The files of put_many() are written aside first and fsynced together,
+    so the disk is not flushed once per file, and then renamed into place,
+    so readers never see a partly written file.
+    """
+    def __contains__(self, ID: str) -> bool:
+        return Shards.locate(self._directory, ID) is not None
+
+    def get(self, ID: str) -> bytes:
+        path = Shards.locate(self._directory, ID)
+        if path is None:
+            raise FileNotFoundError(f"Nothing is stored under ID {ID}")
+        with open(path, 'rb') as file:
+            return file.read()
+
+    def put_many(self, items: dict[str, bytes]) -> int:
+        written = 0
+        files = []
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            for ID, data in items.items():
+                file = open(Shards.path_of(self._directory, ID) + suffix, 'wb')
+                files.append(file)
+                file.write(data)
+                file.flush()
+                written += len(data)
+
+            for file in files:
+                os.fsync(file.fileno())
+        finally:
+            for file in files:
+                file.close()
+
+        for file in files:
+            os.replace(file.name, file.name[:-len(suffix)])
+        return written
+
+    def delete(self, ID: str) -> None:
+        Shards.remove(self._directory, ID)
+
+    def ids(self) -> list[str]:
+        return list(dict.fromkeys(name[:-len(".pkl")] for name in Shards.iter_names(self._directory)
+                                  if name.endswith(".pkl")))
+
+
+class SqliteBackend(StorageBackend):
+    """
+    Keeps the data in a table of objects.sqlite3 in the data directory.
+    put_many() writes its items in a single transaction.
+    """
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS objects (
+            ID   TEXT PRIMARY KEY,
+            data BLOB NOT NULL
+        );
+    """
+
+    def __init__(self, directory: str):
+        super().__init__(directory)
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(join(directory, "objects.sqlite3"),
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self._SCHEMA)
+
+    def __contains__(self, ID: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM objects WHERE ID = ?", (ID,)).fetchone()
+        return row is not None
+
+    def get(self, ID: str) -> bytes:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM objects WHERE ID = ?", (ID,)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"Nothing is stored under ID {ID}")
+        return row[0]
+
+    def put_many(self, items: dict[str, bytes]) -> int:
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO objects VALUES (?, ?)",
+                                   items.items())
+        return sum(map(len, items.values()))
+
+    def delete(self, ID: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM objects WHERE ID = ?", (ID,))
+
+    def ids(self) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT ID FROM objects")]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+BACKENDS: dict[str, type[StorageBackend]] = {'memory': MemoryBackend,
+                                             'file': FileBackend,
+                                             'sqlite': SqliteBackend}
+
+
+if __name__ == "__main__":
+    import tempfile
+    from timeit import timeit
+
+    # Benchmark the backends against each other with order-sized blobs
+    items = {f"O{n:013d}": os.urandom(400) for n in range(2000)}
+    for name, backend_type in BACKENDS.items():
+        with tempfile.TemporaryDirectory() as folder:
+            backend = backend_type(folder)
+            batch_time = timeit(lambda: backend.put_many(items), number=1)
+            single_time = timeit(lambda: [backend.put(ID, data)
+                                          for ID, data in list(items.items())[:200]], number=1)
+            get_time = timeit(lambda: [backend.get(ID) for ID in items], number=1)
+            print(f"{name:>6}: put_many {len(items) / batch_time:9.0f}/s, "
+                  f"put {200 / single_time:9.0f}/s, get {len(items) / get_time:9.0f}/s")
+            backend.close()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+"""
+Created on Tue Oct 20 09:41:05 2026
+
+@author: laisz
+"""
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class StripedLock:
+    """
+    A fixed set of re-entrant locks shared by many keys, e.g. order IDs.
+
+    Each key always maps to the same lock, so changes to one key are
+    serialized, while changes to keys on different stripes run in
+    parallel. Two keys may share a stripe, so a thread must not hold the
+    lock of one key while waiting for the lock of another.
+
+    Attributes:
+        stripes (int): The number of locks.
+
+    Methods:
+        of(key): Get the lock of a key.
+        hold_all(): Hold every lock for the duration of a with-block.
+    """
+    def __init__(self, stripes: int = 64):
+        """
+        Initialize a StripedLock.
+
+        Parameters
+        ----------
+        stripes : int, optional
+            The number of locks.
+        """
+        if stripes < 1:
+            raise ValueError(f"stripes must be positive, got {stripes}")
+
+        self._locks = [threading.RLock() for _ in range(stripes)]
+
+    @property
+    def stripes(self) -> int:
+        return len(self._locks)
+
+
+    ## Methods
+    def of(self, key: str) -> threading.RLock:
+        """
+        Get the lock of a key.
+
+        Parameters
+        ----------
+        key : str
+            The key, e.g. an order ID.
+
+        Returns
+        -------
+        threading.RLock
+            The lock of the key's stripe.
+        """
+        # crc32 rather than hash(), so keys map to the same stripe in
+        # every run and sequential IDs spread evenly
+        return self._locks[zlib.crc32(key.encode('utf-8')) % len(self._locks)]
+
+    @contextmanager
+    def hold_all(self) -> Iterator[None]:
+        """
+        Hold every lock for the duration of a with-block, e.g. to wait until
+        no key is halfway through a change. The locks are taken in a fixed
+        order by a thread holding none of them.
+
+        Returns
+        -------
+        Iterator[None]
+        """
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+
+if __name__ == "__main__":
+    locks = StripedLock(8)
+    with locks.of("O0000000000001"):
+        with locks.of("O0000000000001"):  # Re-entrant
+            print(locks.of("O0000000000001") is locks.of("O0000000000001"))
@@ -0,0 +1,484 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+"""
+Created on Sun Oct 25 09:41:27 2026
+
+@author: laisz
+"""
+import json, os, threading
+import numpy as np
+from bisect import bisect_left
+
+## Prices are read from a versioned tariff file (the 'tariff_file' of
+## config.json, tariff.json by default) instead of being written in code:
+##   {"version": 2,
+##    "services": {"over_night": 2.5, "express": 1.8, ...},
+##    "size_classes": [{"class": "envelope", "up_to": 60, "fee": 60}, ...,
+##                     {"class": "oversize", "up_to": null, "fee": 900}],
+##    "weight_classes": [{"class": "extra_light", "up_to": 0.5, "fee": 60}, ...],
+##    "surcharges": {"dangerous": 500, "fragile": 100}}
+## Every Service, SizeClass and WeightClass must be priced, classes in the
+## order of their enum; the last class of each takes everything beyond
+## the others, so it has no limit. A file is compiled once into tuples
+## indexed by code, so pricing an order only reads them, and a reload
+## swaps the compiled table in a single assignment.
+
+
+def get_tariff_path() -> str:
+    """
+    Get the tariff file selected by 'tariff_file' in config.json.
+
+    Returns
+    -------
+    str
+        The path of the tariff file.
+    """
+    with open('config.json', 'r', encoding='utf-8') as file:
+        config = json.load(file)
+
+    return config.get('tariff_file', 'tariff.json')
+
+
+class Tariff:
+    """
+    A compiled tariff. It is never changed once built, so it can be read
+    by any thread while a newer one is being installed.
+
+    Attributes:
+        version (int): The version of the tariff file.
+        rates (tuple[float]): The rate of each service, by position in Service.
+        size_limits (tuple[float]): The upper limit (inclusive) of each SizeClass
+            but the last.
+        size_fees (tuple[float]): The fee of each SizeClass.
+        weight_limits (tuple[float]): The upper limit (inclusive) of each
+            WeightClass but the last.
+        weight_fees (tuple[float]): The fee of each WeightClass.
+        dangerous (float): The surcharge for dangerous goods.
+        fragile (float): The surcharge for fragile packages.
+        arrays (dict[str, np.ndarray]): The same tables as arrays, for Quote.
+
+    Methods:
+        from_dict(definition): Class method to compile a tariff definition.
+        from_file(path): Class method to compile a tariff file.
+        builtin(): Class method to get the tariff of the enum values.
+        size_code(size): Get the position of a size's class.
+        weight_code(weight): Get the position of a weight's class.
+        price(service_code, size_code, weight_code, dangerous, fragile,
+              distance_factor): Price a package by its class codes.
+        fee(service_code, size, weight, dangerous, fragile, distance_factor):
+            Price a package by its size and weight.
+    """
+    __slots__ = ('version', 'rates', 'size_limits', 'size_fees', 'weight_limits',
+                 'weight_fees', 'dangerous', 'fragile', 'arrays')
+
+    def __init__(self, version: int, rates: tuple, size_limits: tuple, size_fees: tuple,
+                 weight_limits: tuple, weight_fees: tuple, dangerous: float, fragile: float):
+        """
+        Initialize a Tariff from tables that are already checked.
+        """
+        self.version = version
+        self.rates = rates
+        self.size_limits = size_limits
+        self.size_fees = size_fees
+        self.weight_limits = weight_limits
+        self.weight_fees = weight_fees
+        self.dangerous = dangerous
+        self.fragile = fragile
+        self.arrays = {'rates': np.array(rates, dtype=np.float64),
+                       'size_limits': np.array(size_limits, dtype=np.float64),
+                       'size_fees': np.array(size_fees, dtype=np.float64),
+                       'weight_limits': np.array(weight_limits, dtype=np.float64),
+                       'weight_fees': np.array(weight_fees, dtype=np.float64)}
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Tariff):
+            return NotImplemented
+        return self._tables() == other._tables()
+
+    def __hash__(self) -> int:
+        return hash(self._tables())
+
+    def __repr__(self) -> str:
+        return f"Tariff(version={self.version})"
+
+
+    ## Methods
+    @classmethod
+    def from_dict(cls, definition: dict) -> Tariff:
+        """
+        Compile a tariff definition, as read from a tariff file.
+
+        Parameters
+        ----------
+        definition : dict
+            The tariff, laid out as described at the top of this module.
+
+        Returns
+        -------
+        Tariff
+
+        Raises
+        ------
+        ValueError
+            If a service or class is missing, unknown or out of order, or
+            the limits do not increase.
+        """
+        from Order import Service, SizeClass, WeightClass
+
+        try:
+            version = definition['version']
+            services = definition['services']
+            sizes = definition['size_classes']
+            weights = definition['weight_classes']
+            surcharges = definition['surcharges']
+        except KeyError as error:
+            raise ValueError(f"The tariff has no {error.args[0]}") from None
+        if not isinstance(version, int) or isinstance(version, bool) or version < 0:
+            raise ValueError(f"The tariff version must be an integer >= 0, not {version!r}")
+        if set(services) != {service.name for service in Service}:
+            raise ValueError(f"The tariff must price exactly the services {[s.name for s in Service]}")
+
+        return cls(version, tuple(services[service.name] for service in Service),
+                   *cls._classes(sizes, SizeClass), *cls._classes(weights, WeightClass),
+                   surcharges.get('dangerous', 0), surcharges.get('fragile', 0))
+
+    @classmethod
+    def from_file(cls, path: str) -> Tariff:
+        """
+        Compile a tariff file.
+
+        Parameters
+        ----------
+        path : str
+            The path of the tariff file.
+
+        Returns
+        -------
+        Tariff
+        """
+        with open(path, 'r', encoding='utf-8') as file:
+            return cls.from_dict(json.load(file))
+
+    @classmethod
+    def builtin(cls) -> Tariff:
+        """
+        Get the tariff given by the values of Service, SizeClass and
+        WeightClass, used when there is no tariff file. Its version is 0.
+
+        Returns
+        -------
+        Tariff
+        """
+        from Order import Service, SIZE_CLASSES, WEIGHT_CLASSES
+
+        return cls.from_dict({
+            'version': 0,
+            'services': {service.name: service.value for service in Service},
+            'size_classes': [{'class': size.name, 'up_to': limit, 'fee': size.value}
+                             for size, limit in zip(SIZE_CLASSES, (60, 90, 120, 150, None))],
+            'weight_classes': [{'class': weight.name, 'up_to': limit, 'fee': weight.value}
+                               for weight, limit in zip(WEIGHT_CLASSES, (0.5, 5, 15, 30, None))],
+            'surcharges': {'dangerous': 500, 'fragile': 100}})
+
+    def size_code(self, size: float) -> int:
+        """
+        Get the position of the SizeClass a size falls in.
+
+        Parameters
+        ----------
+        size : float
+            The sum of the package's dimensions in cm.
+
+        Returns
+        -------
+        int
+            The position of the class.
+        """
+        return bisect_left(self.size_limits, size)
+
+    def weight_code(self, weight: float) -> int:
+        """
+        Get the position of the WeightClass a weight falls in.
+
+        Parameters
+        ----------
+        weight : float
+            The weight of the package in kg.
+
+        Returns
+        -------
+        int
+            The position of the class.
+        """
+        return bisect_left(self.weight_limits, weight)
+
+    def price(self, service_code: int, size_code: int, weight_code: int, dangerous: bool,
+              fragile: bool, distance_factor: float = 1.0) -> float:
+        """
+        Price a package by its class codes. Only the compiled tables are
+        read, so no containers are built however often it is called.
+
+        Parameters
+        ----------
+        service_code : int
+            The position of the service in Service.
+        size_code : int
+            The position of the package's SizeClass, see size_code().
+        weight_code : int
+            The position of the package's WeightClass, see weight_code().
+        dangerous : bool
+            Whether the package holds dangerous goods.
+        fragile : bool
+            Whether the package is fragile.
+        distance_factor : float, optional
+            The distance factor, see Distance.factor().
+
+        Returns
+        -------
+        float
+            The fee, summed in the order of Order.calc_fee().
+        """
+        return (self.rates[service_code] * distance_factor
+                + max(self.size_fees[size_code], self.weight_fees[weight_code])
+                + int(dangerous) * self.dangerous
+                + int(fragile) * self.fragile)
+
+    def fee(self, service_code: int, size: float, weight: float, dangerous: bool,
+            fragile: bool, distance_factor: float = 1.0) -> float:
+        """
+        Price a package by its size and weight, see price().
+
+        Parameters
+        ----------
+        service_code : int
+            The position of the service in Service.
+        size : float
+            The sum of the package's dimensions in cm.
+        weight : float
+            The weight of the package in kg.
+        dangerous : bool
+            Whether the package holds dangerous goods.
+        fragile : bool
+            Whether the package is fragile.
+        distance_factor : float, optional
+            The distance factor, see Distance.factor().
+
+        Returns
+        -------
+        float
+            The fee.
+        """
+        return self.price(service_code, bisect_left(self.size_limits, size),
+                          bisect_left(self.weight_limits, weight), dangerous, fragile,
+                          distance_factor)
+
+    def _tables(self) -> tuple:
+        return (self.version, self.rates, self.size_limits, self.size_fees,
+                self.weight_limits, self.weight_fees, self.dangerous, self.fragile)
+
+    @staticmethod
+    def _classes(classes: list[dict], members) -> tuple[tuple, tuple]:
+        """
+        Check the classes of a tariff against their enum, and split them
+        into the limits of all but the last class, and fees.
+        """
+        names = [entry.get('class') for entry in classes]
+        if names != [member.name for member in members]:
+            raise ValueError(f"The tariff must list the classes {[m.name for m in members]} "
+                             f"in order, not {names}")
+        if classes[-1]['up_to'] is not None:
+            raise ValueError(f"The last class of {members.__name__} must have no limit")
+        limits = tuple(entry['up_to'] for entry in classes[:-1])
+        if None in limits or any(lower >= upper for lower, upper in zip(limits, limits[1:])):
+            raise ValueError(f"The limits of {members.__name__} must increase: {limits}")
+        return limits, tuple(entry['fee'] for entry in classes)
+
+
+## The tariff in use, with the (path, mtime, size) of the file it was read from
+_current: Tariff = None
+_stamp: tuple = None
+_lock = threading.Lock()
+
+
+def current() -> Tariff:
+    """
+    Get the tariff in use, reading the tariff file the first time.
+
+    Returns
+    -------
+    Tariff
+    """
+    tariff = _current
+    if tariff is None:
+        tariff = reload()
+    return tariff
+
+
+def install(tariff: Tariff) -> Tariff:
+    """
+    Put a tariff in use. Fees computed from then on are priced by it.
+
+    Parameters
+    ----------
+    tariff : Tariff
+        The compiled tariff.
+
+    Returns
+    -------
+    Tariff
+        The tariff that was in use before, or None.
+
+    Raises
+    ------
+    ValueError
+        If it has the version of the tariff in use but other prices, which
+        would leave the version orders record ambiguous.
+    """
+    global _current
+    with _lock:
+        previous = _current
+        if previous is not None and previous.version == tariff.version and previous != tariff:
+            raise ValueError(f"Tariff version {tariff.version} is already in use with "
+                             "other prices; raise the version")
+        _current = tariff  # A single assignment, so readers see either table
+        return previous
+
+
+def reload(path: str = None) -> Tariff:
+    """
+    Compile the tariff file and put it in use. The built-in tariff is used
+    if there is no tariff file.
+
+    Parameters
+    ----------
+    path : str, optional
+        The tariff file. Defaults to the one selected in config.json.
+
+    Returns
+    -------
+    Tariff
+        The tariff now in use.
+    """
+    global _stamp
+    path = path or get_tariff_path()
+    stamp = _stamp_of(path)
+    tariff = Tariff.from_file(path) if stamp is not None else Tariff.builtin()
+    install(tariff)
+    _stamp = stamp
+    return tariff
+
+
+def reload_if_changed(path: str = None) -> bool:
+    """
+    Reload the tariff file if it has changed since it was last read.
+
+    Parameters
+    ----------
+    path : str, optional
+        The tariff file. Defaults to the one selected in config.json.
+
+    Returns
+    -------
+    bool
+        Whether a tariff was reloaded.
+    """
+    path = path or get_tariff_path()
+    if _current is not None and _stamp_of(path) == _stamp:
+        return False
+    reload(path)
+    return True
+
+
+def _stamp_of(path: str) -> tuple | None:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+class TariffWatcher:
+    """
+    Reloads the tariff file in a background thread once it changes.
+
+    A file that fails to compile is reported to on_error and the tariff in
+    use is kept, so a bad edit never stops pricing.
+
+    Methods:
+        start(): Start checking the file.
+        stop(): Stop the background thread.
+    """
+    def __init__(self, path: str = None, interval: float = 5.0,
+                 on_error=lambda error: None):
+        """
+        Initialize a TariffWatcher.
+
+        Parameters
+        ----------
+        path : str, optional
+            The tariff file. Defaults to the one selected in config.json.
+        interval : float, optional
+            The seconds between checks.
+        on_error : Callable[[Exception], None], optional
+            Called with the error when the file cannot be reloaded.
+        """
+        self._path = path
+        self._interval = interval
+        self._on_error = on_error
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+
+    ## Methods
+    def start(self) -> None:
+        """
+        Start a daemon thread that calls reload_if_changed() every interval.
+
+        Returns
+        -------
+        None
+        """
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, daemon=True,
+                                            name="TariffWatcher")
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background thread and wait for it to finish.
+
+        Returns
+        -------
+        None
+        """
+        with self._cond:
+            thread, self._thread = self._thread, None
+            self._stopped = True
+            self._cond.notify()
+        if thread is not None:
+            thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopped, self._interval)
+                if self._stopped:
+                    return
+            try:
+                reload_if_changed(self._path)
+            except (OSError, ValueError, KeyError, TypeError) as error:
+                self._on_error(error)
+
+
+if __name__ == "__main__":
+    from timeit import timeit
+
+    tariff = current()
+    print(tariff, tariff.rates, tariff.size_fees, tariff.weight_fees)
+    n = 1_000_000
+    seconds = timeit(lambda: tariff.fee(1, 75, 3.2, False, True, 1.25), number=n)
+    print(f"{n / seconds:,.0f} fees/s")
@@ -7,6 +7,7 @@ Created on Thu Dec 25 12:44:55 2025
 """
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING
+from Registry import Registry
 
 if TYPE_CHECKING:
     from Order import Order
@@ -15,6 +16,7 @@ class Vehicle(ABC):
     """
     Attributes:
         license_plate (str): The license plate number of the vehicle
+        key (str): The stable key of the vehicle, "V:<license plate>"
         cargo (set[Order]): A list of cargo that is on the vehicle
         
     Methods:
@@ -25,11 +27,16 @@ class Vehicle(ABC):
     def __init__(self, plate: str):
         self._license_plate = plate
         self._cargo = set()
+        Registry().register(self)
         
     @property
     def license_plate(self) -> str:
         return self._license_plate
     
+    @property
+    def key(self) -> str:
+        return "V:" + self.license_plate
+    
     @property
     def cargo(self) -> set[Order]:
         return self._cargo.copy()
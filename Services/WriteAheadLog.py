@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+"""
+Created on Sun Oct 18 09:26:51 2026
+
+@author: laisz
+"""
+import os, pickle, struct, threading, zlib
+from os.path import isfile
+from typing import Any, Iterator
+
+
+class WriteAheadLog:
+    """
+    An append-only log of records that are durable once append() returns.
+
+    Each record is pickled into a frame prefixed with its length and CRC32,
+    so a frame torn by a crash is detected and dropped on the next open.
+
+    Concurrent appends are committed as a group: the first caller that
+    finds no fsync in progress becomes the leader and writes every frame
+    queued so far with a single fsync, while the others wait for it. The
+    cost of an fsync is thereby shared by all callers that arrive during
+    the previous one. If the write or fsync fails, every caller in the
+    group gets the error, and the frames are cut from the file.
+
+    Positions in the log (LSNs) count the bytes appended since the log was
+    opened, so they stay valid across checkpoints.
+
+    Attributes:
+        path (str): The path of the log file.
+        tail (int): The LSN after the last appended record.
+        size (int): The number of bytes in the log file.
+
+    Methods:
+        append(record): Append a record and wait until it is durable.
+        records(): Iterate over the records in the log file.
+        checkpoint(lsn): Drop the records before an LSN.
+        close(): Close the log file.
+    """
+    _HEADER = struct.Struct("<II")  # payload length, CRC32 of the payload
+
+    def __init__(self, path: str):
+        """
+        Open, and create if needed, a write-ahead log.
+
+        Parameters
+        ----------
+        path : str
+            The path of the log file.
+        """
+        self._path = path
+        self._cond = threading.Condition()
+        self._queue: list[tuple[bytes, list]] = []  # frame, [error of its group]
+        self._syncing = False
+
+        end = self._valid_end()
+        self._file = open(path, 'ab', buffering=0)
+        if self._file.tell() > end:
+            self._file.truncate(end)  # Cut off a frame torn by a crash
+            self._file.seek(end)
+
+        self._base = -end   # LSN = file offset + _base
+        self._tail = 0      # LSN after the last queued frame
+        self._synced = 0    # LSN up to which the file is fsynced
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def tail(self) -> int:
+        return self._tail
+
+    @property
+    def size(self) -> int:
+        return self._tail - self._base
+
+
+    ## Methods
+    def append(self, record: Any) -> int:
+        """
+        Append a record and wait until it is synced to disk, together with
+        the records appended concurrently by other threads.
+
+        Parameters
+        ----------
+        record : Any
+            A picklable record.
+
+        Returns
+        -------
+        int
+            The LSN after the record.
+
+        Raises
+        ------
+        OSError
+            If the group of the record could not be written or synced.
+        """
+        payload = pickle.dumps(record, protocol=4)
+        frame = self._HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        outcome = [None]
+
+        with self._cond:
+            self._queue.append((frame, outcome))
+            self._tail += len(frame)
+            lsn = self._tail
+
+            while self._synced < lsn:
+                if self._syncing:
+                    self._cond.wait()
+                    continue
+
+                # Lead the next group commit
+                self._syncing = True
+                batch, self._queue = self._queue, []
+                start, target = self._synced, self._tail
+                error = None
+                self._cond.release()
+                try:
+                    self._write(batch)
+                except OSError as exc:
+                    error = exc
+                finally:
+                    self._cond.acquire()
+                    self._syncing = False
+                    self._cond.notify_all()
+                if error is not None:
+                    self._drop(batch, start, target, error)
+                self._synced = target
+
+            if outcome[0] is not None:
+                raise outcome[0]
+        return lsn
+
+    def records(self) -> Iterator[tuple[int, Any]]:
+        """
+        Iterate over the records in the log file, e.g. to replay them after
+        a restart.
+
+        Returns
+        -------
+        Iterator[tuple[int, Any]]
+            The LSN after each record, and the record.
+        """
+        with self._cond:
+            base = self._base
+        for end, payload in self._frames():
+            yield end + base, pickle.loads(payload)
+
+    def checkpoint(self, lsn: int) -> None:
+        """
+        Drop the records before an LSN, once the changes they describe are
+        saved elsewhere. The remaining records are copied to a new file,
+        which is then renamed over the log.
+
+        Parameters
+        ----------
+        lsn : int
+            The LSN after the last record to drop.
+
+        Returns
+        -------
+        None
+        """
+        with self._cond:
+            while self._syncing:
+                self._cond.wait()
+            if self._queue:
+                batch, self._queue = self._queue, []
+                start, target = self._synced, self._tail
+                try:
+                    self._write(batch)
+                except OSError as error:
+                    self._drop(batch, start, target, error)
+                    raise
+                finally:
+                    self._synced = target
+                    self._cond.notify_all()
+
+            offset = min(lsn - self._base, self.size)
+            if offset <= 0:
+                return
+
+            with open(self._path, 'rb') as file:
+                file.seek(offset)
+                rest = file.read()
+
+            tmp_path = self._path + ".tmp"
+            with open(tmp_path, 'wb') as file:
+                file.write(rest)
+                file.flush()
+                os.fsync(file.fileno())
+            self._file.close()
+            os.replace(tmp_path, self._path)
+            self._file = open(self._path, 'ab', buffering=0)
+            self._base += offset
+
+    def close(self) -> None:
+        """
+        Close the log file.
+        """
+        with self._cond:
+            while self._syncing:
+                self._cond.wait()
+            self._file.close()
+
+    def _write(self, batch: list[tuple[bytes, list]]) -> None:
+        """
+        Write a group of frames and sync them to disk.
+        """
+        self._file.write(b"".join(frame for frame, _ in batch))
+        os.fsync(self._file.fileno())
+
+    def _drop(self, batch: list[tuple[bytes, list]], start: int, end: int,
+              error: OSError) -> None:
+        """
+        Report a failed group to its callers, and cut what was written of it
+        from the file. Its LSNs are skipped, so later records keep theirs.
+        """
+        try:
+            self._file.truncate(start - self._base)
+        except OSError:
+            pass  # Reading stops at the torn frame on the next open
+        self._base += end - start
+        for _, outcome in batch:
+            outcome[0] = error
+
+    def _frames(self) -> Iterator[tuple[int, bytes]]:
+        """
+        Iterate over the intact frames of the log file, stopping at the
+        first torn or corrupt one.
+        """
+        if not isfile(self._path):
+            return
+
+        with open(self._path, 'rb') as file:
+            data = file.read()
+
+        offset = 0
+        size = self._HEADER.size
+        while offset + size <= len(data):
+            length, crc = self._HEADER.unpack_from(data, offset)
+            payload = data[offset + size:offset + size + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                return
+            offset += size + length
+            yield offset, payload
+
+    def _valid_end(self) -> int:
+        """
+        Get the offset after the last intact frame of the log file.
+        """
+        end = 0
+        for end, _ in self._frames():
+            pass
+        return end
+
+
+if __name__ == "__main__":
+    import tempfile
+    from os.path import join
+
+    with tempfile.TemporaryDirectory() as folder:
+        log = WriteAheadLog(join(folder, "orders.wal"))
+        threads = [threading.Thread(target=log.append, args=(("O1", "status", n),))
+                   for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        log.checkpoint(log.tail // 2)
+        log.close()
+        print(list(WriteAheadLog(join(folder, "orders.wal")).records()))
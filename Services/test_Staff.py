@@ -129,6 +129,64 @@ class TestCSStaff:
         mock_orders_handler.filter_delayed.assert_called()
 
 
+class TestPagination:
+    def orders(self, *numbers):
+        orders = []
+        for n in numbers:
+            order = MagicMock()
+            order.ID = f"O{n:013d}"
+            orders.append(order)
+        return orders
+
+    def test_pages_follow_cursor(self, mock_orders_handler):
+        staff = CSStaff("Charlie", "CS", "CS", "pass")
+        mock_orders_handler.iter_by_customer.side_effect = lambda customer_ID, after: iter(
+            [order for order in self.orders(1, 2, 3, 4, 5) if after is None or order.ID > after])
+
+        first, cursor = staff.page_by_customer("C123", limit=2)
+        assert [order.ID for order in first] == ["O0000000000001", "O0000000000002"]
+        assert cursor == "O0000000000002"
+
+        second, cursor = staff.page_by_customer("C123", limit=2, cursor=cursor)
+        assert [order.ID for order in second] == ["O0000000000003", "O0000000000004"]
+        mock_orders_handler.iter_by_customer.assert_called_with("C123", after="O0000000000002")
+
+        last, cursor = staff.page_by_customer("C123", limit=2, cursor=cursor)
+        assert [order.ID for order in last] == ["O0000000000005"]
+        assert cursor is None
+
+    def test_page_stops_early(self, mock_orders_handler):
+        staff = Management("Boss", "Man", "Mgr", "pass")
+        taken = []
+
+        def orders(after):
+            for order in self.orders(*range(1, 100)):
+                taken.append(order)
+                yield order
+        mock_orders_handler.iter_delayed.side_effect = orders
+
+        page, cursor = staff.page_delayed(limit=10)
+
+        assert len(page) == 10
+        assert cursor == "O0000000000010"
+        assert len(taken) == 11
+
+    def test_exact_page_has_no_cursor(self, mock_orders_handler, mock_vehicle):
+        staff = Management("Boss", "Man", "Mgr", "pass")
+        mock_orders_handler.iter_by_vehicle.return_value = iter(self.orders(1, 2))
+
+        page, cursor = staff.page_by_vehicle(mock_vehicle, limit=2)
+
+        assert len(page) == 2
+        assert cursor is None
+        mock_orders_handler.iter_by_vehicle.assert_called_with(mock_vehicle, after=None)
+
+    def test_invalid_limit_raises(self, mock_orders_handler, mock_repo):
+        staff = Management("Boss", "Man", "Mgr", "pass")
+        with pytest.raises(ValueError, match="limit"):
+            staff.page_by_repo(mock_repo, limit=0)
+
+
 class TestManagement:
     def test_filter_methods(self, mock_orders_handler, mock_vehicle, mock_repo):
         staff = Management("Boss", "Man", "Mgr", "pass")
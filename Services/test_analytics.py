@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+Test suite for Analytics.py
+
+@author: laisz
+"""
+import math
+import multiprocessing
+import pytest
+import Scan
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from unittest.mock import patch
+from Analytics import OrderTable, COLUMNS, row, saved_row, _everything
+from OrderHandler import OrdersHandler
+from IDAllocator import IDAllocator
+from Order import Order, Service, Status, SizeClass, WeightClass
+from PaymentArrangement import BillingTiming
+from Location import Destination
+
+
+def make_order(payer: str, service: Service, size: tuple = (10, 10, 10),
+               weight: float = 1.0, dangerous: bool = False) -> Order:
+    """Build an order for a package."""
+    return Order(payer, BillingTiming.in_advance, service, Destination("Origin"),
+                 Destination("Dest"), "S001", False, size, weight, 100.0, "",
+                 dangerous, False)
+
+
+class TestOrderTable:
+    """Tests for the columns, filters and aggregates."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Fill a table with orders kept in a temporary directory."""
+        with patch.object(Order, '_Order__DATA_PATH', str(tmp_path)):
+            self.orders = [make_order("C00001", Service.express),
+                           make_order("C00002", Service.economy, (100, 50, 10)),
+                           make_order("C00001", Service.economy, weight=20.0, dangerous=True),
+                           make_order("C00003", Service.over_night)]
+            self.table = OrderTable.from_orders(self.orders)
+            yield
+
+    def test_rows_hold_codes(self):
+        """Test that every order is one row of codes."""
+        order = self.orders[1]
+
+        assert len(self.table) == 4
+        assert self.table.ids() == [order.ID for order in self.orders]
+        assert self.table.payers == ("C00001", "C00002", "C00003")
+        assert self.table.column('payer').tolist() == [0, 1, 0, 2]
+        assert self.table.column('fee')[1] == order.fee
+        assert self.table.column('size_class')[1] == list(SizeClass).index(SizeClass.oversize)
+        assert self.table.column('due_day')[1] - self.table.column('collection_day')[1] == 14
+        assert self.table.column('is_dangerous').tolist() == [False, False, True, False]
+
+    def test_columns_are_read_only(self):
+        """Test that columns cannot be changed through their views."""
+        with pytest.raises(ValueError):
+            self.table.column('fee')[0] = 0
+
+    def test_unknown_column_raises(self):
+        """Test that a column outside COLUMNS is rejected."""
+        with pytest.raises(ValueError, match="Unknown column"):
+            self.table.column('weight')
+
+    def test_append_refreshes_known_orders(self):
+        """Test that appending an order twice keeps one row."""
+        self.orders[0]._status = Status.delivered
+        self.table.append(self.orders[0])
+
+        assert len(self.table) == 4
+        assert self.table.column('status')[0] == Status.delivered.value
+
+    def test_columns_grow(self):
+        """Test that rows beyond the first capacity are kept."""
+        table = OrderTable(capacity=1)
+        table.extend(self.orders[:2])
+        table.append(self.orders[2])
+        table.append(self.orders[3])
+
+        assert table.ids() == self.table.ids()
+        for name in COLUMNS:
+            assert table.column(name).tolist() == self.table.column(name).tolist()
+
+    def test_set_status(self):
+        """Test that a status is recorded without loading the order."""
+        assert self.table.set_status(self.orders[2].ID, Status.delayed)
+        assert not self.table.set_status("O9999999999999", Status.delayed)
+
+        assert self.table.ids(self.table.where(status=Status.delayed)) == [self.orders[2].ID]
+
+    def test_where(self):
+        """Test that conditions are given by member, name, ID or date."""
+        today = self.orders[0].collection_date
+
+        assert self.table.ids(self.table.where(service="economy", payer="C00001")) == [
+            self.orders[2].ID]
+        assert self.table.where(service=[Service.express, Service.over_night]).tolist() == [
+            True, False, False, True]
+        assert self.table.where(weight_class=WeightClass.extra_heavy).sum() == 1
+        assert self.table.where(payer="C09999").sum() == 0
+        assert self.table.where(collection_day=(today, today)).all()
+        assert self.table.ids(self.table.where(due_day=(today, today + timedelta(days=1)))) == [
+            self.orders[3].ID]
+
+    def test_group_by(self):
+        """Test that values are summed, counted and averaged by a key."""
+        fees = [order.fee for order in self.orders]
+
+        assert self.table.revenue_by('payer') == {"C00001": fees[0] + fees[2],
+                                                  "C00002": fees[1], "C00003": fees[3]}
+        assert self.table.group_by('service', how='count') == {
+            Service.over_night: 1, Service.express: 1, Service.economy: 2}
+        assert self.table.group_by('is_dangerous', 'fee', 'mean') == {
+            False: pytest.approx((fees[0] + fees[1] + fees[3]) / 3), True: fees[2]}
+
+    def test_group_by_month_with_mask(self):
+        """Test that days are grouped by month, and masked rows are left out."""
+        self.table.set_status(self.orders[0].ID, Status.delivered)
+        self.table.set_status(self.orders[1].ID, Status.delayed)
+        finished = self.table.where(status=[Status.delivered, Status.delayed])
+        on_time = self.table.column('status') == Status.delivered.value
+
+        rates = self.table.group_by('collection_month', on_time, 'mean', finished)
+
+        assert list(rates) == [self.orders[0].collection_date.replace(day=1)]
+        assert list(rates.values()) == [0.5]
+
+    def test_unknown_aggregate_raises(self):
+        """Test that an aggregate other than sum, count or mean is rejected."""
+        with pytest.raises(ValueError, match="Unknown aggregate"):
+            self.table.group_by('service', how='median')
+
+    def test_empty_table(self):
+        """Test that an empty table gives empty reports."""
+        table = OrderTable()
+
+        assert table.revenue_by('service') == {}
+        assert table.where(service=Service.express).tolist() == []
+
+
+class TestOrdersHandlerAnalytics:
+    """Tests for keeping the table of OrdersHandler up to date."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Create an OrdersHandler with six orders."""
+        with patch.object(OrdersHandler, '_instance', None), \
+             patch('OrderHandler.get_dir', return_value=str(tmp_path)), \
+             patch('OrderHandler.get_store', return_value=None), \
+             patch.object(Order, '_Order__DATA_PATH', str(tmp_path)):
+            self.handler = OrdersHandler()
+            services = [Service.economy, Service.standard, Service.express]
+            for n in range(1, 7):
+                with patch.object(IDAllocator, 'next', return_value=n):
+                    self.handler.add(f"C{n % 2:05d}", BillingTiming.in_advance, services[n % 3],
+                                     Destination("Origin"), Destination("Dest"), "S001",
+                                     False, (1, 1, 1), float(n), 10.0, "", False, False)
+            yield
+
+    def test_table_holds_every_order(self):
+        """Test that the table is built from the stored orders."""
+        table = self.handler.analytics(workers=1)
+
+        assert sorted(table.ids()) == sorted(self.handler._order_list())
+        assert table.column('fee').tolist() == [self.handler.get(order_ID).fee
+                                                for order_ID in table.ids()]
+        assert self.handler.analytics() is table
+
+    def test_rows_are_built_under_spawn(self):
+        """Test that workers started with spawn build the rows from storage."""
+        self.handler.flush()
+        order_IDs = sorted(self.handler._order_list())
+        context = multiprocessing.get_context("spawn")
+
+        with ProcessPoolExecutor(max_workers=2, mp_context=context) as pool:
+            rows = Scan.scan(order_IDs, _everything, saved_row, executor=pool)
+
+        assert rows == [row(self.handler.get(order_ID)) for order_ID in order_IDs]
+
+    def test_unpriced_orders_are_priced_here(self):
+        """Test that orders saved before they were priced get their fee."""
+        order = self.handler.get("O0000000000003")
+        order._fee = order._tariff_version = None
+        self.handler.flush()
+        self.handler.save(order)
+        self.handler._orders.clear()
+
+        assert math.isnan(saved_row(Order.from_ID("O0000000000003"))[3])
+        table = self.handler.analytics(workers=1)
+
+        fee = self.handler.get("O0000000000003").fee
+        assert table.column('fee')[table.ids().index("O0000000000003")] == fee
+
+    def test_new_orders_are_appended(self):
+        """Test that orders added afterwards are appended as they are added."""
+        table = self.handler.analytics(workers=1)
+
+        with patch.object(IDAllocator, 'next', return_value=7), \
+             patch.object(OrdersHandler, 'get', wraps=self.handler.get) as get:
+            order_ID = self.handler.add("C00009", BillingTiming.in_advance, Service.express,
+                                        Destination("Origin"), Destination("Dest"), "S001",
+                                        False, (1, 1, 1), 2.0, 10.0, "", False, False)
+            assert self.handler.analytics() is table
+            get.assert_not_called()
+
+        assert table.ids(table.where(payer="C00009")) == [order_ID]
+
+    def test_orders_indexed_elsewhere_are_caught_up(self):
+        """Test that orders the table missed are appended on the next call."""
+        table = self.handler.analytics(workers=1)
+        with table._lock:
+            del table._rows["O0000000000006"]
+            table._size -= 1
+
+        assert "O0000000000006" in self.handler.analytics()
+
+    def test_status_changes_are_applied(self):
+        """Test that logged and expired statuses reach the table."""
+        table = self.handler.analytics(workers=1)
+
+        self.handler.log("O0000000000001", 'A', "S002", Destination("Dest"))
+        self.handler._expire(["O0000000000002"])
+
+        assert table.group_by('status', how='count') == {
+            Status.normal: 4, Status.delivered: 1, Status.delayed: 1}
+
+    def test_row_matches_loaded_order(self):
+        """Test that an order read back from storage gives the same row."""
+        order = self.handler.get("O0000000000003")
+        self.handler.flush()
+
+        assert row(Order.from_ID(order.ID)) == row(order)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+"""
+Test suite for AsyncService.py
+
+@author: laisz
+"""
+import pytest
+import asyncio
+import threading
+import time
+from datetime import timedelta
+from unittest.mock import patch
+from AsyncService import AsyncOrdersHandler, AsyncCustomerService
+from OrderHandler import OrdersHandler
+from OrderStore import OrderStore
+from IDAllocator import IDAllocator
+from Order import Order, Service
+from Customer import Customer
+from PaymentArrangement import BillingTiming
+from Location import Destination
+
+
+def order_args(payer: str = "C00001") -> tuple:
+    """Build the arguments of OrdersHandler.add."""
+    return (payer, BillingTiming.in_advance, Service.standard,
+            Destination("Origin"), Destination("Dest"), "S001", False,
+            (1, 1, 1), 1.0, 10.0, "", False, False)
+
+
+@pytest.fixture
+def handler(tmp_path):
+    """Create a fresh OrdersHandler keeping its orders in a temporary directory."""
+    with patch.object(OrdersHandler, '_instance', None), \
+         patch('OrderHandler.get_dir', return_value=str(tmp_path)), \
+         patch('OrderHandler.get_store', return_value=None), \
+         patch.object(Order, '_Order__DATA_PATH', str(tmp_path)):
+        yield OrdersHandler()
+
+
+def add(handler: OrdersHandler, n: int, payer: str = "C00001") -> str:
+    """Add an order whose ID ends with n."""
+    with patch.object(IDAllocator, 'next', return_value=n):
+        return handler.add(*order_args(payer))
+
+
+def slow(function, calls: list, delay: float = 0.05):
+    """Wrap a function so it records its calls and takes a while."""
+    def wrapper(*args):
+        calls.append(args)
+        time.sleep(delay)
+        return function(*args)
+    return wrapper
+
+
+class TestAsyncOrdersHandler:
+    """Tests for the asyncio front end of OrdersHandler."""
+
+    def test_add_and_get(self, handler):
+        """Test that an added order is retrieved."""
+        async def main():
+            async with AsyncOrdersHandler(handler) as service:
+                with patch.object(IDAllocator, 'next', return_value=1):
+                    order_ID = await service.add(*order_args())
+                return order_ID, await service.get(order_ID)
+
+        order_ID, order = asyncio.run(main())
+
+        assert order.ID == order_ID
+        assert order is handler.get(order_ID)
+
+    def test_concurrent_gets_share_one_load(self, handler):
+        """Test that gets for the same order load it only once."""
+        order_ID = add(handler, 1)
+        handler.flush()
+        handler._orders.clear()
+        calls = []
+
+        async def main():
+            async with AsyncOrdersHandler(handler) as service:
+                return await asyncio.gather(*(service.get(order_ID) for _ in range(10)))
+
+        with patch.object(Order, 'from_ID', side_effect=slow(Order.from_ID, calls)):
+            orders = asyncio.run(main())
+
+        assert len(calls) == 1
+        assert all(order is orders[0] for order in orders)
+
+    def test_get_loads_again_after_landing(self, handler):
+        """Test that a finished load is not reused by later calls."""
+        order_ID = add(handler, 1)
+
+        async def main():
+            async with AsyncOrdersHandler(handler) as service:
+                await service.get(order_ID)
+                assert not service._inflight
+                with patch.object(handler, 'get', wraps=handler.get) as get:
+                    await service.get(order_ID)
+                    return get.call_count
+
+        assert asyncio.run(main()) == 1
+
+    def test_failed_load_is_raised_to_every_caller(self, handler):
+        """Test that an error of a shared load reaches all callers."""
+        async def main():
+            async with AsyncOrdersHandler(handler) as service:
+                return await asyncio.gather(*(service.get("O0000000000404") for _ in range(3)),
+                                            return_exceptions=True)
+
+        results = asyncio.run(main())
+
+        assert all(isinstance(result, FileNotFoundError) for result in results)
+
+    def test_cancelled_caller_does_not_cancel_load(self, handler):
+        """Test that other callers still get the order if one is cancelled."""
+        order_ID = add(handler, 1)
+        handler.flush()
+        handler._orders.clear()
+
+        async def main():
+            async with AsyncOrdersHandler(handler) as service:
+                first = asyncio.ensure_future(service.get(order_ID))
+                second = asyncio.ensure_future(service.get(order_ID))
+                await asyncio.sleep(0.01)
+                first.cancel()
+                return await second
+
+        with patch.object(Order, 'from_ID', side_effect=slow(Order.from_ID, [])):
+            assert asyncio.run(main()).ID == order_ID
+
+    def test_executor_is_bounded(self, handler):
+        """Test that no more calls run at once than the executor has threads."""
+        order_IDs = [f"O{n:013d}" for n in range(1, 13)]
+        running, peak = [0], [0]
+        lock = threading.Lock()
+
+        def load(order_ID):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return order_ID
+
+        async def main():
+            async with AsyncOrdersHandler(handler, max_workers=3) as service:
+                return await asyncio.gather(*(service.get(order_ID) for order_ID in order_IDs))
+
+        with patch.object(handler, 'get', side_effect=load):
+            assert asyncio.run(main()) == order_IDs
+        assert peak[0] == 3
+
+    def test_event_loop_is_not_blocked(self, handler):
+        """Test that the loop keeps running while an order is loaded."""
+        order_ID = add(handler, 1)
+        handler.flush()
+        handler._orders.clear()
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        async def main():
+            async with AsyncOrdersHandler(handler) as service:
+                await asyncio.gather(service.get(order_ID), ticker())
+
+        with patch.object(Order, 'from_ID', side_effect=slow(Order.from_ID, [], 0.1)):
+            asyncio.run(main())
+
+        assert len(ticks) == 5
+        assert ticks[-1] - ticks[0] < 0.1
+
+    def test_log_and_flush(self, handler):
+        """Test that entries logged through the facade are saved."""
+        order_ID = add(handler, 1)
+
+        async def main():
+            async with AsyncOrdersHandler(handler) as service:
+                await service.log(order_ID, 'X', "S002", "Inspected")
+                return await service.flush()
+
+        assert asyncio.run(main())[0] == 1
+        assert handler.get(order_ID).last_log().signature == "S002"
+
+    def test_save_uses_the_order_store(self, tmp_path):
+        """Test that an order saved through the facade lands in the handler's store."""
+        store = OrderStore(str(tmp_path / "orders.sqlite3"))
+        with patch.object(OrdersHandler, '_instance', None), \
+             patch('OrderHandler.get_dir', return_value=str(tmp_path)), \
+             patch('OrderHandler.get_store', return_value=store), \
+             patch.object(Order, '_Order__DATA_PATH', str(tmp_path)):
+            handler = OrdersHandler()
+            order = handler.get(add(handler, 1))
+            order.billing("B000010000")
+
+            async def main():
+                async with AsyncOrdersHandler(handler) as service:
+                    return await service.save(order)
+
+            assert asyncio.run(main()) > 0
+            assert Order.from_ID(order.ID, store).bill_ref == "B000010000"
+            assert not order.is_dirty
+        store.close()
+
+    def test_shared_executor_is_left_open(self, handler):
+        """Test that closing a facade keeps an executor it was given."""
+        async def main():
+            async with AsyncOrdersHandler(handler, max_workers=2) as first:
+                async with AsyncOrdersHandler(handler, executor=first.executor) as second:
+                    pass
+                return await second._run(lambda: "still open")
+
+        assert asyncio.run(main()) == "still open"
+
+
+class TestStreaming:
+    """Tests for streaming the filters."""
+
+    def test_iter_by_customer_matches_filter(self, handler):
+        """Test that the stream yields the same orders as the filter."""
+        for n in range(1, 8):
+            add(handler, n, "C00001" if n % 2 else "C00002")
+
+        async def main():
+            async with AsyncOrdersHandler(handler) as service:
+                return [order async for order in service.iter_by_customer("C00001", window=2)]
+
+        assert asyncio.run(main()) == handler.filter_by_customer("C00001")
+
+    def test_iter_by_date_matches_filter(self, handler):
+        """Test that the date stream yields the same orders as the filter."""
+        for n in range(1, 5):
+            add(handler, n, "C00001" if n < 3 else "C00002")
+        today = handler.get("O0000000000001").due_time.date()
+
+        async def main():
+            async with AsyncOrdersHandler(handler) as service:
+                return [order async for order in service.iter_by_date(
+                    today - timedelta(days=1), today + timedelta(days=1), "C00002")]
+
+        streamed = asyncio.run(main())
+
+        assert [order.ID for order in streamed] == ["O0000000000003", "O0000000000004"]
+        assert streamed == handler.filter_by_date(today - timedelta(days=1),
+                                                  today + timedelta(days=1), "C00002")
+
+    def test_iter_delayed_matches_filter(self, handler):
+        """Test that the delayed stream yields the same orders as the filter."""
+        add(handler, 1)
+        add(handler, 2)
+        handler._expire(["O0000000000002"])
+
+        async def main():
+            async with AsyncOrdersHandler(handler) as service:
+                return [order async for order in service.iter_delayed()]
+
+        assert [order.ID for order in asyncio.run(main())] == ["O0000000000002"]
+
+    def test_stream_loads_lazily(self, handler):
+        """Test that only the windows taken by the consumer are loaded."""
+        for n in range(1, 11):
+            add(handler, n)
+        handler.flush()
+        handler._orders.clear()
+
+        async def main():
+            async with AsyncOrdersHandler(handler) as service:
+                with patch.object(handler, 'get', wraps=handler.get) as get:
+                    stream = service.iter_by_customer("C00001", window=3)
+                    first = await anext(stream)
+                    await stream.aclose()
+                    return first, get.call_count
+
+        first, loaded = asyncio.run(main())
+
+        assert first.ID == "O0000000000001"
+        assert loaded == 3
+
+    def test_invalid_window_raises(self, handler):
+        """Test that a window smaller than one is rejected."""
+        async def main():
+            async with AsyncOrdersHandler(handler) as service:
+                return [order async for order in service.iter_delayed(window=0)]
+
+        with pytest.raises(ValueError, match="window"):
+            asyncio.run(main())
+
+
+class TestAsyncCustomerService:
+    """Tests for the asyncio front end of the customer lookups."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Setup a customer in a temporary directory."""
+        self.patcher_path = patch.object(Customer, '_Customer__DATA_PATH', str(tmp_path))
+        self.patcher_oh = patch('Customer.OrdersHandler')
+        self.patcher_path.start()
+        self.patcher_oh.start()
+
+        self.customer = Customer("John", "Doe", "123 Main St", "1234567890",
+                                 "john.doe@example.com", "secret123",
+                                 BillingTiming.in_advance)
+
+        yield
+
+        self.patcher_path.stop()
+        self.patcher_oh.stop()
+
+    def test_concurrent_loads_share_one_load(self):
+        """Test that loads of the same customer read it only once."""
+        calls = []
+
+        async def main():
+            async with AsyncCustomerService() as service:
+                return await asyncio.gather(*(service.from_ID(self.customer.ID)
+                                              for _ in range(10)))
+
+        with patch.object(Customer, 'from_ID', side_effect=slow(Customer.from_ID, calls)):
+            customers = asyncio.run(main())
+
+        assert len(calls) == 1
+        assert customers[0].ID == self.customer.ID
+        assert all(customer is customers[0] for customer in customers)
+
+    def test_from_email(self):
+        """Test that a customer is found by email."""
+        async def main():
+            async with AsyncCustomerService() as service:
+                return await service.from_email("john.doe@example.com")
+
+        assert asyncio.run(main()).ID == self.customer.ID
+
+    def test_unknown_email_raises(self):
+        """Test that an unknown email raises ValueError."""
+        async def main():
+            async with AsyncCustomerService() as service:
+                return await service.from_email("nobody@example.com")
+
+        with pytest.raises(ValueError, match="No customer"):
+            asyncio.run(main())
+
+    def test_save(self):
+        """Test that a customer saved through the facade is stored."""
+        self.customer._billing_pref = BillingTiming.monthly
+
+        async def main():
+            async with AsyncCustomerService() as service:
+                await service.save(self.customer)
+                return await service.from_ID(self.customer.ID)
+
+        assert asyncio.run(main()).billing_pref is BillingTiming.monthly
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Test suite for Cache.py
+
+@author: laisz
+"""
+import pytest
+from Cache import LRUCache
+
+
+class TestLRUCache:
+    """Tests for the LRU cache."""
+
+    def test_invalid_capacity_raises_error(self):
+        """Test that a non-positive capacity raises ValueError."""
+        with pytest.raises(ValueError):
+            LRUCache(0)
+
+    def test_get_counts_hits_and_misses(self):
+        """Test that lookups update the hit and miss counters."""
+        cache = LRUCache(2)
+        cache.put("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("b", 0) == 0
+        assert cache.hits == 1
+        assert cache.misses == 2
+
+    def test_peek_does_not_count_or_reorder(self):
+        """Test that peek leaves the counters and the LRU order alone."""
+        evicted = []
+        cache = LRUCache(2, on_evict=lambda key, value: evicted.append(key))
+        cache.put("a", 1)
+        cache.put("b", 2)
+
+        assert cache.peek("a") == 1
+        assert cache.peek("c", 0) == 0
+        cache.put("c", 3)
+
+        assert cache.hits == 0 and cache.misses == 0
+        assert evicted == ["a"]
+
+    def test_least_recently_used_is_evicted(self):
+        """Test that the entry not used for the longest time goes first."""
+        evicted = []
+        cache = LRUCache(2, on_evict=lambda key, value: evicted.append((key, value)))
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert evicted == [("b", 2)]
+        assert "b" not in cache
+        assert "a" in cache and "c" in cache
+        assert cache.evictions == 1
+
+    def test_put_existing_key_does_not_evict(self):
+        """Test that replacing an entry keeps the size unchanged."""
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.put("a", 3)
+
+        assert len(cache) == 2
+        assert cache.get("a") == 3
+        assert cache.evictions == 0
+
+    def test_discard_and_clear_skip_on_evict(self):
+        """Test that explicit removal does not call on_evict."""
+        evicted = []
+        cache = LRUCache(3, on_evict=lambda key, value: evicted.append(key))
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.discard("a")
+        cache.clear()
+
+        assert evicted == []
+        assert len(cache) == 0
+
+    def test_stats(self):
+        """Test that stats() reports all counters."""
+        cache = LRUCache(1)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("b")
+
+        assert cache.stats() == {'size': 1, 'capacity': 1, 'hits': 1,
+                                 'misses': 0, 'evictions': 1}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
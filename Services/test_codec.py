@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+Test suite for Codec.py
+
+@author: laisz
+"""
+import pytest
+import pickle
+from os.path import join
+from unittest.mock import patch
+import Codec, Shards
+from Order import Order, Service, Status
+from Entry import Entry, Arrival, Transit, OtherEvent
+from Package import Package
+from Bill import Bill
+from Location import Destination
+from Vehicle import Minivan
+from PaymentArrangement import BillingTiming, PaymentMethod
+
+
+class MockCustomer:
+    """Mock Customer for testing Bill."""
+    def __init__(self, id="C00001", bill_cnt=0):
+        self.ID = id
+        self.bill_cnt = bill_cnt
+
+
+class TestPack:
+    """Tests for packing plain values."""
+
+    @pytest.mark.parametrize("value", [
+        None, True, False, 0, 1, -1, 63, -64, 2**40, -2**70, 3.25, -0.5,
+        "", "Taipei 台北", b"\x00\xff", [], {}, [1, "a", None, [2.0]],
+        {"size": [30, 20, 10], "nested": {"ok": True}},
+    ])
+    def test_values_round_trip(self, value):
+        """Test that every supported value is decoded unchanged."""
+        assert Codec.unpack(Codec.pack(value)) == value
+
+    def test_bool_is_not_decoded_as_int(self):
+        """Test that booleans keep their type."""
+        assert Codec.unpack(Codec.pack(True)) is True
+        assert Codec.unpack(Codec.pack([0, False]))[1] is False
+
+    def test_tuple_is_decoded_as_list(self):
+        """Test that tuples become lists."""
+        assert Codec.unpack(Codec.pack((1, 2))) == [1, 2]
+
+    def test_small_ints_take_two_bytes(self):
+        """Test that integers are stored as varints."""
+        assert len(Codec.pack(63)) == 2
+        assert len(Codec.pack(-64)) == 2
+
+    def test_unsupported_value_raises(self):
+        """Test that values other than plain ones are rejected."""
+        with pytest.raises(TypeError):
+            Codec.pack({"service": Service.standard})
+
+    def test_truncated_data_raises(self):
+        """Test that cut off data is detected."""
+        data = Codec.pack({"content": "Books"})
+        for end in range(len(data)):
+            with pytest.raises(ValueError):
+                Codec.unpack(data[:end])
+
+    def test_trailing_data_raises(self):
+        """Test that extra bytes after the value are detected."""
+        with pytest.raises(ValueError, match="trailing"):
+            Codec.unpack(Codec.pack(1) + b"\x00")
+
+    def test_unknown_tag_raises(self):
+        """Test that an unknown tag is rejected."""
+        with pytest.raises(ValueError, match="Unknown tag"):
+            Codec.unpack(b"\x7f")
+
+
+class TestEncode:
+    """Tests for encoding objects."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Setup an order in a temporary directory."""
+        self.patcher_path = patch.object(Order, '_Order__DATA_PATH', str(tmp_path))
+        self.patcher_path.start()
+        self.tmp_path = tmp_path
+
+        self.order = Order("C00001", BillingTiming.monthly, Service.express,
+                           Destination("Origin"), Destination("Dest"), "S001", True,
+                           (30, 20, 10), 2.5, 1200.0, "Books", False, True)
+
+        yield
+
+        self.patcher_path.stop()
+
+    def test_order_round_trip(self):
+        """Test that a decoded order has the same state."""
+        self.order.calc_fee()
+        self.order.billing("B0000010000")
+        self.order.mark_delayed()
+
+        decoded = Codec.decode(Codec.encode(self.order), Order)
+
+        assert decoded.snapshot() == self.order.snapshot()
+        assert decoded.ID == self.order.ID
+        assert decoded.service is Service.express
+        assert decoded.status is Status.delayed
+        assert decoded.bill_timing is BillingTiming.monthly
+        assert decoded.due_time == self.order.due_time
+        assert decoded.package.size == (30, 20, 10)
+        assert decoded.origin.address == "Origin"
+        assert decoded.is_dirty is False
+
+    def test_decoded_order_reads_entries(self):
+        """Test that a decoded order finds its entries in the event store."""
+        self.order.new_log('X', "S002", "Inspected")
+
+        decoded = Codec.decode(Codec.encode(self.order), Order)
+
+        assert decoded.last_log().signature == "S002"
+        assert len(decoded.all_logs()) == 2
+
+    def test_order_is_smaller_than_pickle(self):
+        """Test that the encoding is more compact than a pickle."""
+        assert len(Codec.encode(self.order)) < len(pickle.dumps(self.order, protocol=4))
+
+    def test_entries_round_trip(self):
+        """Test that entries decoded as Entry get their own class back."""
+        entries = [Arrival("S001", Destination("Dest")),
+                   Transit("S002", Minivan("COD-0001"), Destination("Origin"),
+                           Destination("Dest")),
+                   OtherEvent("S003", "Damage Reported", "Crushed")]
+
+        for entry in entries:
+            decoded = Codec.decode(Codec.encode(entry), Entry)
+
+            assert type(decoded) is type(entry)
+            assert decoded.signature == entry.signature
+            assert decoded.time_stamp == entry.time_stamp
+            assert decoded.fields() == entry.fields()
+
+    def test_package_round_trip(self):
+        """Test that a decoded package has the same state."""
+        package = Package((5, 5, 5), 1.5, 300.0, "Tea", True, False)
+
+        decoded = Codec.decode(Codec.encode(package), Package)
+
+        assert decoded.snapshot() == package.snapshot()
+
+    def test_bill_round_trip(self):
+        """Test that a bill is decoded with its outer customer."""
+        customer = MockCustomer("C00007", 2)
+        bill = Bill(customer, self.order)
+        bill.issue()
+        bill.pay("TXN001", PaymentMethod.card)
+
+        decoded = Codec.decode(Codec.encode(bill), Bill, customer)
+
+        assert decoded.outer is customer
+        assert decoded.snapshot() == bill.snapshot()
+        assert decoded.payment_record.method is PaymentMethod.card
+
+    def test_wrong_class_raises(self):
+        """Test that an object is not decoded as an unrelated class."""
+        with pytest.raises(ValueError, match="not a Package"):
+            Codec.decode(Codec.encode(self.order), Package)
+
+    def test_newer_schema_raises(self):
+        """Test that a snapshot written by a newer schema is rejected."""
+        data = bytearray(Codec.encode(self.order))
+        data[4] = Order._SCHEMA + 1
+
+        with pytest.raises(ValueError, match="newer schema"):
+            Codec.decode(bytes(data), Order)
+
+    def test_pickle_is_not_encoded(self):
+        """Test that pickles are told apart from encoded objects."""
+        assert Codec.is_encoded(Codec.encode(self.order))
+        assert not Codec.is_encoded(pickle.dumps(self.order, protocol=4))
+        with pytest.raises(ValueError):
+            Codec.decode(pickle.dumps(self.order, protocol=4), Order)
+
+    def test_order_files_are_encoded(self):
+        """Test that saved orders are encoded and loaded back."""
+        self.order.save()
+
+        with open(Shards.locate(str(self.tmp_path), self.order.ID), 'rb') as file:
+            assert Codec.is_encoded(file.read())
+        assert Order.from_ID(self.order.ID).snapshot() == self.order.snapshot()
+
+    def test_legacy_pickle_is_loaded(self):
+        """Test that order files pickled by older versions are still read."""
+        with open(join(str(self.tmp_path), f"{self.order.ID}.pkl"), 'wb') as file:
+            pickle.dump(self.order, file, protocol=4)
+
+        assert Order.from_ID(self.order.ID).snapshot() == self.order.snapshot()
+
+
+class TestLazyPackage:
+    """Tests for decoding the package of an order on first access."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Setup an order in a temporary directory."""
+        self.patcher_path = patch.object(Order, '_Order__DATA_PATH', str(tmp_path))
+        self.patcher_path.start()
+
+        self.order = Order("C00001", BillingTiming.in_advance, Service.economy,
+                           Destination("Origin"), Destination("Dest"), "S001", False,
+                           (3, 2, 1), 4.0, 50.0, "Shoes", True, False)
+
+        yield
+
+        self.patcher_path.stop()
+
+    def test_package_is_decoded_on_access(self):
+        """Test that decoding an order leaves its package encoded."""
+        with patch('Order.Package.from_dict', wraps=Package.from_dict) as from_dict:
+            decoded = Codec.decode(Codec.encode(self.order), Order)
+            assert decoded.payer == "C00001"
+            from_dict.assert_not_called()
+
+            assert decoded.package.size == (3, 2, 1)
+            assert decoded.package.is_dangerous is True
+            from_dict.assert_called_once()
+
+    def test_fee_decodes_package(self):
+        """Test that the fee is calculated from the lazily decoded package."""
+        decoded = Codec.decode(Codec.encode(self.order), Order)
+
+        assert decoded.calc_fee() == self.order.calc_fee()
+
+    def test_untouched_package_is_passed_through(self):
+        """Test that saving an order again does not decode its package."""
+        data = Codec.encode(self.order)
+
+        with patch('Order.Package.from_dict') as from_dict:
+            assert Codec.encode(Codec.decode(data, Order)) == data
+            from_dict.assert_not_called()
+
+    def test_schema_1_is_decoded(self):
+        """Test that snapshots with the package inline are still read."""
+        snapshot = self.order.snapshot()
+        snapshot['package'] = self.order.package.snapshot()
+        data = Codec.MAGIC + bytes([Codec.FORMAT_VERSION, 1]) \
+            + Codec.pack("Order") + Codec.pack(snapshot)
+
+        decoded = Codec.decode(data, Order)
+
+        assert decoded.package.snapshot() == self.order.package.snapshot()
+        assert decoded.snapshot() == self.order.snapshot()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -11,6 +11,7 @@ import tempfile
 from unittest.mock import patch, MagicMock
 from PaymentArrangement import BillingTiming
 from Customer import Customer
+import Shards
 
 
 class TestCustomerInit:
@@ -25,17 +26,14 @@ class TestCustomerInit:
         # Mock the data path and OrdersHandler
         self.patcher_path = patch.object(Customer, '_Customer__DATA_PATH', str(self.test_dir))
         self.patcher_oh = patch('Customer.OrdersHandler')
-        self.patcher_cnt = patch.object(Customer, '_cnt', 0)
         
         self.patcher_path.start()
         self.patcher_oh.start()
-        self.patcher_cnt.start()
         
         yield
         
         self.patcher_path.stop()
         self.patcher_oh.stop()
-        self.patcher_cnt.stop()
     
     def test_customer_creation_basic(self):
         """Test basic customer creation with valid parameters."""
@@ -74,6 +72,15 @@ class TestCustomerInit:
         assert customer.ID[0] == "C"
         assert customer.ID[1:].isdigit()
     
+    def test_customers_get_distinct_ids(self):
+        """Test that consecutive customers are given consecutive IDs."""
+        first = Customer("A", "B", "Address", "123", "a@example.com", "pw",
+                         BillingTiming.in_advance)
+        second = Customer("C", "D", "Address", "456", "c@example.com", "pw",
+                          BillingTiming.in_advance)
+        
+        assert (first.ID, second.ID) == ("C00000", "C00001")
+    
     def test_phone_number_with_spaces(self):
         """Test that phone numbers with spaces are accepted."""
         customer = Customer(
@@ -126,11 +133,9 @@ class TestCustomerProperties:
         
         self.patcher_path = patch.object(Customer, '_Customer__DATA_PATH', str(self.test_dir))
         self.patcher_oh = patch('Customer.OrdersHandler')
-        self.patcher_cnt = patch.object(Customer, '_cnt', 0)
         
         self.patcher_path.start()
         self.patcher_oh.start()
-        self.patcher_cnt.start()
         
         self.customer = Customer(
             first_name="John",
@@ -146,7 +151,6 @@ class TestCustomerProperties:
         
         self.patcher_path.stop()
         self.patcher_oh.stop()
-        self.patcher_cnt.stop()
     
     def test_address_setter(self):
         """Test that address can be updated."""
@@ -177,11 +181,9 @@ class TestCustomerVerify:
         
         self.patcher_path = patch.object(Customer, '_Customer__DATA_PATH', str(self.test_dir))
         self.patcher_oh = patch('Customer.OrdersHandler')
-        self.patcher_cnt = patch.object(Customer, '_cnt', 0)
         
         self.patcher_path.start()
         self.patcher_oh.start()
-        self.patcher_cnt.start()
         
         self.customer = Customer(
             first_name="John",
@@ -197,7 +199,6 @@ class TestCustomerVerify:
         
         self.patcher_path.stop()
         self.patcher_oh.stop()
-        self.patcher_cnt.stop()
     
     def test_verify_correct_password(self):
         """Test verification with correct password returns True."""
@@ -223,11 +224,9 @@ class TestCustomerBillingPreference:
         
         self.patcher_path = patch.object(Customer, '_Customer__DATA_PATH', str(self.test_dir))
         self.patcher_oh = patch('Customer.OrdersHandler')
-        self.patcher_cnt = patch.object(Customer, '_cnt', 0)
         
         self.patcher_path.start()
         self.patcher_oh.start()
-        self.patcher_cnt.start()
         
         self.customer = Customer(
             first_name="John",
@@ -243,7 +242,6 @@ class TestCustomerBillingPreference:
         
         self.patcher_path.stop()
         self.patcher_oh.stop()
-        self.patcher_cnt.stop()
     
     def test_set_billing_pref_valid(self):
         """Test setting billing preference with valid BillingTiming."""
@@ -273,11 +271,9 @@ class TestCustomerStr:
         
         self.patcher_path = patch.object(Customer, '_Customer__DATA_PATH', str(self.test_dir))
         self.patcher_oh = patch('Customer.OrdersHandler')
-        self.patcher_cnt = patch.object(Customer, '_cnt', 0)
         
         self.patcher_path.start()
         self.patcher_oh.start()
-        self.patcher_cnt.start()
         
         self.customer = Customer(
             first_name="John",
@@ -293,7 +289,6 @@ class TestCustomerStr:
         
         self.patcher_path.stop()
         self.patcher_oh.stop()
-        self.patcher_cnt.stop()
     
     def test_str_contains_name(self):
         """Test that __str__ contains the customer's name."""
@@ -335,11 +330,9 @@ class TestCustomerOrderAccess:
         
         self.patcher_path = patch.object(Customer, '_Customer__DATA_PATH', str(self.test_dir))
         self.patcher_oh = patch('Customer.OrdersHandler', return_value=self.mock_oh)
-        self.patcher_cnt = patch.object(Customer, '_cnt', 5)
         
         self.patcher_path.start()
         self.patcher_oh.start()
-        self.patcher_cnt.start()
         
         self.customer = Customer(
             first_name="John",
@@ -355,7 +348,6 @@ class TestCustomerOrderAccess:
         
         self.patcher_path.stop()
         self.patcher_oh.stop()
-        self.patcher_cnt.stop()
     
     def test_my_orders_calls_filter_by_customer(self):
         """Test that my_orders calls OrdersHandler.filter_by_customer."""
@@ -367,6 +359,18 @@ class TestCustomerOrderAccess:
             self.customer.ID
         )
     
+    def test_filter_by_date_uses_handler_index(self):
+        """Test that filter_by_date queries the handler for this customer only."""
+        from datetime import date
+        self.mock_oh.filter_by_date.return_value = []
+        
+        self.customer.filter_by_date(date(2026, 1, 1), date(2026, 1, 31))
+        
+        self.mock_oh.filter_by_date.assert_called_once_with(
+            date(2026, 1, 1), date(2026, 1, 31), self.customer.ID
+        )
+        self.mock_oh.filter_by_customer.assert_not_called()
+    
     def test_get_order_access_allowed(self):
         """Test getting an order that belongs to this customer."""
         mock_order = MagicMock()
@@ -400,17 +404,14 @@ class TestCustomerPersistence:
         
         self.patcher_path = patch.object(Customer, '_Customer__DATA_PATH', str(self.test_dir))
         self.patcher_oh = patch('Customer.OrdersHandler')
-        self.patcher_cnt = patch.object(Customer, '_cnt', 0)
         
         self.patcher_path.start()
         self.patcher_oh.start()
-        self.patcher_cnt.start()
         
         yield
         
         self.patcher_path.stop()
         self.patcher_oh.stop()
-        self.patcher_cnt.stop()
     
     def test_save_creates_file(self):
         """Test that save() creates a pickle file."""
@@ -426,7 +427,7 @@ class TestCustomerPersistence:
         
         customer.save()
         
-        expected_file = self.test_dir / f"{customer.ID}.pkl"
+        expected_file = self.test_dir / Shards.shard_of(customer.ID) / f"{customer.ID}.pkl"
         assert expected_file.exists()
     
     def test_from_id_loads_customer(self):
@@ -467,17 +468,14 @@ class TestCustomerEmailIndex:
         
         self.patcher_path = patch.object(Customer, '_Customer__DATA_PATH', str(self.test_dir))
         self.patcher_oh = patch('Customer.OrdersHandler')
-        self.patcher_cnt = patch.object(Customer, '_cnt', 0)
         
         self.patcher_path.start()
         self.patcher_oh.start()
-        self.patcher_cnt.start()
         
         yield
         
         self.patcher_path.stop()
         self.patcher_oh.stop()
-        self.patcher_cnt.stop()
     
     def test_email_index_returns_empty_dict_when_no_file(self):
         """Test that email_index returns empty dict when index file doesn't exist."""
@@ -518,6 +516,17 @@ class TestCustomerEmailIndex:
         assert loaded.ID == customer.ID
         assert loaded.email == "loadme@example.com"
     
+    def test_duplicate_email_raises_error(self):
+        """Test that registering an email twice raises ValueError."""
+        Customer("A", "B", "Address", "123", "dup@example.com", "pw",
+                 BillingTiming.in_advance)
+        
+        with pytest.raises(ValueError, match="already registered"):
+            Customer("C", "D", "Address", "456", "dup@example.com", "pw",
+                     BillingTiming.in_advance)
+        
+        assert Customer.email_index() == {"dup@example.com": "C00000"}
+    
     def test_from_email_nonexistent_raises_error(self):
         """Test that from_email raises ValueError for non-existent email."""
         with pytest.raises(ValueError, match="No customer with email"):
@@ -536,11 +545,9 @@ class TestCustomerOrders:
         self.mock_oh = MagicMock()
         self.patcher_path = patch.object(Customer, '_Customer__DATA_PATH', str(self.test_dir))
         self.patcher_oh = patch('Customer.OrdersHandler', return_value=self.mock_oh)
-        self.patcher_cnt = patch.object(Customer, '_cnt', 0)
         
         self.patcher_path.start()
         self.patcher_oh.start()
-        self.patcher_cnt.start()
         
         # Create a test customer
         self.customer = Customer(
@@ -557,7 +564,6 @@ class TestCustomerOrders:
         
         self.patcher_path.stop()
         self.patcher_oh.stop()
-        self.patcher_cnt.stop()
     
     def test_my_orders_calls_filter_by_customer(self):
         """Test that my_orders() calls OrdersHandler.filter_by_customer with customer ID."""
@@ -616,11 +622,9 @@ class TestCustomerBilling:
         self.mock_oh = MagicMock()
         self.patcher_path = patch.object(Customer, '_Customer__DATA_PATH', str(self.test_dir))
         self.patcher_oh = patch('Customer.OrdersHandler', return_value=self.mock_oh)
-        self.patcher_cnt = patch.object(Customer, '_cnt', 0)
         
         self.patcher_path.start()
         self.patcher_oh.start()
-        self.patcher_cnt.start()
         
         # Create a test customer
         self.customer = Customer(
@@ -637,7 +641,6 @@ class TestCustomerBilling:
         
         self.patcher_path.stop()
         self.patcher_oh.stop()
-        self.patcher_cnt.stop()
     
     def test_bill_creates_new_bill_in_advance(self):
         """Test that bill() creates a new Bill when billing_pref is in_advance."""
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+Test suite for Distance.py
+
+@author: laisz
+"""
+import pytest
+import random
+import numpy as np
+from unittest.mock import patch
+import Distance
+from Distance import DistanceModel, haversine
+from Registry import Registry
+from Location import Repository, Destination
+from Order import Order, Service
+from Quote import quote_orders
+from PaymentArrangement import BillingTiming
+
+TAIPEI = (25.0478, 121.5170)
+TAICHUNG = (24.1367, 120.6850)
+KAOHSIUNG = (22.6394, 120.3020)
+
+
+def random_point(rng: random.Random) -> tuple[float, float]:
+    """Get a point in and around Taiwan."""
+    return (round(rng.uniform(21.5, 26.5), 6), round(rng.uniform(119.0, 122.5), 6))
+
+
+class TestHaversine:
+    """Tests for the great-circle distance."""
+
+    def test_known_distance(self):
+        """Test the distance between Taipei and Kaohsiung."""
+        assert haversine(*TAIPEI, *KAOHSIUNG) == pytest.approx(295, abs=1)
+
+    def test_symmetric_and_zero(self):
+        """Test that the distance does not depend on the direction."""
+        assert haversine(*TAIPEI, *TAICHUNG) == haversine(*TAICHUNG, *TAIPEI)
+        assert haversine(*TAIPEI, *TAIPEI) == 0
+
+    def test_broadcasts(self):
+        """Test that one point is compared with many."""
+        kms = haversine(*TAIPEI, [TAICHUNG[0], KAOHSIUNG[0]], [TAICHUNG[1], KAOHSIUNG[1]])
+
+        assert kms.shape == (2,)
+        assert kms[1] == haversine(*TAIPEI, *KAOHSIUNG)
+
+
+class TestDistanceModel:
+    """Tests for pricing distances between locations."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Use an empty registry with three hubs."""
+        with patch.object(Registry, '_instance', None):
+            self.hubs = [Repository("Taipei", "North", TAIPEI),
+                         Repository("Taichung", "Central", TAICHUNG),
+                         Repository("Kaohsiung", "South", KAOHSIUNG)]
+            yield
+
+    def test_matrix_holds_hub_distances(self):
+        """Test that the matrix is filled once for every pair of hubs."""
+        model = DistanceModel(self.hubs)
+
+        assert model.matrix.shape == (3, 3)
+        assert model.matrix[0, 2] == haversine(*TAIPEI, *KAOHSIUNG)
+        assert np.diag(model.matrix).tolist() == [0, 0, 0]
+
+    def test_hubs_without_coordinates_are_left_out(self):
+        """Test that only repositories with coordinates become hubs."""
+        model = DistanceModel(self.hubs + [Repository("Nowhere", "Unknown")])
+
+        assert len(model.hubs) == 3
+
+    def test_nearest_hub_matches_brute_force(self):
+        """Test that the grid search finds the nearest hub."""
+        rng = random.Random(3)
+        hubs = [Repository(f"Hub {n}", f"H{n}", random_point(rng)) for n in range(40)]
+        model = DistanceModel(hubs, grid_degrees=0.25)
+
+        for point in [random_point(rng) for _ in range(300)] + [(10.0, 100.0), (40.0, 140.0)]:
+            kms = [float(haversine(*point, *hub.coordinates)) for hub in model.hubs]
+            assert model.nearest_hub(point) == kms.index(min(kms))
+
+    def test_route_passes_nearest_hubs(self):
+        """Test that the route runs through the hubs nearest to both ends."""
+        model = DistanceModel(self.hubs)
+        keelung, tainan = (25.1283, 121.7419), (22.9971, 120.2126)
+
+        expected = (haversine(*keelung, *TAIPEI) + haversine(*TAIPEI, *KAOHSIUNG)
+                    + haversine(*KAOHSIUNG, *tainan))
+
+        assert model.route_km(keelung, tainan) == pytest.approx(float(expected))
+
+    def test_route_without_hubs_is_direct(self):
+        """Test that the direct distance is used if there are no hubs."""
+        model = DistanceModel([])
+
+        assert model.route_km(TAIPEI, KAOHSIUNG) == float(haversine(*TAIPEI, *KAOHSIUNG))
+
+    def test_factor_grows_with_distance(self):
+        """Test that a longer route gives a larger factor."""
+        model = DistanceModel(self.hubs)
+        taipei = Destination("Taipei 101", (25.0340, 121.5645)).key
+
+        near = model.factor("R:North", taipei)
+        far = model.factor("R:South", taipei)
+
+        assert 1 < near < far
+        assert far == 1 + round(model.route_km(KAOHSIUNG, (25.0340, 121.5645)), 1) \
+            / Distance.FACTOR_KM
+
+    def test_unknown_coordinates_give_one(self):
+        """Test that the factor is 1 if either end has no coordinates."""
+        model = DistanceModel(self.hubs)
+
+        assert model.factor("R:North", Destination("Somewhere").key) == 1.0
+
+    def test_factor_is_cached(self):
+        """Test that a pair is only priced once, in a bounded cache."""
+        model = DistanceModel(self.hubs, cache_size=2)
+        keys = [Destination(f"D{n}", (23.0 + n / 10, 121.0)).key for n in range(3)]
+
+        with patch.object(model, 'route_km', wraps=model.route_km) as route_km:
+            model.factor("R:North", keys[0])
+            model.factor("R:North", keys[0])
+            assert route_km.call_count == 1
+
+        model.factor("R:North", keys[1])
+        model.factor("R:North", keys[2])
+        assert model.cache_stats()['size'] == 2
+        assert model.cache_stats()['evictions'] == 1
+
+    def test_batch_factors_match_single_ones(self):
+        """Test that factors() gives exactly the factors of factor()."""
+        rng = random.Random(11)
+        model = DistanceModel(self.hubs + [Repository(f"Hub {n}", f"H{n}", random_point(rng))
+                                           for n in range(10)])
+        origins = [random_point(rng) for _ in range(200)]
+        destinations = [random_point(rng) for _ in range(200)]
+
+        factors = model.factors(origins, destinations)
+
+        assert factors.tolist() == [model.factor(Destination("o", o).key, Destination("d", d).key)
+                                    for o, d in zip(origins, destinations)]
+
+    def test_batch_factors_of_unknown_coordinates(self):
+        """Test that rows with NaN coordinates get a factor of 1."""
+        model = DistanceModel(self.hubs)
+
+        factors = model.factors([TAIPEI, (np.nan, np.nan)], [KAOHSIUNG, KAOHSIUNG])
+
+        assert factors[0] > 1
+        assert factors[1] == 1
+
+    def test_current_model_follows_repositories(self):
+        """Test that the shared model is rebuilt once a repository is added."""
+        model = DistanceModel.current()
+        assert DistanceModel.current() is model
+        assert len(model.hubs) == 3
+
+        Repository("Hualien", "East", (23.9930, 121.6011))
+
+        assert len(DistanceModel.current().hubs) == 4
+
+
+class TestPricing:
+    """Tests for the distance factor in order fees."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Use an empty registry with three hubs and a temporary order directory."""
+        with patch.object(Registry, '_instance', None), \
+             patch.object(Order, '_Order__DATA_PATH', str(tmp_path)):
+            Repository("Taipei", "North", TAIPEI)
+            Repository("Taichung", "Central", TAICHUNG)
+            Repository("Kaohsiung", "South", KAOHSIUNG)
+            yield
+
+    def make_order(self, origin, destination, service=Service.express) -> Order:
+        """Build an order between two destinations."""
+        return Order("C00001", BillingTiming.in_advance, service, origin, destination,
+                     "S001", False, (10, 10, 10), 1.0, 100.0, "", False, False)
+
+    def test_fee_includes_distance(self):
+        """Test that a farther destination costs more."""
+        origin = Destination("Taipei Main", TAIPEI)
+        near = self.make_order(origin, Destination("Banqiao", (25.0143, 121.4672)))
+        far = self.make_order(origin, Destination("Tainan", (22.9971, 120.2126)))
+
+        assert near.calc_fee() < far.calc_fee()
+        assert far.calc_fee() == Service.express.value * Distance.factor(
+            origin.key, far.destination.key) + 120
+
+    def test_fee_without_coordinates_is_unchanged(self):
+        """Test that orders without coordinates are priced as before."""
+        order = self.make_order(Destination("Origin"), Destination("Dest"))
+
+        assert order.calc_fee() == Service.express.value + 120
+
+    def test_coordinates_survive_reload(self):
+        """Test that a reloaded order is priced with the same coordinates."""
+        order = self.make_order(Destination("Taipei Main", TAIPEI),
+                                Destination("Tainan", (22.9971, 120.2126)))
+        order.save()
+
+        with patch.object(Registry, '_instance', None):
+            Repository("Taipei", "North", TAIPEI)
+            Repository("Taichung", "Central", TAICHUNG)
+            Repository("Kaohsiung", "South", KAOHSIUNG)
+            loaded = Order.from_ID(order.ID)
+
+            assert loaded.destination.coordinates == (22.9971, 120.2126)
+            assert loaded.calc_fee() == order.calc_fee()
+
+    def test_unregistered_repository_gives_one(self):
+        """Test that an order from a repository not created in this process is still priced."""
+        order = self.make_order(Repository("Hsinchu", "North", (24.8016, 120.9716)),
+                                Destination("Tainan", (22.9971, 120.2126)))
+        order.save()
+
+        with patch.object(Registry, '_instance', None):
+            loaded = Order.from_ID(order.ID)
+
+            assert Distance.factor(loaded.origin_key, loaded.destination_key) == 1.0
+            assert loaded.calc_fee() == Service.express.value + 120
+            assert quote_orders([loaded]).fees.tolist() == [loaded.calc_fee()]
+
+    def test_batch_quotes_match_calc_fee(self):
+        """Test that batch quotes include the same distance factors."""
+        rng = random.Random(5)
+        orders = [self.make_order(Destination(f"O{n}", random_point(rng)),
+                                  Destination(f"D{n}", random_point(rng)), rng.choice(list(Service)))
+                  for n in range(100)]
+        orders.append(self.make_order(Destination("Origin"), Destination("Dest")))
+
+        assert quote_orders(orders).fees.tolist() == [order.calc_fee() for order in orders]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Test suite for EmailIndex.py
+
+@author: laisz
+"""
+import pytest
+import json
+from concurrent.futures import ThreadPoolExecutor
+from EmailIndex import EmailIndex
+
+
+class TestEmailIndex:
+    """Tests for registering and looking up emails."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Setup an index in a temporary directory."""
+        self.path = str(tmp_path / "email_index.sqlite3")
+        self.index = EmailIndex(self.path)
+        yield
+        self.index.close()
+
+    def test_add_and_get(self):
+        """Test that a registered email maps to its customer ID."""
+        self.index.add("a@example.com", "C00001")
+
+        assert self.index.get("a@example.com") == "C00001"
+        assert "a@example.com" in self.index
+        assert len(self.index) == 1
+
+    def test_unknown_email(self):
+        """Test that an unknown email returns the default."""
+        assert self.index.get("nobody@example.com") is None
+        assert self.index.get("nobody@example.com", "") == ""
+        assert "nobody@example.com" not in self.index
+
+    def test_duplicate_email_raises_error(self):
+        """Test that registering an email twice raises ValueError."""
+        self.index.add("a@example.com", "C00001")
+
+        with pytest.raises(ValueError, match="already registered"):
+            self.index.add("a@example.com", "C00002")
+        assert self.index.get("a@example.com") == "C00001"
+
+    def test_entries_persist(self):
+        """Test that entries are visible to a newly opened index."""
+        self.index.add("a@example.com", "C00001")
+        self.index.add("b@example.com", "C00002")
+
+        reopened = EmailIndex(self.path)
+
+        assert reopened.items() == [("a@example.com", "C00001"),
+                                    ("b@example.com", "C00002")]
+        reopened.close()
+
+    def test_repeated_lookups_are_cached(self):
+        """Test that repeated lookups are served from the read cache."""
+        self.index.add("a@example.com", "C00001")
+        self.index.get("a@example.com")
+        self.index.get("a@example.com")
+
+        assert self.index._cache.hits == 2
+
+    def test_registration_elsewhere_is_found(self):
+        """Test that a miss is not cached, so later registrations are found."""
+        other = EmailIndex(self.path)
+        assert self.index.get("a@example.com") is None
+
+        other.add("a@example.com", "C00001")
+
+        assert self.index.get("a@example.com") == "C00001"
+        other.close()
+
+    def test_concurrent_registrations(self):
+        """Test that threads sharing the connection all register their emails."""
+        def register(start: int) -> None:
+            for n in range(start, start + 50):
+                self.index.add(f"u{n}@example.com", f"C{n:05d}")
+                assert self.index.get(f"u{n}@example.com") == f"C{n:05d}"
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(register, range(0, 200, 50)))
+
+        assert len(self.index) == 200
+
+
+class TestEmailIndexLegacy:
+    """Tests for importing an email_index.json."""
+
+    def test_legacy_index_is_imported(self, tmp_path):
+        """Test that the entries of email_index.json are imported."""
+        legacy_path = tmp_path / "email_index.json"
+        with open(legacy_path, 'w', encoding='utf-8') as f:
+            json.dump({"a@example.com": "C00001"}, f)
+
+        index = EmailIndex(str(tmp_path / "email_index.sqlite3"), str(legacy_path))
+
+        assert index.get("a@example.com") == "C00001"
+        index.close()
+
+    def test_legacy_index_ignored_when_not_empty(self, tmp_path):
+        """Test that an index with entries is not overwritten."""
+        path = str(tmp_path / "email_index.sqlite3")
+        index = EmailIndex(path)
+        index.add("b@example.com", "C00002")
+        index.close()
+        legacy_path = tmp_path / "email_index.json"
+        with open(legacy_path, 'w', encoding='utf-8') as f:
+            json.dump({"a@example.com": "C00001"}, f)
+
+        index = EmailIndex(path, str(legacy_path))
+
+        assert index.items() == [("b@example.com", "C00002")]
+        index.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Test suite for EventStore.py
+
+@author: laisz
+"""
+import pytest
+from os.path import getsize
+from EventStore import EventStore, InternTable
+from Entry import Arrival, Transit, OtherEvent
+from Location import Destination
+from Vehicle import Minivan
+from Codec import to_micros
+import Shards
+
+
+class TestInternTable:
+    """Tests for numbering interned values."""
+
+    def test_values_are_numbered_in_order(self, tmp_path):
+        """Test that new values get consecutive numbers."""
+        table = InternTable(str(tmp_path / "strings.jsonl"))
+
+        assert [table.intern("S001"), table.intern("D:Dest"), table.intern("S001")] == [0, 1, 0]
+        assert table.value(1) == "D:Dest"
+
+    def test_numbers_are_shared_between_tables(self, tmp_path):
+        """Test that a table sees the values interned by another one."""
+        path = str(tmp_path / "strings.jsonl")
+        first = InternTable(path)
+        second = InternTable(path)
+
+        first.intern("a")
+        assert second.intern("b") == 1
+        assert first.value(1) == "b"
+        assert first.intern("b") == 1
+
+    def test_non_string_values_keep_their_type(self, tmp_path):
+        """Test that values are stored as JSON, so numbers stay numbers."""
+        table = InternTable(str(tmp_path / "strings.jsonl"))
+
+        assert table.value(table.intern(2143)) == 2143
+        assert table.intern("2143") != table.intern(2143)
+
+
+class TestEventStore:
+    """Tests for appending and reading entries."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Setup a store in a temporary directory."""
+        self.store = EventStore(str(tmp_path))
+        self.path = Shards.path_of(str(tmp_path), "O1", ".evt")
+
+    def test_entries_round_trip(self):
+        """Test that every entry type is read back with its fields."""
+        arrival = Arrival("S001", Destination("Dest"))
+        transit = Transit("S002", Minivan("EVT-0001"), Destination("Origin"),
+                          Destination("Dest"))
+        event = OtherEvent("S003", "Damage Reported", "Crushed")
+        for entry in (arrival, transit, event):
+            self.store.append("O1", entry)
+
+        loaded = self.store.all("O1")
+
+        assert [type(entry) for entry in loaded] == [Arrival, Transit, OtherEvent]
+        assert [entry.time_stamp for entry in loaded] == [arrival.time_stamp,
+                                                         transit.time_stamp,
+                                                         event.time_stamp]
+        assert loaded[0].destination.address == "Dest"
+        assert loaded[1].vehicle.license_plate == "EVT-0001"
+        assert loaded[1].signature == "S002"
+        assert loaded[2].detail == "Crushed"
+
+    def test_records_have_fixed_size(self):
+        """Test that each entry adds one fixed-size record."""
+        self.store.append("O1", OtherEvent("S001", "Inspected"))
+        size = getsize(self.path)
+        self.store.append("O1", OtherEvent("S001", "A much longer summary than before"))
+
+        assert getsize(self.path) == 2 * size
+        assert self.store.count("O1") == 2
+
+    def test_tail_reads_last_entries(self):
+        """Test that tail returns the last n entries, oldest first."""
+        for n in range(5):
+            self.store.append("O1", OtherEvent("S001", f"Scan {n}"))
+
+        assert [entry.summary for entry in self.store.tail("O1", 2)] == ["Scan 3", "Scan 4"]
+        assert len(self.store.tail("O1", 10)) == 5
+
+    def test_unknown_order_has_no_entries(self):
+        """Test that an order without an event file has no entries."""
+        assert self.store.count("O9") == 0
+        assert self.store.tail("O9", 3) == []
+
+    def test_torn_record_is_cut(self):
+        """Test that a partly written record is ignored and then replaced."""
+        self.store.append("O1", OtherEvent("S001", "First"))
+        with open(self.path, 'ab') as f:
+            f.write(b"\x02\x00\x00")
+
+        assert self.store.count("O1") == 1
+        self.store.append("O1", OtherEvent("S001", "Second"))
+
+        assert [entry.summary for entry in self.store.all("O1")] == ["First", "Second"]
+
+    def test_free_text_is_not_interned(self, tmp_path):
+        """Test that event text goes to the order's text file, and keys to the table."""
+        self.store.append("O1", OtherEvent("S001", "Damage Reported", "Crushed corner"))
+        self.store.append("O2", OtherEvent("S001", "Damage Reported", "Torn label"))
+
+        strings = (tmp_path / "strings.jsonl").read_text(encoding='utf-8')
+        assert strings.split() == ['"S001"']
+        assert [entry.detail for entry in self.store.all("O2")] == ["Torn label"]
+        assert [entry.summary for entry in EventStore(str(tmp_path)).all("O1")] == [
+            "Damage Reported"]
+
+    def test_interned_text_is_still_read(self):
+        """Test that events written with interned text are read back."""
+        event = OtherEvent("S001", "Inspected", "Seal intact")
+        strings = self.store._strings
+        record = EventStore._RECORD.pack(
+            EventStore._TYPES.index(OtherEvent), to_micros(event.time_stamp),
+            strings.intern("S001"), strings.intern("Inspected"), strings.intern("Seal intact"),
+            EventStore._NONE)
+        with open(self.path, 'ab') as f:
+            f.write(record)
+        self.store.append("O1", OtherEvent("S001", "Weighed"))
+
+        assert [(entry.summary, entry.detail) for entry in self.store.all("O1")] == [
+            ("Inspected", "Seal intact"), ("Weighed", "Weighed")]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Test suite for IDAllocator.py
+
+@author: laisz
+"""
+import pytest
+import multiprocessing
+from unittest.mock import patch
+from IDAllocator import IDAllocator
+from Storage import StorageBackend
+
+
+def allocate(directory: str, count: int) -> list[int]:
+    """Allocate numbers in a separate process."""
+    allocator = IDAllocator(directory, "O", block_size=4)
+    return [allocator.next() for _ in range(count)]
+
+
+class TestIDAllocator:
+    """Tests for leasing and allocating numbers."""
+
+    def test_numbers_are_sequential(self, tmp_path):
+        """Test that a single allocator counts up from zero."""
+        allocator = IDAllocator(str(tmp_path), "O", block_size=4)
+
+        assert [allocator.next() for _ in range(6)] == [0, 1, 2, 3, 4, 5]
+
+    def test_counter_starts_after_existing_files(self, tmp_path):
+        """Test that the first lease skips the numbers of existing files."""
+        (tmp_path / "C00007.pkl").touch()
+        (tmp_path / "C00002.pkl").touch()
+        (tmp_path / "email_index.sqlite3").touch()
+
+        assert IDAllocator(str(tmp_path), "C").next() == 8
+
+    @pytest.mark.parametrize("name", ["sqlite", "memory"])
+    def test_counter_starts_after_ids_of_any_backend(self, tmp_path, name):
+        """Test that the IDs stored by the configured backend are skipped."""
+        with patch('Storage.get_backend_name', return_value=name):
+            backend = StorageBackend.of(str(tmp_path))
+            backend.put_many({"O0000000000011": b"x", "O0000000000004": b"y"})
+
+            assert IDAllocator(str(tmp_path), "O").next() == 12
+        backend.close()
+
+    def test_allocators_lease_disjoint_blocks(self, tmp_path):
+        """Test that two allocators on one directory never collide."""
+        first = IDAllocator(str(tmp_path), "O", block_size=4)
+        second = IDAllocator(str(tmp_path), "O", block_size=4)
+
+        numbers = [first.next(), second.next(), first.next(), second.next()]
+
+        assert numbers == [0, 4, 1, 5]
+
+    def test_counter_survives_restart(self, tmp_path):
+        """Test that a new allocator starts after the last leased block."""
+        IDAllocator(str(tmp_path), "S", block_size=4).next()
+
+        assert IDAllocator(str(tmp_path), "S", block_size=4).next() == 4
+
+    def test_prefixes_are_counted_separately(self, tmp_path):
+        """Test that each prefix has its own counter."""
+        assert IDAllocator(str(tmp_path), "C").next() == 0
+        assert IDAllocator(str(tmp_path), "S").next() == 0
+
+    def test_of_returns_shared_allocator(self, tmp_path):
+        """Test that of() returns one allocator per directory and prefix."""
+        assert IDAllocator.of(str(tmp_path), "O") is IDAllocator.of(str(tmp_path), "O")
+        assert IDAllocator.of(str(tmp_path), "O") is not IDAllocator.of(str(tmp_path), "C")
+
+    def test_processes_never_collide(self, tmp_path):
+        """Test that numbers allocated by several processes are unique."""
+        with multiprocessing.get_context("spawn").Pool(4) as pool:
+            results = pool.starmap(allocate, [(str(tmp_path), 25)] * 4)
+
+        numbers = [number for result in results for number in result]
+        assert len(set(numbers)) == 100
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -5,9 +5,12 @@ Test suite for Order.py
 @author: Generated by Antigravity
 """
 import pytest
+import pickle
+import os
 from unittest.mock import patch, MagicMock, PropertyMock
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
+import Shards
 
 
 class TestServiceEnum:
@@ -43,6 +46,7 @@ class TestSizeClassEnum:
         assert SizeClass.small_box.value == 120
         assert SizeClass.medium_box.value == 250
         assert SizeClass.big_box.value == 450
+        assert SizeClass.oversize.value == 900
 
 
 class TestWeightClassEnum:
@@ -56,6 +60,7 @@ class TestWeightClassEnum:
         assert WeightClass.light.value == 120
         assert WeightClass.heavy.value == 250
         assert WeightClass.extra_heavy.value == 450
+        assert WeightClass.overweight.value == 900
 
 
 class TestStatusEnum:
@@ -84,15 +89,12 @@ class TestOrderCreation:
         self.test_dir.mkdir()
         
         self.patcher_path = patch.object(Order, '_Order__DATA_PATH', str(self.test_dir))
-        self.patcher_cnt = patch.object(Order, '_Order__order_cnt', 0)
         
         self.patcher_path.start()
-        self.patcher_cnt.start()
         
         yield
         
         self.patcher_path.stop()
-        self.patcher_cnt.stop()
     
     def test_order_creation_basic(self):
         """Test basic Order creation."""
@@ -186,15 +188,12 @@ class TestOrderCalcFee:
         self.test_dir.mkdir()
         
         self.patcher_path = patch.object(Order, '_Order__DATA_PATH', str(self.test_dir))
-        self.patcher_cnt = patch.object(Order, '_Order__order_cnt', 0)
         
         self.patcher_path.start()
-        self.patcher_cnt.start()
         
         yield
         
         self.patcher_path.stop()
-        self.patcher_cnt.stop()
     
     def test_calc_fee_basic(self):
         """Test basic fee calculation."""
@@ -255,6 +254,60 @@ class TestOrderCalcFee:
                        (1, 1, 1), 1.0, 10.0, "", False, True)
         
         assert order2.fee == order1.fee + 100
+    
+    def test_oversize_and_overweight_are_priced(self):
+        """Test that packages beyond the other classes get a fee."""
+        from Order import Order, Service, SizeClass, WeightClass
+        from PaymentArrangement import BillingTiming
+        from Location import Destination
+        
+        order = Order("C00001", BillingTiming.in_advance, Service.economy,
+                      Destination("Origin"), Destination("Dest"), "S001", False,
+                      (100, 50, 10), 45.0, 10.0, "", False, False)
+        
+        assert order.size_class is SizeClass.oversize
+        assert order.weight_class is WeightClass.overweight
+        assert order.fee == Service.economy.value + 900
+    
+    def test_classes_are_worked_out_once(self):
+        """Test that the classes are kept as codes, not recomputed."""
+        from Order import Order, Service, SizeClass, WeightClass
+        from PaymentArrangement import BillingTiming
+        from Location import Destination
+        
+        order = Order("C00001", BillingTiming.in_advance, Service.economy,
+                      Destination("Origin"), Destination("Dest"), "S001", False,
+                      (30, 30, 20), 4.0, 10.0, "", True, False)
+        
+        with patch('Tariff.Tariff.size_code') as size_code, \
+             patch('Tariff.Tariff.weight_code') as weight_code:
+            assert order.size_class is SizeClass.small_box
+            assert order.weight_class is WeightClass.light
+            order.calc_fee()
+            size_code.assert_not_called()
+            weight_code.assert_not_called()
+        assert order.package_class.snapshot() == (1, 1, True, False)
+    
+    def test_schema_3_is_classified_on_access(self):
+        """Test that orders saved without class codes are classified once read."""
+        import Codec
+        from Order import Order, Service, SizeClass
+        from PaymentArrangement import BillingTiming
+        from Location import Destination
+        
+        order = Order("C00001", BillingTiming.in_advance, Service.economy,
+                      Destination("Origin"), Destination("Dest"), "S001", False,
+                      (50, 30, 20), 1.0, 10.0, "", False, True)
+        snapshot = order.snapshot()
+        del snapshot['package_class']
+        data = Codec.MAGIC + bytes([Codec.FORMAT_VERSION, 3]) \
+            + Codec.pack("Order") + Codec.pack(snapshot)
+        
+        decoded = Codec.decode(data, Order)
+        
+        assert decoded.size_class is SizeClass.medium_box
+        assert decoded.package_class == order.package_class
+        assert decoded.calc_fee() == order.calc_fee()
 
 
 class TestOrderLogging:
@@ -269,15 +322,12 @@ class TestOrderLogging:
         self.test_dir.mkdir()
         
         self.patcher_path = patch.object(Order, '_Order__DATA_PATH', str(self.test_dir))
-        self.patcher_cnt = patch.object(Order, '_Order__order_cnt', 0)
         
         self.patcher_path.start()
-        self.patcher_cnt.start()
         
         yield
         
         self.patcher_path.stop()
-        self.patcher_cnt.stop()
     
     def test_order_has_initial_log(self):
         """Test that new order has an initial Arrival log."""
@@ -317,6 +367,220 @@ class TestOrderLogging:
         assert last == all_logs[-1]
 
 
+class TestOrderDirtyTracking:
+    """Tests for tracking unsaved changes."""
+    
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Setup test fixtures."""
+        from Order import Order, Service
+        from PaymentArrangement import BillingTiming
+        from Location import Destination
+        
+        self.test_dir = tmp_path / "orders"
+        self.test_dir.mkdir()
+        
+        self.patcher_path = patch.object(Order, '_Order__DATA_PATH', str(self.test_dir))
+        
+        self.patcher_path.start()
+        
+        self.order = Order("C00001", BillingTiming.in_advance, Service.economy,
+                           Destination("Origin"), Destination("Dest"), "S001", False,
+                           (1, 1, 1), 1.0, 10.0, "", False, False)
+        
+        yield
+        
+        self.patcher_path.stop()
+    
+    def test_new_order_is_dirty(self):
+        """Test that an order that was never saved is dirty."""
+        assert self.order.is_dirty
+    
+    def test_save_marks_clean(self):
+        """Test that saving clears the dirty flag and reports the size."""
+        written = self.order.save()
+        
+        assert not self.order.is_dirty
+        assert written == os.path.getsize(Shards.locate(str(self.test_dir), self.order.ID))
+    
+    def test_loaded_order_is_clean(self):
+        """Test that an order loaded from storage is clean."""
+        from Order import Order
+        
+        self.order.save()
+        
+        assert not Order.from_ID(self.order.ID).is_dirty
+    
+    def test_mutations_mark_dirty(self):
+        """Test that new_log, billing and bill_timing mark the order dirty."""
+        from PaymentArrangement import BillingTiming
+        
+        self.order.save()
+        self.order.new_log('X', "S001", "Inspected")
+        assert self.order.is_dirty
+        
+        self.order.save()
+        self.order.billing("B000010000")
+        assert self.order.is_dirty
+        
+        self.order.save()
+        self.order.bill_timing = BillingTiming.monthly
+        assert self.order.is_dirty
+    
+    def test_reading_does_not_mark_dirty(self):
+        """Test that reading fields leaves the order clean."""
+        self.order.save()
+        
+        self.order.fee
+        self.order.all_logs()
+        
+        assert not self.order.is_dirty
+    
+    def test_mark_delayed(self):
+        """Test that mark_delayed only flags orders still in transit."""
+        from Order import Status
+        
+        self.order.save()
+        self.order.mark_delayed()
+        assert self.order.status == Status.delayed
+        assert self.order.is_dirty
+        
+        self.order.new_log('A', "S001", self.order.destination)
+        self.order.mark_delayed()
+        assert self.order.status == Status.delivered
+
+
+class TestOrderJournal:
+    """Tests for reporting and replaying changes."""
+    
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Setup test fixtures."""
+        from Order import Order, Service
+        from PaymentArrangement import BillingTiming
+        from Location import Destination
+        
+        self.patcher_path = patch.object(Order, '_Order__DATA_PATH', str(tmp_path))
+        self.patcher_path.start()
+        
+        self.order = Order("C00001", BillingTiming.in_advance, Service.economy,
+                           Destination("Origin"), Destination("Dest"), "S001", False,
+                           (1, 1, 1), 1.0, 10.0, "", False, False)
+        self.copy = pickle.loads(pickle.dumps(self.order))
+        self.records = []
+        self.order.attach_journal(lambda order_ID, record: self.records.append(record))
+        
+        yield
+        
+        self.patcher_path.stop()
+    
+    def test_changes_are_reported(self):
+        """Test that every mutation reports a record to the journal."""
+        from PaymentArrangement import BillingTiming
+        
+        self.order.new_log('C', "S001", "Damage Reported", "Crushed")
+        self.order.billing("B000010000")
+        self.order.bill_timing = BillingTiming.monthly
+        
+        assert [record[0] for record in self.records] == ['entry', 'bill_ref', 'bill_timing']
+    
+    def test_records_replay_onto_saved_copy(self):
+        """Test that applying the records brings a saved copy up to date."""
+        from Order import Status
+        from Location import Destination
+        
+        self.order.new_log('A', "S002", Destination("Dest"))
+        self.order.billing("B000010000")
+        for record in self.records:
+            self.copy.apply(record)
+        
+        assert self.copy.status == Status.delivered
+        assert len(self.copy.all_logs()) == 2
+        assert self.copy.bill_ref == "B000010000"
+        assert self.copy.is_dirty
+    
+    def test_replay_twice_adds_nothing(self):
+        """Test that a record the order already has is ignored."""
+        self.order.new_log('X', "S001", "Inspected")
+        
+        for record in self.records * 2:
+            self.copy.apply(record)
+        
+        assert len(self.copy.all_logs()) == 2
+    
+    def test_journal_is_not_saved(self):
+        """Test that a pickled order does not keep its journal."""
+        loaded = pickle.loads(pickle.dumps(self.order))
+        loaded.new_log('X', "S001", "Inspected")
+        
+        assert self.records == []
+
+
+class TestOrderEvents:
+    """Tests for keeping tracking entries in the event store."""
+    
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Setup test fixtures."""
+        from Order import Order, Service
+        from PaymentArrangement import BillingTiming
+        from Location import Destination
+        
+        self.patcher_path = patch.object(Order, '_Order__DATA_PATH', str(tmp_path))
+        self.patcher_path.start()
+        
+        self.order = Order("C00001", BillingTiming.in_advance, Service.economy,
+                           Destination("Origin"), Destination("Dest"), "S001", False,
+                           (1, 1, 1), 1.0, 10.0, "", False, False)
+        
+        yield
+        
+        self.patcher_path.stop()
+    
+    def test_entries_are_not_pickled(self):
+        """Test that adding entries does not grow the pickled order."""
+        size = len(pickle.dumps(self.order))
+        for n in range(20):
+            self.order.new_log('X', "S001", f"Scan {n}")
+        
+        assert len(pickle.dumps(self.order)) == size
+    
+    def test_loaded_order_reads_entries(self):
+        """Test that an unpickled order finds its entries in the event store."""
+        self.order.new_log('X', "S001", "Inspected")
+        
+        loaded = pickle.loads(pickle.dumps(self.order))
+        
+        assert [type(entry).__name__ for entry in loaded.all_logs()] == ['Arrival', 'OtherEvent']
+        assert loaded.last_log().summary == "Inspected"
+    
+    def test_earlier_logs_reads_only_the_tail(self):
+        """Test that earlier_logs does not load every entry of the order."""
+        from EventStore import EventStore
+        for n in range(5):
+            self.order.new_log('X', "S001", f"Scan {n}")
+        loaded = pickle.loads(pickle.dumps(self.order))
+        
+        with patch.object(EventStore, 'all', side_effect=AssertionError("read all")):
+            result = loaded.earlier_logs(2)
+        
+        assert [entry.summary for entry in result] == ["Scan 3", "Scan 4"]
+    
+    def test_legacy_entries_are_moved(self):
+        """Test that entries pickled by older versions are moved to the event store."""
+        from Entry import OtherEvent
+        from Order import Order
+        state = self.order.__getstate__()
+        state['_ID'] = "O0000000009999"
+        state['_log'] = [OtherEvent("S001", "Legacy")]
+        legacy = Order.__new__(Order)
+        
+        legacy.__setstate__(state)
+        
+        assert [entry.summary for entry in legacy.all_logs()] == ["Legacy"]
+        assert '_log' not in legacy.__getstate__()
+
+
 class TestOrderPersistence:
     """Tests for Order save and from_ID methods."""
     
@@ -329,15 +593,12 @@ class TestOrderPersistence:
         self.test_dir.mkdir()
         
         self.patcher_path = patch.object(Order, '_Order__DATA_PATH', str(self.test_dir))
-        self.patcher_cnt = patch.object(Order, '_Order__order_cnt', 0)
         
         self.patcher_path.start()
-        self.patcher_cnt.start()
         
         yield
         
         self.patcher_path.stop()
-        self.patcher_cnt.stop()
     
     def test_save_creates_file(self):
         """Test that save() creates a pickle file."""
@@ -354,7 +615,7 @@ class TestOrderPersistence:
         
         order.save()
         
-        expected_file = self.test_dir / f"{order.ID}.pkl"
+        expected_file = self.test_dir / Shards.shard_of(order.ID) / f"{order.ID}.pkl"
         assert expected_file.exists()
     
     def test_from_id_loads_order(self):
@@ -377,6 +638,41 @@ class TestOrderPersistence:
         assert loaded.ID == order_id
         assert loaded.payer == "C00001"
     
+    def test_loaded_order_equals_original(self):
+        """Test that a reloaded copy compares and hashes like the original."""
+        from Order import Order, Service
+        from PaymentArrangement import BillingTiming
+        from Location import Destination
+        
+        order = Order("C00001", BillingTiming.in_advance, Service.economy,
+                      Destination("Origin"), Destination("Dest"), "S001", False,
+                      (1, 1, 1), 1.0, 10.0, "Test", False, False)
+        order.save()
+        
+        loaded = Order.from_ID(order.ID)
+        
+        assert loaded == order
+        assert loaded in {order}
+    
+    def test_from_bytes_reads_pickles(self):
+        """Test that orders pickled by older versions are still read."""
+        from Order import Order, Service
+        from PaymentArrangement import BillingTiming
+        from Location import Destination
+        
+        order = Order("C00001", BillingTiming.in_advance, Service.economy,
+                      Destination("Origin"), Destination("Dest"), "S001", False,
+                      (1, 1, 1), 1.0, 10.0, "Test", False, False)
+        
+        assert Order.from_bytes(pickle.dumps(order)) == order
+    
+    def test_from_bytes_rejects_unknown_data(self):
+        """Test that data neither encoded nor pickled raises ValueError."""
+        from Order import Order
+        
+        with pytest.raises(ValueError, match="Not a stored order"):
+            Order.from_bytes(b'{"ID": "O0000000000001"}')
+    
     def test_from_id_nonexistent_raises_error(self):
         """Test that from_ID raises error for nonexistent ID."""
         from Order import Order
@@ -0,0 +1,583 @@
+# -*- coding: utf-8 -*-
+"""
+Test suite for OrderHandler.py
+
+@author: laisz
+"""
+import pytest
+import os
+import threading
+from unittest.mock import patch
+from datetime import timedelta
+import FileLock
+from OrderHandler import OrdersHandler
+from OrderStore import OrderStore
+from IDAllocator import IDAllocator
+from Order import Order, Service, Status
+from OrderIndex import OrderIndex
+from PaymentArrangement import BillingTiming
+from Location import Destination, Repository
+from Vehicle import Minivan
+from operator import attrgetter
+
+
+def order_args(payer: str = "C00001", service: Service = Service.standard) -> tuple:
+    """Build the arguments of OrdersHandler.add."""
+    return (payer, BillingTiming.in_advance, service,
+            Destination("Origin"), Destination("Dest"), "S001", False,
+            (1, 1, 1), 1.0, 10.0, "", False, False)
+
+
+@pytest.fixture(params=["pickle", "sqlite"])
+def handler(request, tmp_path):
+    """Create a fresh OrdersHandler for each storage engine."""
+    store = OrderStore(str(tmp_path / "orders.sqlite3")) if request.param == "sqlite" else None
+    with patch.object(OrdersHandler, '_instance', None), \
+         patch('OrderHandler.get_dir', return_value=str(tmp_path)), \
+         patch('OrderHandler.get_store', return_value=store), \
+         patch.object(Order, '_Order__DATA_PATH', str(tmp_path)):
+        yield OrdersHandler()
+    if store is not None:
+        store.close()
+
+
+def add(handler: OrdersHandler, n: int, *args) -> str:
+    """Add an order whose ID ends with n."""
+    with patch.object(IDAllocator, 'next', return_value=n):
+        return handler.add(*(args or order_args()))
+
+
+class TestOrdersHandlerAdd:
+    """Tests for adding and retrieving orders."""
+
+    def test_add_returns_id(self, handler):
+        """Test that add() returns the new order's ID and indexes it."""
+        order_ID = add(handler, 1)
+
+        assert order_ID == "O0000000000001"
+        assert handler._order_list() == [order_ID]
+        assert handler.get(order_ID).ID == order_ID
+
+    def test_add_duplicate_raises_error(self, handler):
+        """Test that adding an order with a taken ID raises ValueError."""
+        order_ID = add(handler, 1)
+
+        with pytest.raises(ValueError, match="already taken"):
+            add(handler, 1)
+        handler.flush()
+        handler._orders.clear()
+        assert len(handler.get(order_ID).all_logs()) == 1
+
+    def test_new_ids_follow_stored_orders(self, handler, tmp_path):
+        """Test that IDs are allocated after the stored ones when the counter is lost."""
+        add(handler, 41)
+        handler.flush()
+
+        assert IDAllocator(str(tmp_path), "O").next() == 42
+
+    def test_get_after_flush_loads_from_storage(self, handler):
+        """Test that a flushed order can be loaded by a new handler."""
+        order_ID = add(handler, 1)
+        handler.flush()
+        handler._orders.clear()
+
+        assert handler.get(order_ID).ID == order_ID
+
+
+class TestOrdersHandlerFlush:
+    """Tests for writing back changed orders."""
+
+    def test_flush_writes_only_dirty_orders(self, handler):
+        """Test that flush() skips orders that were only read."""
+        first = add(handler, 1)
+        second = add(handler, 2)
+        handler.flush()
+
+        handler.get(first)
+        handler.log(second, 'X', "S001", "Inspected")
+
+        count, written = handler.flush()
+        assert count == 1
+        assert written > 0
+        assert handler.flush() == (0, 0)
+
+
+class TestOrdersHandlerDelayed:
+    """Tests for flagging overdue orders."""
+
+    def test_overdue_order_is_flagged(self, handler):
+        """Test that an undelivered order past its due time becomes delayed."""
+        from Order import Status
+        order_ID = add(handler, 1, *order_args(service=Service.over_night))
+        add(handler, 2, *order_args(service=Service.economy))
+        order = handler.get(order_ID)
+
+        handler._scheduler.run_pending(order.due_time + timedelta(seconds=1))
+
+        assert order.status == Status.delayed
+        assert [o.ID for o in handler.filter_delayed()] == [order_ID]
+
+    def test_delivered_order_is_not_flagged(self, handler):
+        """Test that a delivered order never becomes delayed."""
+        order_ID = add(handler, 1, *order_args(service=Service.over_night))
+        order = handler.get(order_ID)
+        handler.log(order_ID, 'A', "S001", Destination("Dest"))
+
+        handler._scheduler.run_pending(order.due_time + timedelta(seconds=1))
+
+        assert handler.filter_delayed() == []
+
+    def test_delivering_a_delayed_order_clears_it(self, handler):
+        """Test that a delayed order leaves the delayed set once delivered."""
+        order_ID = add(handler, 1, *order_args(service=Service.over_night))
+        order = handler.get(order_ID)
+        handler._scheduler.run_pending(order.due_time + timedelta(seconds=1))
+
+        handler.log(order_ID, 'A', "S001", Destination("Dest"))
+
+        assert handler.filter_delayed() == []
+
+    def test_delayed_set_is_rebuilt_from_index(self, handler, tmp_path):
+        """Test that a new handler knows the delayed orders without loading them."""
+        order_ID = add(handler, 1, *order_args(service=Service.over_night))
+        handler._scheduler.run_pending(handler.get(order_ID).due_time + timedelta(seconds=1))
+        handler.checkpoint()
+
+        with patch.object(OrdersHandler, '_instance', None):
+            fresh = OrdersHandler()
+            fresh._index.refresh()
+
+            assert fresh._delayed == {order_ID}
+            assert len(fresh._orders) == 0
+
+
+class TestOrdersHandlerRecovery:
+    """Tests for replaying the write-ahead log."""
+
+    def restart(self) -> OrdersHandler:
+        """Drop the handler as if the process crashed, and start a new one."""
+        FileLock.release(OrdersHandler._instance._wal_owner)  # Locks end with the process
+        OrdersHandler._instance = None
+        return OrdersHandler()
+
+    def test_unsaved_event_survives_crash(self, handler):
+        """Test that a logged event is replayed after a crash."""
+        order_ID = add(handler, 1)
+        handler.checkpoint()
+        handler.log(order_ID, 'A', "S001", Destination("Dest"))
+
+        fresh = self.restart()
+
+        assert fresh is not handler
+        assert len(fresh.get(order_ID).all_logs()) == 2
+        assert fresh.filter_delayed() == []
+
+    def test_unsaved_order_survives_crash(self, handler):
+        """Test that an order that was never saved is restored from the log."""
+        order_ID = add(handler, 1)
+        handler.get(order_ID).billing("B000010000")
+
+        fresh = self.restart()
+
+        assert fresh.get(order_ID).bill_ref == "B000010000"
+        assert fresh._order_list() == [order_ID]
+
+    def test_replay_is_idempotent(self, handler):
+        """Test that replaying events that were already saved adds nothing."""
+        order_ID = add(handler, 1)
+        handler.log(order_ID, 'X', "S001", "Inspected")
+        handler.flush()
+
+        self.restart()
+        fresh = self.restart()
+
+        assert len(fresh.get(order_ID).all_logs()) == 2
+
+    def test_live_log_is_not_replayed(self, handler):
+        """Test that the log of a handler that is still running is left alone."""
+        order_ID = add(handler, 1)
+        handler.checkpoint()
+        handler.get(order_ID).billing("B000010000")
+
+        OrdersHandler._instance = None
+        fresh = OrdersHandler()
+
+        assert os.path.exists(handler._wal.path)
+        assert fresh.get(order_ID).bill_ref != "B000010000"
+
+        FileLock.release(handler._wal_owner)
+        last = self.restart()
+
+        assert not os.path.exists(handler._wal.path)
+        assert last.get(order_ID).bill_ref == "B000010000"
+
+    def test_checkpoint_empties_log(self, handler):
+        """Test that a checkpoint saves the orders and cuts the log."""
+        order_ID = add(handler, 1)
+        handler.get(order_ID).billing("B000010000")
+
+        handler.checkpoint()
+
+        assert handler._wal.size == 0
+        assert not handler.get(order_ID).is_dirty
+
+    def test_log_checkpoints_when_full(self, handler):
+        """Test that the log is cut once it reaches its size limit."""
+        handler._checkpoint_bytes = 1
+        order_ID = add(handler, 1)
+
+        handler.log(order_ID, 'X', "S001", "Inspected")
+
+        assert handler._wal.size == 0
+
+    def test_checkpoint_waits_for_logged_entries(self, handler):
+        """Test that a checkpoint does not cut a record whose entry is not written yet."""
+        order_ID = add(handler, 1)
+        handler.checkpoint()
+        logged, release = threading.Event(), threading.Event()
+        append_entry = Order._append_entry
+        def slow_append(order, entry):
+            logged.set()
+            release.wait(5)
+            append_entry(order, entry)
+
+        with patch.object(Order, '_append_entry', slow_append), \
+             patch.object(Order, 'sync_events', wraps=Order.sync_events) as sync_events:
+            writer = threading.Thread(target=handler.log,
+                                      args=(order_ID, 'X', "S001", "Inspected"))
+            writer.start()
+            logged.wait(5)
+            checkpoint = threading.Thread(target=handler.checkpoint)
+            checkpoint.start()
+            checkpoint.join(0.1)
+            assert checkpoint.is_alive()
+
+            release.set()
+            writer.join()
+            checkpoint.join()
+
+        assert sync_events.call_count == 1
+        assert handler._wal.size == 0
+        assert len(handler.get(order_ID).all_logs()) == 2
+
+
+class TestOrdersHandlerCache:
+    """Tests for the bounded order cache."""
+
+    @pytest.fixture(autouse=True)
+    def small_cache(self):
+        """Limit the cache to two orders."""
+        with patch('OrderHandler.get_cache_size', return_value=2):
+            yield
+
+    def test_cache_is_bounded(self, handler):
+        """Test that the cache never holds more than its capacity."""
+        for n in range(5):
+            add(handler, n)
+
+        assert len(handler._orders) == 2
+        assert handler.cache_stats()['evictions'] == 3
+
+    def test_evicted_order_is_written_back(self, handler):
+        """Test that a changed order survives eviction."""
+        order_ID = add(handler, 1)
+        handler.log(order_ID, 'X', "S001", "Inspected")
+        add(handler, 2)
+        add(handler, 3)
+
+        assert order_ID not in handler._orders
+        assert handler.get(order_ID).last_log().summary == "Inspected"
+
+    def test_order_being_written_back_is_cached_once(self, handler):
+        """Test that an evicted order not yet written back is taken back as it is."""
+        order_ID = add(handler, 1)
+        order = handler.get(order_ID)
+        handler._orders.clear()
+        handler._evicted[order_ID] = order
+
+        with patch.object(OrdersHandler, '_track', wraps=handler._track) as track:
+            assert handler.get(order_ID) is order
+
+        assert track.call_count == 1
+
+    def test_cache_stats_counts_hits(self, handler):
+        """Test that repeated lookups are served from the cache."""
+        order_ID = add(handler, 1)
+        handler.get(order_ID)
+        handler.get(order_ID)
+
+        assert handler.cache_stats()['hits'] == 2
+
+
+class TestOrdersHandlerFilters:
+    """Tests for the filter methods."""
+
+    def test_filter_by_customer(self, handler):
+        """Test that only the customer's orders are returned."""
+        add(handler, 1, *order_args("C00001"))
+        add(handler, 2, *order_args("C00002"))
+        add(handler, 3, *order_args("C00001"))
+
+        result = handler.filter_by_customer("C00001")
+
+        assert sorted(order.ID for order in result) == ["O0000000000001",
+                                                        "O0000000000003"]
+
+    def test_filter_by_customer_loads_only_own_orders(self, handler):
+        """Test that other customers' orders are not loaded."""
+        add(handler, 1, *order_args("C00001"))
+        add(handler, 2, *order_args("C00002"))
+        handler.flush()
+        handler._orders.clear()
+
+        result = handler.filter_by_customer("C00001")
+
+        assert [order.ID for order in result] == ["O0000000000001"]
+        assert "O0000000000002" not in handler._orders
+
+    def test_filters_do_not_load_packages_or_entries(self, handler):
+        """Test that loading orders for a filter skips packages and history."""
+        first = add(handler, 1, *order_args("C00001"))
+        due = handler.get(first).due_date
+        handler.flush()
+        handler._orders.clear()
+
+        with patch('Order.Package.from_dict') as from_dict, \
+             patch('Order.EventStore.tail') as tail:
+            by_customer = handler.filter_by_customer("C00001")
+            by_date = handler.filter_by_date(due, due)
+
+        assert [order.payer for order in by_customer] == ["C00001"]
+        assert [order.ID for order in by_date] == [first]
+        from_dict.assert_not_called()
+        tail.assert_not_called()
+        assert by_customer[0].package.size == (1, 1, 1)
+
+    def test_filter_by_date(self, handler):
+        """Test that orders are matched by due date."""
+        express_ID = add(handler, 1, *order_args(service=Service.express))
+        add(handler, 2, *order_args(service=Service.economy))
+        due = handler.get(express_ID).due_date
+
+        result = handler.filter_by_date(due, due)
+
+        assert [order.ID for order in result] == [express_ID]
+
+    def test_filter_by_date_for_customer(self, handler):
+        """Test that the date filter can be limited to one customer."""
+        first = add(handler, 1, *order_args("C00001"))
+        add(handler, 2, *order_args("C00002"))
+        due = handler.get(first).due_date
+
+        result = handler.filter_by_date(due, due, "C00001")
+
+        assert [order.ID for order in result] == [first]
+
+    def test_filter_by_date_backfills_legacy_orders(self, handler, tmp_path):
+        """Test that orders indexed without a due date are still found."""
+        import json
+        from OrderIndex import OrderIndex
+        if handler._store is not None:
+            pytest.skip("the sqlite engine does not use the due-date index")
+
+        order_ID = add(handler, 1)
+        handler.flush()
+        handler._orders.clear()
+        (tmp_path / "order_list.jsonl").unlink()
+        with open(tmp_path / "order_list.json", 'w', encoding='utf-8') as f:
+            json.dump([order_ID], f)
+        handler._index = OrderIndex(str(tmp_path / "order_list.jsonl"),
+                                    str(tmp_path / "order_list.json"))
+        due = handler.get(order_ID).due_date
+
+        result = handler.filter_by_date(due, due)
+
+        assert [order.ID for order in result] == [order_ID]
+        assert handler._index.missing_due_date() == []
+
+    def test_filter_by_customer_backfills_legacy_orders(self, handler, tmp_path):
+        """Test that orders indexed without a payer are still found."""
+        import json
+        from OrderIndex import OrderIndex
+        if handler._store is not None:
+            pytest.skip("the sqlite engine does not use the payer index")
+
+        order_ID = add(handler, 1, *order_args("C00001"))
+        handler.flush()
+        handler._orders.clear()
+        (tmp_path / "order_list.jsonl").unlink()
+        with open(tmp_path / "order_list.json", 'w', encoding='utf-8') as f:
+            json.dump([order_ID], f)
+        handler._index = OrderIndex(str(tmp_path / "order_list.jsonl"),
+                                    str(tmp_path / "order_list.json"))
+
+        result = handler.filter_by_customer("C00001")
+
+        assert [order.ID for order in result] == [order_ID]
+        assert handler._index.missing_payer() == []
+
+
+
+class TestOrdersHandlerIterators:
+    """Tests for the generator counterparts of the filters."""
+
+    def test_iter_by_customer_matches_filter(self, handler):
+        """Test that the iterator yields the filter's orders in ID order."""
+        for n in (3, 1, 2, 5):
+            add(handler, n, *order_args("C00001" if n != 2 else "C00002"))
+
+        assert list(handler.iter_by_customer("C00001")) == sorted(
+            handler.filter_by_customer("C00001"), key=lambda order: order.ID)
+
+    def test_orders_are_loaded_one_at_a_time(self, handler):
+        """Test that stopping early leaves the rest of the orders unloaded."""
+        for n in range(1, 6):
+            add(handler, n)
+        handler.flush()
+        handler._orders.clear()
+
+        orders = handler.iter_by_customer("C00001")
+        first = next(orders)
+
+        assert first.ID == "O0000000000001"
+        assert len(handler._orders) == 1
+        orders.close()
+
+    def test_projection(self, handler):
+        """Test that projections are yielded instead of orders."""
+        add(handler, 1)
+        add(handler, 2)
+
+        assert list(handler.iter_by_customer("C00001", attrgetter('ID', 'payer'))) == [
+            ("O0000000000001", "C00001"), ("O0000000000002", "C00001")]
+
+    def test_cursor_resumes_after_id(self, handler):
+        """Test that only the orders after the cursor are yielded."""
+        for n in range(1, 6):
+            add(handler, n)
+        due = handler.get("O0000000000001").due_date
+
+        orders = handler.iter_by_date(due, due, after="O0000000000003")
+
+        assert [order.ID for order in orders] == ["O0000000000004", "O0000000000005"]
+
+    def test_iter_delayed(self, handler):
+        """Test that the delayed orders are yielded."""
+        add(handler, 1)
+        add(handler, 2)
+        handler._expire(["O0000000000002"])
+
+        assert [order.ID for order in handler.iter_delayed()] == ["O0000000000002"]
+
+    def test_iter_by_vehicle_and_repo(self, handler):
+        """Test that the cargo of a vehicle or repository is yielded in ID order."""
+        orders = [handler.get(add(handler, n)) for n in (2, 1, 3)]
+        vehicle, repository = Minivan("COD-0001"), Repository("Addr", "Repo")
+        vehicle.pick_up(*orders)
+        repository.receive(*orders)
+
+        assert [order.ID for order in handler.iter_by_vehicle(vehicle)] == [
+            "O0000000000001", "O0000000000002", "O0000000000003"]
+        assert [order.ID for order in handler.iter_by_repo(
+            repository, after="O0000000000001")] == ["O0000000000002", "O0000000000003"]
+
+
+def run_threads(count: int, target) -> None:
+    """Run target(k) in count threads started together, re-raising errors."""
+    barrier = threading.Barrier(count)
+    errors = []
+
+    def worker(k):
+        barrier.wait()
+        try:
+            target(k)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+class TestOrdersHandlerConcurrency:
+    """Stress tests with 32 threads sharing the handler."""
+    THREADS = 32
+
+    @pytest.fixture(autouse=True)
+    def small_cache(self):
+        """Limit the cache to two orders, so threads evict each other's."""
+        with patch('OrderHandler.get_cache_size', return_value=2):
+            yield
+
+    def test_no_entries_are_lost(self, handler):
+        """Test that every entry recorded by every thread is kept."""
+        order_IDs = [add(handler, n) for n in range(4)]
+
+        def record(k):
+            for i in range(10):
+                handler.log(order_IDs[(k + i) % 4], 'X', f"S{k:03d}", f"Scan {i}")
+
+        run_threads(self.THREADS, record)
+        handler.checkpoint()
+        handler._orders.clear()
+
+        summaries = [entry.summary for order_ID in order_IDs
+                     for entry in handler.get(order_ID).all_logs()[1:]]
+        assert len(summaries) == self.THREADS * 10
+        assert all(len(handler.get(order_ID).all_logs()) == 1 + self.THREADS * 10 // 4
+                   for order_ID in order_IDs)
+
+    def test_journal_positions_are_unique(self, handler):
+        """Test that concurrent entries are journaled at distinct positions."""
+        order_ID = add(handler, 1)
+
+        run_threads(self.THREADS, lambda k: handler.log(order_ID, 'X', f"S{k:03d}", "Scan"))
+
+        positions = [args[0] for _, (ID, kind, *args) in handler._wal.records()
+                     if ID == order_ID and kind == 'entry']
+        assert sorted(positions) == list(range(1, self.THREADS + 1))
+
+    def test_status_changes_are_not_lost(self, handler):
+        """Test that a status set by one thread survives the others' entries."""
+        order_ID = add(handler, 1)
+
+        def record(k):
+            if k == 0:
+                handler.log(order_ID, 'C', "S000", "Damage Reported", "Crushed")
+            else:
+                handler.log(order_ID, 'X', f"S{k:03d}", "Scan")
+
+        run_threads(self.THREADS, record)
+        handler.flush()
+        handler._orders.clear()
+
+        assert handler.get(order_ID).status is Status.broken
+        assert order_ID not in handler._scheduler
+
+    def test_concurrent_adds_are_all_indexed(self, handler, tmp_path):
+        """Test that orders added by many threads are all indexed once."""
+        added = []
+        run_threads(self.THREADS, lambda k: added.extend(handler.add(*order_args()) for _ in range(3)))
+
+        assert len(set(added)) == self.THREADS * 3
+        assert sorted(OrderIndex(handler._index.path).ids()) == sorted(added)
+
+    def test_singleton_is_created_once(self, tmp_path):
+        """Test that threads racing to create the handler get one instance."""
+        instances = []
+        with patch.object(OrdersHandler, '_instance', None), \
+             patch('OrderHandler.get_dir', return_value=str(tmp_path)), \
+             patch('OrderHandler.get_store', return_value=None), \
+             patch.object(Order, '_Order__DATA_PATH', str(tmp_path)):
+            run_threads(self.THREADS, lambda k: instances.append(OrdersHandler()))
+
+        assert len(instances) == self.THREADS
+        assert all(instance is instances[0] for instance in instances)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Test suite for OrderIndex.py
+
+@author: laisz
+"""
+import pytest
+import json
+from datetime import date
+from OrderIndex import OrderIndex, DueDateIndex
+
+
+class TestDueDateIndex:
+    """Tests for the sorted due-date index."""
+
+    def test_between_is_inclusive(self):
+        """Test that both ends of the range are included."""
+        index = DueDateIndex()
+        index.insert(date(2026, 1, 3), "O3")
+        index.insert(date(2026, 1, 1), "O1")
+        index.insert(date(2026, 1, 2), "O2")
+
+        assert index.between(date(2026, 1, 1), date(2026, 1, 2)) == ["O1", "O2"]
+        assert index.between(date(2026, 1, 3), date(2026, 1, 9)) == ["O3"]
+        assert index.between(date(2025, 1, 1), date(2025, 12, 31)) == []
+
+    def test_equal_dates_keep_insertion_order(self):
+        """Test that orders due on the same day stay in insertion order."""
+        index = DueDateIndex()
+        for order_ID in ["O1", "O2", "O3"]:
+            index.insert(date(2026, 1, 1), order_ID)
+
+        assert index.between(date(2026, 1, 1), date(2026, 1, 1)) == ["O1", "O2", "O3"]
+        assert len(index) == 3
+
+
+class TestOrderIndexAppend:
+    """Tests for appending to the index."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Setup an index in a temporary directory."""
+        self.path = str(tmp_path / "order_list.jsonl")
+        self.index = OrderIndex(self.path)
+
+    def test_empty_index(self):
+        """Test that a missing index file reads as empty."""
+        assert self.index.ids() == []
+        assert len(self.index) == 0
+
+    def test_append_registers_id(self):
+        """Test that appended IDs are listed in insertion order."""
+        self.index.append("O0000000000001")
+        self.index.append("O0000000000000")
+
+        assert self.index.ids() == ["O0000000000001", "O0000000000000"]
+        assert "O0000000000001" in self.index
+
+    def test_append_duplicate_raises_error(self):
+        """Test that appending a taken ID raises ValueError."""
+        self.index.append("O0000000000001")
+
+        with pytest.raises(ValueError, match="already taken"):
+            self.index.append("O0000000000001")
+
+    def test_append_writes_one_line_per_record(self):
+        """Test that each record is a single JSON line."""
+        self.index.append("O0000000000001")
+        self.index.append("O0000000000002")
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+        assert [json.loads(line)["ID"] for line in lines] == ["O0000000000001",
+                                                             "O0000000000002"]
+
+
+class TestOrderIndexDueDate:
+    """Tests for the due-date fields of the index."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Setup an index in a temporary directory."""
+        self.path = str(tmp_path / "order_list.jsonl")
+        self.index = OrderIndex(self.path)
+
+    def test_by_due_date(self):
+        """Test that appended due dates are queryable after reopening."""
+        self.index.append("O1", due="2026-01-02")
+        self.index.append("O2", due="2026-01-01")
+
+        reopened = OrderIndex(self.path)
+
+        assert reopened.by_due_date(date(2026, 1, 1), date(2026, 1, 2)) == ["O2", "O1"]
+
+    def test_update_many_fills_missing_due_dates(self):
+        """Test that due dates can be recorded for orders indexed without one."""
+        self.index.append("O1")
+        self.index.append("O2", due="2026-01-01")
+        assert self.index.missing_due_date() == ["O1"]
+
+        self.index.update_many({"O1": {"due": "2026-01-05"}})
+
+        reopened = OrderIndex(self.path)
+        assert reopened.missing_due_date() == []
+        assert reopened.ids() == ["O1", "O2"]
+        assert reopened.by_due_date(date(2026, 1, 5), date(2026, 1, 5)) == ["O1"]
+
+    def test_update_unknown_id_raises_error(self):
+        """Test that updating an ID that is not indexed raises KeyError."""
+        with pytest.raises(KeyError):
+            self.index.update_many({"O1": {"due": "2026-01-01"}})
+
+
+class TestOrderIndexPayer:
+    """Tests for the payer field of the index."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Setup an index in a temporary directory."""
+        self.path = str(tmp_path / "order_list.jsonl")
+        self.index = OrderIndex(self.path)
+
+    def test_by_payer(self):
+        """Test that orders are listed per payer after reopening."""
+        self.index.append("O1", payer="C00001")
+        self.index.append("O2", payer="C00002")
+        self.index.append("O3", payer="C00001")
+
+        reopened = OrderIndex(self.path)
+
+        assert reopened.by_payer("C00001") == ["O1", "O3"]
+        assert reopened.by_payer("C00009") == []
+
+    def test_update_many_fills_missing_payers(self):
+        """Test that payers can be recorded for orders indexed without one."""
+        self.index.append("O1")
+        assert self.index.missing_payer() == ["O1"]
+
+        self.index.update_many({"O1": {"payer": "C00001"}})
+
+        reopened = OrderIndex(self.path)
+        assert reopened.missing_payer() == []
+        assert reopened.by_payer("C00001") == ["O1"]
+
+    def test_later_payer_record_is_ignored(self):
+        """Test that the first recorded payer of an order is kept."""
+        self.index.append("O1", payer="C00001")
+        self.index.update_many({"O1": {"payer": "C00001"}})
+
+        assert self.index.by_payer("C00001") == ["O1"]
+
+
+class TestOrderIndexRefresh:
+    """Tests for reading the index incrementally."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Setup two indexes sharing one file."""
+        self.path = str(tmp_path / "order_list.jsonl")
+        self.writer = OrderIndex(self.path)
+        self.reader = OrderIndex(self.path)
+
+    def test_reader_sees_new_records(self):
+        """Test that records appended elsewhere are picked up on refresh."""
+        self.writer.append("O0000000000001")
+        assert self.reader.ids() == ["O0000000000001"]
+
+        self.writer.append("O0000000000002")
+        assert self.reader.ids() == ["O0000000000001", "O0000000000002"]
+
+    def test_reader_rejects_duplicate_from_other_writer(self):
+        """Test that the duplicate check covers records written elsewhere."""
+        self.writer.append("O0000000000001")
+
+        with pytest.raises(ValueError):
+            self.reader.append("O0000000000001")
+
+    def test_torn_record_is_ignored_then_cut(self):
+        """Test that a partial trailing line is skipped and later replaced."""
+        self.writer.append("O0000000000001")
+        with open(self.path, 'ab') as f:
+            f.write(b'{"ID":"O00000')
+
+        assert self.reader.ids() == ["O0000000000001"]
+
+        self.reader.append("O0000000000002")
+
+        assert OrderIndex(self.path).ids() == ["O0000000000001", "O0000000000002"]
+
+
+class TestOrderIndexLegacy:
+    """Tests for importing an order_list.json."""
+
+    def test_legacy_list_is_imported(self, tmp_path):
+        """Test that IDs from order_list.json are imported once."""
+        legacy_path = tmp_path / "order_list.json"
+        with open(legacy_path, 'w', encoding='utf-8') as f:
+            json.dump(["O0000000000001", "O0000000000002"], f, indent=2)
+
+        index = OrderIndex(str(tmp_path / "order_list.jsonl"), str(legacy_path))
+
+        assert index.ids() == ["O0000000000001", "O0000000000002"]
+
+    def test_legacy_list_ignored_when_index_exists(self, tmp_path):
+        """Test that an existing index file is not overwritten."""
+        path = str(tmp_path / "order_list.jsonl")
+        OrderIndex(path).append("O0000000000009")
+        legacy_path = tmp_path / "order_list.json"
+        with open(legacy_path, 'w', encoding='utf-8') as f:
+            json.dump(["O0000000000001"], f)
+
+        index = OrderIndex(path, str(legacy_path))
+
+        assert index.ids() == ["O0000000000009"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
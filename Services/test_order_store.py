@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Test suite for OrderStore.py
+
+@author: laisz
+"""
+import pytest
+from unittest.mock import patch
+from datetime import timedelta
+from OrderStore import OrderStore
+from IDAllocator import IDAllocator
+from Order import Order, Service, Status
+from PaymentArrangement import BillingTiming
+from Location import Destination
+
+
+@pytest.fixture(autouse=True)
+def data_path(tmp_path):
+    """Keep the tracking entries of the test orders in a temporary directory."""
+    with patch.object(Order, '_Order__DATA_PATH', str(tmp_path)):
+        yield
+
+
+def make_order(n: int, payer: str = "C00001", service: Service = Service.standard) -> Order:
+    """Create an order whose ID ends with n."""
+    with patch.object(IDAllocator, 'next', return_value=n):
+        return Order(payer, BillingTiming.in_advance, service,
+                     Destination("Origin"), Destination("Dest"), "S001", False,
+                     (1, 1, 1), 1.0, 10.0, "", False, False)
+
+
+class TestOrderStore:
+    """Tests for storing and querying orders."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Setup a store in a temporary directory."""
+        self.store = OrderStore(str(tmp_path / "orders.sqlite3"))
+        yield
+        self.store.close()
+
+    def test_put_and_get(self):
+        """Test that a stored order can be loaded back."""
+        order = make_order(1)
+        order.save(self.store)
+
+        loaded = Order.from_ID(order.ID, self.store)
+
+        assert loaded.ID == order.ID
+        assert loaded.payer == "C00001"
+        assert order.ID in self.store
+        assert not order.is_dirty
+
+    def test_get_nonexistent_raises_error(self):
+        """Test that loading an unknown ID raises FileNotFoundError."""
+        with pytest.raises(FileNotFoundError):
+            Order.from_ID("O9999999999999", self.store)
+
+    def test_put_replaces_existing_row(self):
+        """Test that storing an order again updates its columns."""
+        order = make_order(1)
+        order.save(self.store)
+        order.billing("B000010000")
+        order._status = Status.broken
+        order.save(self.store)
+
+        loaded = Order.from_ID(order.ID, self.store)
+
+        assert loaded.bill_ref == "B000010000"
+        assert loaded.status == Status.broken
+
+    def test_ids_by_customer(self):
+        """Test that only the customer's orders are returned."""
+        Order.save_many([make_order(1, "C00001"),
+                         make_order(2, "C00002"),
+                         make_order(3, "C00001")], self.store)
+
+        assert self.store.ids_by_customer("C00001") == ["O0000000000001",
+                                                        "O0000000000003"]
+        assert self.store.ids_by_customer("C00003") == []
+
+    def test_ids_by_date(self):
+        """Test that due dates are matched inclusively."""
+        express = make_order(1, service=Service.express)
+        economy = make_order(2, service=Service.economy)
+        Order.save_many([express, economy], self.store)
+
+        assert self.store.ids_by_date(express.due_date, express.due_date) == [express.ID]
+        assert self.store.ids_by_date(express.due_date, economy.due_date) == [express.ID,
+                                                                            economy.ID]
+        assert self.store.ids_by_date(express.due_date + timedelta(days=1),
+                                      economy.due_date - timedelta(days=1)) == []
+
+    def test_is_a_storage_backend(self):
+        """Test that the store lists and deletes orders like any backend."""
+        Order.save_many([make_order(1), make_order(2)], self.store)
+
+        self.store.delete("O0000000000001")
+
+        assert self.store.ids() == ["O0000000000002"]
+        assert self.store.ids_by_customer("C00001") == ["O0000000000002"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
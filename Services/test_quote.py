@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Test suite for Quote.py
+
+@author: laisz
+"""
+import pytest
+import random
+from unittest.mock import patch
+from Quote import quote, quote_orders, service_codes, SERVICES
+from Order import Order, Service, SizeClass, WeightClass
+from Location import Destination
+from PaymentArrangement import BillingTiming
+
+
+def make_order(size: tuple, weight: float, service: Service,
+               dangerous: bool = False, fragile: bool = False) -> Order:
+    """Build an order for a package."""
+    return Order("C00001", BillingTiming.in_advance, service, Destination("Origin"),
+                 Destination("Dest"), "S001", False, size, weight, 100.0, "",
+                 dangerous, fragile)
+
+
+class TestQuote:
+    """Tests for quoting batches of packages."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Keep the orders built by the tests in a temporary directory."""
+        self.patcher_path = patch.object(Order, '_Order__DATA_PATH', str(tmp_path))
+        self.patcher_path.start()
+
+        yield
+
+        self.patcher_path.stop()
+
+    def test_random_quotes_match_calc_fee(self):
+        """Test that every fee equals the one calc_fee gives."""
+        rng = random.Random(7)
+        orders = [make_order((rng.randint(1, 50), rng.uniform(1, 50), rng.randint(1, 50)),
+                             round(rng.uniform(0.05, 30), rng.choice([0, 1, 2])),
+                             rng.choice(SERVICES), rng.random() < 0.3, rng.random() < 0.3)
+                  for _ in range(300)]
+
+        quotes = quote_orders(orders)
+
+        assert quotes.fees.tolist() == [order.calc_fee() for order in orders]
+        assert quotes.size_classes() == [order.size_class for order in orders]
+        assert quotes.weight_classes() == [order.weight_class for order in orders]
+
+    @pytest.mark.parametrize("size, weight", [
+        ((20, 20, 20), 0.5), ((20, 20, 20.5), 0.51), ((30, 30, 30), 5),
+        ((40, 40, 40), 15), ((50, 50, 50), 30), ((10, 10, 10), 5.0001),
+    ])
+    def test_class_limits_are_inclusive(self, size, weight):
+        """Test that packages on a class limit are put in that class."""
+        order = make_order(size, weight, Service.standard)
+
+        quotes = quote([size], [weight], service_codes([Service.standard]))
+
+        assert quotes.size_classes() == [order.size_class]
+        assert quotes.weight_classes() == [order.weight_class]
+        assert quotes.fees[0] == order.calc_fee()
+
+    def test_surcharges(self):
+        """Test that flags given once apply to every package."""
+        quotes = quote([(10, 10, 10)] * 2, [1, 1], [0, 3], dangerous=True, fragile=[False, True])
+
+        assert quotes.fees.tolist() == [Service.over_night.value + 120 + 500,
+                                        Service.economy.value + 120 + 500 + 100]
+
+    def test_oversized_package_is_priced(self):
+        """Test that packages beyond the other classes are oversize or overweight."""
+        orders = [make_order((60, 60, 31), 1, Service.standard),
+                  make_order((10, 10, 10), 31, Service.standard)]
+
+        quotes = quote([(60, 60, 31), (10, 10, 10)], [1, 31], [2, 2])
+
+        assert quotes.size_classes() == [SizeClass.oversize, SizeClass.envelope]
+        assert quotes.weight_classes() == [WeightClass.light, WeightClass.overweight]
+        assert quotes.fees.tolist() == [order.calc_fee() for order in orders]
+        assert quotes.fees.tolist() == [Service.standard.value + 900] * 2
+
+    def test_service_codes_accept_names(self):
+        """Test that services are converted by member or name."""
+        assert service_codes([Service.express, "economy"]).tolist() == [
+            SERVICES.index(Service.express), SERVICES.index(Service.economy)]
+
+    def test_unknown_service_code_raises(self):
+        """Test that a code outside SERVICES is rejected."""
+        with pytest.raises(ValueError, match="Service codes"):
+            quote([(1, 1, 1)], [1], [len(SERVICES)])
+
+    def test_mismatched_lengths_raise(self):
+        """Test that arrays of different lengths are rejected."""
+        with pytest.raises(ValueError, match="same length"):
+            quote([(1, 1, 1), (2, 2, 2)], [1], [0, 0])
+
+    def test_orders_are_quoted_without_their_packages(self):
+        """Test that orders loaded from storage are quoted by their class codes."""
+        order = make_order((30, 30, 30), 12, Service.express, fragile=True)
+        order.save()
+        loaded = Order.from_ID(order.ID)
+
+        with patch('Order.Package.from_dict') as from_dict:
+            quotes = quote_orders([loaded])
+            from_dict.assert_not_called()
+
+        assert quotes.fees.tolist() == [order.calc_fee()]
+
+    def test_empty_batch(self):
+        """Test that an empty batch gives no quotes."""
+        assert len(quote_orders([])) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
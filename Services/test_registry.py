@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Test suite for Registry.py
+
+@author: laisz
+"""
+import pytest
+import pickle
+from unittest.mock import patch
+from Registry import Registry
+from Location import Repository, Destination
+from Vehicle import Truck
+from Entry import Transit, Arrival
+
+
+class TestRegistry:
+    """Tests for registering and resolving keys."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Use an empty registry for each test."""
+        with patch.object(Registry, '_instance', None):
+            yield
+
+    def test_keys(self):
+        """Test the key format of each kind of object."""
+        assert Repository("Brooklyn", "Repo0").key == "R:Repo0"
+        assert Destination("New York").key == "D:New York"
+        assert Truck("ABC-1234").key == "V:ABC-1234"
+
+    def test_repository_and_vehicle_register_themselves(self):
+        """Test that repositories and vehicles are resolvable once created."""
+        repo = Repository("Brooklyn", "Repo0")
+        car = Truck("ABC-1234")
+
+        assert Registry().resolve("R:Repo0") is repo
+        assert Registry().resolve("V:ABC-1234") is car
+
+    def test_destination_key_keeps_coordinates(self):
+        """Test that a destination is rebuilt with the coordinates in its key."""
+        dest = Destination("Taipei 101 @ Xinyi", (25.0339639, 121.5644722))
+
+        assert dest.key == "D:Taipei 101 @ Xinyi@25.033964,121.564472"
+        rebuilt = Registry().resolve(dest.key)
+        assert rebuilt.address == "Taipei 101 @ Xinyi"
+        assert rebuilt.coordinates == dest.coordinates
+        assert Registry().resolve("D:New York").coordinates is None
+
+    def test_generation_counts_changes_per_kind(self):
+        """Test that registering a new or replacing object bumps its kind only."""
+        repo = Repository("Brooklyn", "Repo0")
+        Registry().register(repo)
+        Registry().register(Destination("New York"))
+
+        assert Registry().generation("R:") == 1
+        Repository("Queens", "Repo0")
+        assert Registry().generation("R:") == 2
+        assert Registry().generation("D:") == 0
+        assert Registry().values("R:")[0].address == "Queens"
+
+    def test_later_registration_replaces_earlier(self):
+        """Test that a rebuilt repository takes over its key."""
+        Repository("Brooklyn", "Repo0")
+        repo = Repository("Brooklyn", "Repo0")
+
+        assert Registry().resolve("R:Repo0") is repo
+
+    def test_unregistered_destination_is_rebuilt(self):
+        """Test that destination keys resolve without registration."""
+        dest = Registry().resolve("D:New York")
+
+        assert isinstance(dest, Destination)
+        assert dest.address == "New York"
+
+    def test_destinations_are_not_kept(self):
+        """Test that registering destinations does not grow the registry."""
+        keys = [Registry().register(Destination(f"Address {n}")) for n in range(100)]
+
+        assert Registry().values("D:") == []
+        assert Registry().resolve(keys[42]).address == "Address 42"
+
+    def test_unknown_key_raises_error(self):
+        """Test that resolving an unknown key raises KeyError."""
+        with pytest.raises(KeyError):
+            Registry().resolve("R:Nowhere")
+
+
+class TestEntryPickling:
+    """Tests that entries only pickle keys."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Use an empty registry for each test."""
+        with patch.object(Registry, '_instance', None):
+            yield
+
+    def test_transit_does_not_pickle_cargo(self):
+        """Test that pickling a Transit leaves the vehicle's cargo behind."""
+        car = Truck("ABC-1234")
+        repo0 = Repository("Brooklyn", "Repo0")
+        repo1 = Repository("New York", "Repo1")
+        car.pick_up(*[object() for _ in range(3)])
+        repo0.receive("payload that must not be pickled")
+
+        data = pickle.dumps(Transit("S001", car, repo0, repo1))
+
+        assert b"payload that must not be pickled" not in data
+        loaded = pickle.loads(data)
+        assert loaded.vehicle is car
+        assert loaded.origin is repo0
+        assert loaded.destination is repo1
+
+    def test_arrival_size_is_independent_of_inventory(self):
+        """Test that an Arrival's pickle does not grow with the inventory."""
+        repo = Repository("Brooklyn", "Repo0")
+        small = len(pickle.dumps(Arrival("S001", repo)))
+        repo.receive(*[f"O{n:013d}" for n in range(1000)])
+
+        assert len(pickle.dumps(Arrival("S001", repo))) == small
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
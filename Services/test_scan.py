@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Test suite for Scan.py
+
+@author: laisz
+"""
+import pytest
+import os
+from concurrent.futures import ProcessPoolExecutor
+from operator import attrgetter
+from unittest.mock import patch
+import Scan
+from Scan import Where, AllOf, AnyOf
+from OrderHandler import OrdersHandler
+from OrderStore import OrderStore
+from IDAllocator import IDAllocator
+from Order import Order, Service, Status
+from PaymentArrangement import BillingTiming
+from Location import Destination
+
+
+def order_args(payer: str, service: Service, weight: float) -> tuple:
+    """Build the arguments of OrdersHandler.add."""
+    return (payer, BillingTiming.in_advance, service,
+            Destination("Origin"), Destination("Dest"), "S001", False,
+            (1, 1, 1), weight, 10.0, "", False, False)
+
+
+def is_heavy(order: Order) -> bool:
+    """A predicate defined at the top level of a module."""
+    return order.package.weight >= 15
+
+
+def scanned_by(order: Order) -> tuple[str, int]:
+    """A projection recording the process that decoded the order."""
+    return order.ID, os.getpid()
+
+
+@pytest.fixture(params=["pickle", "sqlite"])
+def handler(request, tmp_path):
+    """Create an OrdersHandler with 30 orders for each storage engine."""
+    store = OrderStore(str(tmp_path / "orders.sqlite3")) if request.param == "sqlite" else None
+    with patch.object(OrdersHandler, '_instance', None), \
+         patch('OrderHandler.get_dir', return_value=str(tmp_path)), \
+         patch('OrderHandler.get_store', return_value=store), \
+         patch.object(Order, '_Order__DATA_PATH', str(tmp_path)):
+        handler = OrdersHandler()
+        services = [Service.economy, Service.standard, Service.express]
+        for n in range(1, 31):
+            with patch.object(IDAllocator, 'next', return_value=n):
+                handler.add(*order_args(f"C{n % 4:05d}", services[n % 3], float(n)))
+        yield handler
+    if store is not None:
+        store.close()
+
+
+def expected(handler: OrdersHandler, predicate) -> list[str]:
+    """Get the IDs of the matching orders by loading every one."""
+    return [order_ID for order_ID in sorted(handler._order_list())
+            if predicate(handler.get(order_ID))]
+
+
+class TestPredicates:
+    """Tests for the picklable predicates."""
+
+    def test_where_reads_dotted_attributes(self, handler):
+        """Test that nested attributes are compared."""
+        order = handler.get("O0000000000020")
+
+        assert Where('package.weight', '>', 19)(order)
+        assert not Where('package.weight', '<', 20)(order)
+        assert Where('service', 'in', {Service.standard, Service.express})(order)
+
+    def test_combined_predicates(self, handler):
+        """Test that AllOf and AnyOf combine predicates."""
+        order = handler.get("O0000000000003")
+        economy = Where('service', '==', Service.economy)
+
+        assert AllOf(economy, Where('payer', '==', "C00003"))(order)
+        assert not AllOf(economy, Where('payer', '==', "C00001"))(order)
+        assert AnyOf(Where('payer', '==', "C00001"), economy)(order)
+
+    def test_unknown_operator_raises(self):
+        """Test that an unknown operator is rejected."""
+        with pytest.raises(ValueError, match="Unknown operator"):
+            Where('fee', '~', 1)
+
+
+class TestScan:
+    """Tests for scanning the stored orders."""
+
+    def test_scan_in_process(self, handler):
+        """Test that a scan with one worker finds the matching orders."""
+        predicate = Where('service', '==', Service.express)
+
+        assert handler.scan(predicate, workers=1) == expected(handler, predicate)
+
+    def test_scan_on_processes(self, handler):
+        """Test that a parallel scan finds the same orders."""
+        predicate = AllOf(Where('service', '!=', Service.economy), is_heavy)
+
+        found = handler.scan(predicate, scanned_by, workers=3)
+
+        assert [order_ID for order_ID, _ in found] == expected(handler, predicate)
+        assert len(found) == 10
+        assert os.getpid() not in {pid for _, pid in found}
+
+    def test_projection(self, handler):
+        """Test that matching orders are sent back projected."""
+        found = handler.scan(Where('payer', '==', "C00002"),
+                             attrgetter('ID', 'package.weight'), workers=2)
+
+        assert found == [(f"O{n:013d}", float(n)) for n in range(2, 31, 4)]
+
+    def test_unsaved_changes_are_scanned(self, handler):
+        """Test that changes not saved yet are seen by the workers."""
+        handler._expire(["O0000000000007"])
+
+        found = handler.scan(Where('status', '==', Status.delayed), workers=2)
+
+        assert found == ["O0000000000007"]
+
+    def test_deleted_orders_are_skipped(self, handler):
+        """Test that orders deleted since the IDs were listed are skipped."""
+        if handler._store is not None:
+            pytest.skip("Orders are not deleted from the OrderStore")
+        handler.flush()
+        Order._storage().delete("O0000000000001")
+
+        assert "O0000000000001" not in handler.scan(Where('fee', '>=', 0), workers=2)
+
+    def test_shared_executor(self, handler):
+        """Test that chunks run on a pool that is passed in."""
+        handler.flush()
+        predicate = Where('payer', '==', "C00000")
+        source = (("order_store", handler._store.path) if handler._store is not None
+                  else None)
+
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            found = Scan.scan(handler._order_list(), predicate, source=source, executor=pool)
+
+        assert found == expected(handler, predicate)
+
+    def test_no_orders(self, handler):
+        """Test that scanning no IDs finds nothing."""
+        assert Scan.scan([], is_heavy, workers=2) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
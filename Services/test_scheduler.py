@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Test suite for Scheduler.py
+
+@author: laisz
+"""
+import pytest
+import threading
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from Scheduler import DueScheduler
+
+
+NOW = datetime(2026, 1, 1, 12, 0, tzinfo=ZoneInfo("Asia/Taipei"))
+
+
+class TestDueScheduler:
+    """Tests for popping expired deadlines."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup a scheduler with a fixed clock."""
+        self.expired = []
+        self.scheduler = DueScheduler(self.expired.extend, clock=lambda: NOW)
+
+    def test_nothing_expires_early(self):
+        """Test that future deadlines are not reported."""
+        self.scheduler.schedule("O1", NOW + timedelta(hours=1))
+
+        assert self.scheduler.run_pending() == []
+        assert "O1" in self.scheduler
+
+    def test_expired_in_deadline_order(self):
+        """Test that passed deadlines are reported earliest first."""
+        self.scheduler.schedule("O2", NOW - timedelta(hours=1))
+        self.scheduler.schedule("O1", NOW - timedelta(hours=2))
+        self.scheduler.schedule("O3", NOW + timedelta(hours=1))
+
+        assert self.scheduler.run_pending() == ["O1", "O2"]
+        assert self.expired == ["O1", "O2"]
+        assert len(self.scheduler) == 1
+
+    def test_cancelled_order_is_skipped(self):
+        """Test that a cancelled order is never reported."""
+        self.scheduler.schedule("O1", NOW - timedelta(hours=1))
+        self.scheduler.cancel("O1")
+
+        assert self.scheduler.run_pending() == []
+        assert self.expired == []
+
+    def test_reschedule_replaces_deadline(self):
+        """Test that only the latest deadline of an order counts."""
+        self.scheduler.schedule("O1", NOW - timedelta(hours=1))
+        self.scheduler.schedule("O1", NOW + timedelta(hours=1))
+
+        assert self.scheduler.run_pending() == []
+        assert self.scheduler.next_deadline() == NOW + timedelta(hours=1)
+        assert self.scheduler.run_pending(NOW + timedelta(hours=2)) == ["O1"]
+
+    def test_next_deadline_empty(self):
+        """Test that next_deadline() is None when nothing is watched."""
+        assert self.scheduler.next_deadline() is None
+
+
+class TestDueSchedulerThread:
+    """Tests for the background thread."""
+
+    def test_thread_reports_expired_orders(self):
+        """Test that the thread reports an order once its deadline passes."""
+        reported = threading.Event()
+        tz = ZoneInfo("Asia/Taipei")
+        scheduler = DueScheduler(lambda order_IDs: reported.set(),
+                                 clock=lambda: datetime.now(tz))
+        scheduler.start()
+        try:
+            scheduler.schedule("O1", datetime.now(tz) + timedelta(milliseconds=50))
+            assert reported.wait(5)
+        finally:
+            scheduler.stop()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
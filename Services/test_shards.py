@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Test suite for Shards.py
+
+@author: laisz
+"""
+import pytest
+import os
+import Shards
+from IDAllocator import IDAllocator
+
+
+class TestLayout:
+    """Tests for finding data files in the sharded layout."""
+
+    def test_shard_is_named_by_last_digits(self, tmp_path):
+        """Test that files go into the directory of their last digits."""
+        path = Shards.path_of(str(tmp_path), "O0000000001234")
+
+        assert path == str(tmp_path / "234" / "O0000000001234.pkl")
+        assert (tmp_path / "234").is_dir()
+
+    def test_locate_prefers_shard_over_flat_file(self, tmp_path):
+        """Test that a sharded file is found before a flat one."""
+        (tmp_path / "C00012.pkl").touch()
+        assert Shards.locate(str(tmp_path), "C00012") == str(tmp_path / "C00012.pkl")
+
+        sharded = Shards.path_of(str(tmp_path), "C00012")
+        open(sharded, 'wb').close()
+        assert Shards.locate(str(tmp_path), "C00012") == sharded
+
+    def test_locate_missing_file(self, tmp_path):
+        """Test that a missing file is reported as None."""
+        assert Shards.locate(str(tmp_path), "S00001") is None
+        assert not (tmp_path / "001").exists()
+
+    def test_remove_deletes_both_layouts(self, tmp_path):
+        """Test that remove deletes the file wherever it is."""
+        (tmp_path / "S00001.pkl").touch()
+        open(Shards.path_of(str(tmp_path), "S00001"), 'wb').close()
+
+        Shards.remove(str(tmp_path), "S00001")
+
+        assert Shards.locate(str(tmp_path), "S00001") is None
+
+    def test_iter_names_lists_both_layouts(self, tmp_path):
+        """Test that names are listed from shards and the top level."""
+        (tmp_path / "C00001.pkl").touch()
+        open(Shards.path_of(str(tmp_path), "C00002"), 'wb').close()
+        (tmp_path / "email_index.sqlite3").touch()
+        (tmp_path / "events").mkdir()
+
+        assert sorted(Shards.iter_names(str(tmp_path))) == ["C00001.pkl", "C00002.pkl"]
+
+    def test_id_allocator_counts_sharded_files(self, tmp_path):
+        """Test that the first lease starts after sharded files."""
+        open(Shards.path_of(str(tmp_path), "C00041"), 'wb').close()
+        (tmp_path / "C00007.pkl").touch()
+
+        assert IDAllocator(str(tmp_path), "C").next() == 42
+
+
+class TestMigrate:
+    """Tests for moving flat files into shards."""
+
+    def test_flat_files_are_moved(self, tmp_path):
+        """Test that every flat data file ends up in its shard."""
+        IDs = [f"O{n:013d}" for n in range(50)]
+        for ID in IDs:
+            (tmp_path / f"{ID}.pkl").write_bytes(ID.encode())
+        (tmp_path / "O_id.next").write_text("50")
+
+        assert Shards.migrate(str(tmp_path), workers=4) == 50
+
+        for ID in IDs:
+            assert Shards.locate(str(tmp_path), ID) == str(tmp_path / ID[-3:] / f"{ID}.pkl")
+            assert (tmp_path / ID[-3:] / f"{ID}.pkl").read_bytes() == ID.encode()
+        assert (tmp_path / "O_id.next").exists()
+
+    def test_event_files_are_moved(self, tmp_path):
+        """Test that event files are moved like data files."""
+        (tmp_path / "O0000000000001.evt").touch()
+        (tmp_path / "strings.jsonl").touch()
+
+        assert Shards.migrate(str(tmp_path)) == 1
+        assert Shards.locate(str(tmp_path), "O0000000000001", ".evt") is not None
+        assert (tmp_path / "strings.jsonl").exists()
+
+    def test_text_files_are_moved(self, tmp_path):
+        """Test that the free-text files of events move with their event files."""
+        (tmp_path / "O0000000000001.evt").touch()
+        (tmp_path / "O0000000000001.txt").touch()
+
+        assert Shards.migrate(str(tmp_path)) == 2
+        assert Shards.locate(str(tmp_path), "O0000000000001", ".txt") == str(
+            tmp_path / "001" / "O0000000000001.txt")
+
+    def test_migration_resumes(self, tmp_path):
+        """Test that running again moves only the files left behind."""
+        for n in range(10):
+            (tmp_path / f"S{n:05d}.pkl").touch()
+        os.makedirs(tmp_path / "003")
+        os.replace(tmp_path / "S00003.pkl", tmp_path / "003" / "S00003.pkl")
+
+        assert Shards.migrate(str(tmp_path)) == 9
+        assert Shards.migrate(str(tmp_path)) == 0
+        assert sorted(Shards.iter_names(str(tmp_path))) == [f"S{n:05d}.pkl" for n in range(10)]
+
+    def test_newer_file_is_kept(self, tmp_path):
+        """Test that a file in both layouts keeps its newer copy."""
+        sharded = tmp_path / "001" / "C00001.pkl"
+        os.makedirs(sharded.parent)
+        sharded.write_bytes(b"old")
+        os.utime(sharded, (1, 1))
+        (tmp_path / "C00001.pkl").write_bytes(b"new")
+
+        Shards.migrate(str(tmp_path))
+
+        assert sharded.read_bytes() == b"new"
+        assert not (tmp_path / "C00001.pkl").exists()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
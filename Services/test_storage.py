@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Test suite for Storage.py
+
+@author: laisz
+"""
+import pytest
+from unittest.mock import patch
+from Storage import StorageBackend, MemoryBackend, FileBackend, SqliteBackend, BACKENDS
+from Order import Order, Service
+from PaymentArrangement import BillingTiming
+from Location import Destination
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def backend(request, tmp_path):
+    """Open each backend in a temporary directory."""
+    backend = BACKENDS[request.param](str(tmp_path))
+    yield backend
+    backend.close()
+
+
+class TestBackends:
+    """Tests that every backend behaves the same way."""
+
+    def test_put_and_get(self, backend):
+        """Test that stored data is read back."""
+        assert backend.put("C00001", b"alice") == 5
+        assert backend.get("C00001") == b"alice"
+        assert "C00001" in backend
+
+    def test_put_replaces(self, backend):
+        """Test that storing under an ID again replaces the data."""
+        backend.put("C00001", b"alice")
+        backend.put("C00001", b"bob")
+
+        assert backend.get("C00001") == b"bob"
+        assert backend.ids() == ["C00001"]
+
+    def test_put_many(self, backend):
+        """Test that several items are stored at once."""
+        items = {f"O{n:013d}": bytes([n]) * n for n in range(1, 20)}
+
+        assert backend.put_many(items) == sum(range(1, 20))
+        assert sorted(backend.ids()) == sorted(items)
+        assert all(backend.get(ID) == data for ID, data in items.items())
+
+    def test_missing_id_raises(self, backend):
+        """Test that a missing ID raises FileNotFoundError."""
+        assert "S00001" not in backend
+        with pytest.raises(FileNotFoundError):
+            backend.get("S00001")
+
+    def test_delete(self, backend):
+        """Test that deleted data is gone, and deleting twice is fine."""
+        backend.put("S00001", b"staff")
+
+        backend.delete("S00001")
+        backend.delete("S00001")
+
+        assert "S00001" not in backend
+        assert backend.ids() == []
+
+
+class TestBackendSelection:
+    """Tests for choosing the backend from config.json."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Forget the backends opened by other tests."""
+        with patch.dict(StorageBackend._instances, clear=True):
+            yield
+
+    @pytest.mark.parametrize("name, backend_type", [
+        ("memory", MemoryBackend), ("file", FileBackend), ("sqlite", SqliteBackend)])
+    def test_backend_is_chosen_by_name(self, tmp_path, name, backend_type):
+        """Test that the configured backend is opened."""
+        with patch('Storage.get_backend_name', return_value=name):
+            backend = StorageBackend.of(str(tmp_path))
+
+        assert type(backend) is backend_type
+        assert StorageBackend.of(str(tmp_path)) is backend
+        backend.close()
+
+    def test_unknown_backend_raises(self, tmp_path):
+        """Test that an unknown name is rejected."""
+        with patch('Storage.get_backend_name', return_value="tape"):
+            with pytest.raises(ValueError, match="tape"):
+                StorageBackend.of(str(tmp_path))
+
+    def test_file_backend_reads_flat_files(self, tmp_path):
+        """Test that files left in the flat layout are still read."""
+        (tmp_path / "C00001.pkl").write_bytes(b"legacy")
+
+        backend = FileBackend(str(tmp_path))
+
+        assert backend.get("C00001") == b"legacy"
+        assert backend.ids() == ["C00001"]
+
+    @pytest.mark.parametrize("name", sorted(BACKENDS))
+    def test_orders_go_through_backend(self, tmp_path, name):
+        """Test that orders are saved to and loaded from the backend."""
+        with patch.object(Order, '_Order__DATA_PATH', str(tmp_path)), \
+             patch('Storage.get_backend_name', return_value=name):
+            order = Order("C00001", BillingTiming.in_advance, Service.economy,
+                          Destination("Origin"), Destination("Dest"), "S001", False,
+                          (1, 1, 1), 1.0, 10.0, "", False, False)
+            order.save()
+
+            assert order.ID in StorageBackend.of(str(tmp_path)).ids()
+            assert Order.from_ID(order.ID).snapshot() == order.snapshot()
+            StorageBackend.of(str(tmp_path)).close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
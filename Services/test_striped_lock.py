@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Test suite for StripedLock.py
+
+@author: laisz
+"""
+import pytest
+import threading
+from StripedLock import StripedLock
+
+
+class TestStripedLock:
+    """Tests for mapping keys to locks."""
+
+    def test_invalid_stripes_raises_error(self):
+        """Test that a non-positive number of stripes raises ValueError."""
+        with pytest.raises(ValueError):
+            StripedLock(0)
+
+    def test_key_always_gets_the_same_lock(self):
+        """Test that a key maps to one lock, and keys spread over stripes."""
+        locks = StripedLock(16)
+
+        assert locks.of("O0000000000001") is locks.of("O0000000000001")
+        assert len({id(locks.of(f"O{n:013d}")) for n in range(64)}) > 8
+
+    def test_lock_is_re_entrant(self):
+        """Test that a thread can take the lock of a key twice."""
+        locks = StripedLock(4)
+
+        with locks.of("O1"):
+            assert locks.of("O1").acquire(timeout=1)
+            locks.of("O1").release()
+
+    def test_lock_excludes_other_threads(self):
+        """Test that increments under a key's lock are not lost."""
+        locks = StripedLock(4)
+        counter = {"O1": 0}
+
+        def work():
+            for _ in range(1000):
+                with locks.of("O1"):
+                    value = counter["O1"]
+                    counter["O1"] = value + 1
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert counter["O1"] == 8000
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Test suite for Tariff.py
+
+@author: laisz
+"""
+import pytest
+import json
+import os
+import threading
+from unittest.mock import patch
+import Codec
+import Tariff
+from Order import Order, Service, SizeClass
+from Quote import quote_orders
+from Location import Destination
+from PaymentArrangement import BillingTiming
+
+
+def definition(version: int = 1, **changes) -> dict:
+    """Build a tariff definition with the prices of the built-in tariff."""
+    with open('tariff.json', 'r', encoding='utf-8') as file:
+        tariff = json.load(file)
+    tariff.update(version=version, **changes)
+    return tariff
+
+
+def write(path, tariff: dict, mtime_ns: int = None) -> None:
+    """Write a tariff file, optionally backdating it."""
+    path.write_text(json.dumps(tariff), encoding='utf-8')
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def make_order(size: tuple = (10, 10, 10), weight: float = 1.0,
+               service: Service = Service.express) -> Order:
+    """Build an order for a package."""
+    return Order("C00001", BillingTiming.in_advance, service, Destination("Origin"),
+                 Destination("Dest"), "S001", False, size, weight, 100.0, "", False, True)
+
+
+class TestCompile:
+    """Tests for compiling tariff definitions."""
+
+    def test_shipped_file_matches_builtin_prices(self):
+        """Test that tariff.json holds the prices of the enum values."""
+        shipped = Tariff.Tariff.from_file('tariff.json')
+        builtin = Tariff.Tariff.builtin()
+
+        assert shipped.version == 2 and builtin.version == 0
+        assert shipped._tables()[1:] == builtin._tables()[1:]
+
+    def test_tables_follow_enum_order(self):
+        """Test that the tables are indexed by the position in each enum."""
+        tariff = Tariff.Tariff.from_dict(definition(services={
+            'over_night': 3.0, 'express': 2.0, 'standard': 1.5, 'economy': 1.1}))
+
+        assert tariff.rates == (3.0, 2.0, 1.5, 1.1)
+        assert tariff.size_fees == tuple(size.value for size in SizeClass)
+        assert tariff.weight_limits == (0.5, 5, 15, 30)
+        assert tariff.arrays['rates'].tolist() == [3.0, 2.0, 1.5, 1.1]
+
+    @pytest.mark.parametrize("changes, message", [
+        ({'services': {'express': 1.8}}, "exactly the services"),
+        ({'size_classes': [{'class': 'small_box', 'up_to': 60, 'fee': 60}]}, "in order"),
+        ({'weight_classes': [{'class': 'extra_light', 'up_to': 0.5, 'fee': 60},
+                             {'class': 'light', 'up_to': 0.5, 'fee': 120},
+                             {'class': 'heavy', 'up_to': 15, 'fee': 250},
+                             {'class': 'extra_heavy', 'up_to': 30, 'fee': 450},
+                             {'class': 'overweight', 'up_to': None, 'fee': 900}]}, "must increase"),
+        ({'size_classes': [{'class': size.name, 'up_to': 60 * (n + 1), 'fee': 60}
+                           for n, size in enumerate(SizeClass)]}, "must have no limit"),
+        ({'version': "2"}, "version"),
+    ])
+    def test_invalid_definitions_raise(self, changes, message):
+        """Test that a definition not matching the enums is rejected."""
+        with pytest.raises(ValueError, match=message):
+            Tariff.Tariff.from_dict(definition(**changes))
+
+    def test_missing_section_raises(self):
+        """Test that a definition without surcharges is rejected."""
+        tariff = definition()
+        del tariff['surcharges']
+
+        with pytest.raises(ValueError, match="no surcharges"):
+            Tariff.Tariff.from_dict(tariff)
+
+    def test_last_class_is_open_ended(self):
+        """Test that a package beyond the other classes falls in the last one."""
+        tariff = Tariff.Tariff.builtin()
+
+        assert tariff.size_code(150) == list(SizeClass).index(SizeClass.big_box)
+        assert tariff.size_code(10_000) == list(SizeClass).index(SizeClass.oversize)
+        assert tariff.fee(0, 151, 31, False, False) == 2.5 + 900
+
+
+class TestReload:
+    """Tests for putting tariffs in use."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Start without a tariff in use, and keep orders in a temporary directory."""
+        self.path = tmp_path / "tariff.json"
+        write(self.path, definition(1), 1_000_000_000)
+        with patch.object(Tariff, '_current', None), patch.object(Tariff, '_stamp', None), \
+             patch.object(Order, '_Order__DATA_PATH', str(tmp_path)), \
+             patch('Tariff.get_tariff_path', return_value=str(self.path)):
+            yield
+
+    def test_current_reads_the_file_once(self):
+        """Test that the file is compiled on first use only."""
+        with patch.object(Tariff.Tariff, 'from_file', wraps=Tariff.Tariff.from_file) as from_file:
+            tariff = Tariff.current()
+            assert Tariff.current() is tariff
+            assert from_file.call_count == 1
+        assert tariff.version == 1
+
+    def test_missing_file_uses_builtin(self):
+        """Test that the enum values are used when there is no tariff file."""
+        self.path.unlink()
+
+        assert Tariff.current() == Tariff.Tariff.builtin()
+
+    def test_reload_if_changed(self):
+        """Test that the file is only compiled again once it changes."""
+        Tariff.current()
+        assert not Tariff.reload_if_changed()
+
+        write(self.path, definition(2, surcharges={'dangerous': 600, 'fragile': 150}))
+
+        assert Tariff.reload_if_changed()
+        assert Tariff.current().version == 2
+        assert Tariff.current().fragile == 150
+
+    def test_same_version_with_other_prices_is_rejected(self):
+        """Test that prices cannot change without a new version."""
+        tariff = Tariff.current()
+        write(self.path, definition(1, surcharges={'dangerous': 600, 'fragile': 150}))
+
+        with pytest.raises(ValueError, match="raise the version"):
+            Tariff.reload()
+        assert Tariff.current() is tariff
+
+    def test_order_records_its_tariff_version(self):
+        """Test that an order is priced by the tariff in use when it is placed."""
+        order = make_order()
+        fee = order.fee
+        Tariff.install(Tariff.Tariff.from_dict(definition(
+            2, surcharges={'dangerous': 500, 'fragile': 300})))
+        later = make_order()
+
+        assert (order.fee, order.tariff_version) == (fee, 1)
+        assert (later.fee, later.tariff_version) == (fee + 200, 2)
+        assert order.calc_fee() == fee + 200
+
+    def test_tariff_version_survives_reload(self):
+        """Test that the version is kept in the snapshot."""
+        order = make_order()
+        order.fee
+        order.save()
+
+        assert Order.from_ID(order.ID).tariff_version == 1
+
+    def test_unpriced_order_is_saved_with_its_fee(self):
+        """Test that pricing an order saved without a fee marks it changed."""
+        order = make_order()
+        order._fee = order._tariff_version = None
+        order.save()
+        loaded = Order.from_ID(order.ID)
+
+        fee = loaded.fee
+
+        assert loaded.is_dirty
+        loaded.save()
+        assert (Order.from_ID(order.ID)._fee, Order.from_ID(order.ID).tariff_version) == (fee, 1)
+
+    def test_schema_2_has_no_tariff_version(self):
+        """Test that orders saved before tariffs were versioned are still read."""
+        order = make_order()
+        snapshot = order.snapshot()
+        del snapshot['tariff_version']
+        data = Codec.MAGIC + bytes([Codec.FORMAT_VERSION, 2]) \
+            + Codec.pack("Order") + Codec.pack(snapshot)
+
+        assert Codec.decode(data, Order).tariff_version is None
+
+    def test_quotes_use_the_tariff_in_use(self):
+        """Test that batch quotes follow a reload, as calc_fee does."""
+        orders = [make_order((20, 20, 20), 3.0, service) for service in Service]
+        Tariff.install(Tariff.Tariff.from_dict(definition(3, services={
+            'over_night': 3.0, 'express': 2.0, 'standard': 1.5, 'economy': 1.1})))
+
+        quotes = quote_orders(orders)
+
+        assert quotes.tariff_version == 3
+        assert quotes.fees.tolist() == [order.calc_fee() for order in orders]
+
+    def test_watcher_reloads_changed_file(self):
+        """Test that the watcher installs an edited file, and keeps the tariff on errors."""
+        Tariff.current()
+        errors = []
+        watcher = Tariff.TariffWatcher(str(self.path), interval=0.01, on_error=errors.append)
+        watcher.start()
+        try:
+            self.path.write_text("{", encoding='utf-8')
+            for _ in range(500):
+                if errors:
+                    break
+                threading.Event().wait(0.01)
+            assert Tariff.current().version == 1
+
+            write(self.path, definition(2))
+            for _ in range(500):
+                if Tariff.current().version == 2:
+                    break
+                threading.Event().wait(0.01)
+        finally:
+            watcher.stop()
+
+        assert Tariff.current().version == 2
+        assert isinstance(errors[0], ValueError)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
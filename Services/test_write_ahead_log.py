@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Test suite for WriteAheadLog.py
+
+@author: laisz
+"""
+import pytest
+import os
+import threading
+import time
+from unittest.mock import patch
+from WriteAheadLog import WriteAheadLog
+
+
+class TestWriteAheadLog:
+    """Tests for appending and reading records."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Setup a log in a temporary directory."""
+        self.path = str(tmp_path / "orders.wal")
+        self.log = WriteAheadLog(self.path)
+        yield
+        self.log.close()
+
+    def records(self) -> list:
+        """Read the records of the log file with a new log."""
+        log = WriteAheadLog(self.path)
+        records = [record for _, record in log.records()]
+        log.close()
+        return records
+
+    def test_records_survive_reopen(self):
+        """Test that appended records are read back in order."""
+        self.log.append(("O1", "status", 1))
+        self.log.append(("O2", "bill_ref", "B000010000"))
+
+        assert self.records() == [("O1", "status", 1), ("O2", "bill_ref", "B000010000")]
+
+    def test_lsn_grows_with_each_record(self):
+        """Test that append returns the new tail of the log."""
+        first = self.log.append("a")
+        second = self.log.append("b")
+
+        assert 0 < first < second == self.log.tail
+        assert self.log.size == second
+
+    def test_torn_frame_is_dropped(self):
+        """Test that a partly written frame is cut off on open."""
+        self.log.append("kept")
+        with open(self.path, 'ab') as f:
+            f.write(b"\x10\x00\x00\x00\x00")
+
+        log = WriteAheadLog(self.path)
+        log.append("after")
+        log.close()
+
+        assert self.records() == ["kept", "after"]
+
+    def test_corrupt_frame_stops_reading(self):
+        """Test that a frame with a wrong checksum ends the log."""
+        self.log.append("kept")
+        end = self.log.tail
+        self.log.append("corrupt")
+        with open(self.path, 'r+b') as f:
+            f.seek(end + 10)
+            f.write(b"\xff")
+
+        assert self.records() == ["kept"]
+
+    def test_checkpoint_drops_earlier_records(self):
+        """Test that a checkpoint keeps only the records after its LSN."""
+        self.log.append("old")
+        lsn = self.log.append("older")
+        self.log.append("new")
+
+        self.log.checkpoint(lsn)
+        tail = self.log.append("newer")
+
+        assert self.records() == ["new", "newer"]
+        assert [lsn for lsn, _ in self.log.records()][-1] == tail
+
+    def test_lsn_stays_valid_after_checkpoint(self):
+        """Test that LSNs taken before a checkpoint can still be used."""
+        first = self.log.append("a")
+        second = self.log.append("b")
+        self.log.append("c")
+
+        self.log.checkpoint(first)
+        self.log.checkpoint(second)
+
+        assert self.records() == ["c"]
+
+    def test_concurrent_appends_share_fsyncs(self):
+        """Test that appends waiting on an fsync are committed together."""
+        calls = []
+        def slow_fsync(fd):
+            calls.append(fd)
+            time.sleep(0.02)
+
+        with patch('WriteAheadLog.os.fsync', side_effect=slow_fsync):
+            threads = [threading.Thread(target=self.log.append, args=(n,))
+                       for n in range(16)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert sorted(self.records()) == list(range(16))
+        assert len(calls) < 16
+
+
+    def test_failed_sync_is_reported_to_the_whole_group(self):
+        """Test that every append of a group that failed raises, and is not kept."""
+        first_started, release_first = threading.Event(), threading.Event()
+        calls = []
+        def fsync(fd):
+            calls.append(fd)
+            if len(calls) == 1:
+                first_started.set()
+                release_first.wait(5)
+            else:
+                raise OSError("disk full")
+
+        errors = {}
+        def append(n):
+            try:
+                self.log.append(n)
+            except OSError as error:
+                errors[n] = error
+
+        with patch('WriteAheadLog.os.fsync', side_effect=fsync):
+            leader = threading.Thread(target=append, args=(0,))
+            leader.start()
+            first_started.wait(5)
+            group = [threading.Thread(target=append, args=(n,)) for n in (1, 2)]
+            for thread in group:
+                thread.start()
+            while len(self.log._queue) < 2:
+                time.sleep(0.001)
+            release_first.set()
+            for thread in [leader, *group]:
+                thread.join()
+
+        assert sorted(errors) == [1, 2]
+        self.log.append(3)
+
+        assert self.records() == [0, 3]
+        assert self.log.size == os.path.getsize(self.path)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
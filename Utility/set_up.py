@@ -32,7 +32,12 @@ config: dict = {"app_name": "DeliverySystem",
                 "project_name":"SE_Term_Project",
                 "customer_suffix": "\\customer\\",
                 "staff_suffix": "\\staff\\",
-                "order_suffix": "\\order\\"
+                "order_suffix": "\\order\\",
+                "order_store": "pickle",
+                "order_cache_size": 10000,
+                "wal_checkpoint_bytes": 4194304,
+                "storage_backend": "file",
+                "tariff_file": "tariff.json"
                 }
 
 